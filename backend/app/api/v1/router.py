@@ -1,17 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import httpx
+import numpy as np
 import structlog
 from datetime import datetime
 from fastapi import Query
 from app.core.database import get_db, Engine, RULPrediction
 from app.core.config import settings
+from app.core.metrics import STAGE_SECONDS, ML_CALLS
+from app.core.columnar import ColumnarResponse, wants_columnar, rows_from_columns
+from app.core.http_cache import make_etag, cache_headers, not_modified, engines_version
+from app.core.history_store import history_store
+from app.core.downsample import downsample
+from app.core.ingest import BulkIngest, IngestError, detect_format
+from app.core.rescoring import fleet_rescorer
+from app.core.singleflight import SingleFlight
 
 logger = structlog.get_logger()
 api_router = APIRouter()
 
+ENGINE_FIELDS = ("id", "name", "model", "status", "current_rul", "confidence", "last_updated", "is_active")
+
+# Concurrent dashboard refreshes share one ML call per (engine, last stored cycle)
+ml_flights = SingleFlight("ml_predict_inflight")
+# Flights outlive the request that starts them, so they run on this pooled client rather than
+# the request's (a disconnect would close it under every joined waiter); closed by the lifespan
+_flight_client: Optional[httpx.AsyncClient] = None
+
+def _flight_http() -> httpx.AsyncClient:
+    global _flight_client
+    if _flight_client is None or _flight_client.is_closed:
+        _flight_client = httpx.AsyncClient()
+    return _flight_client
+
+async def close_flight_client():
+    global _flight_client
+    if _flight_client is not None:
+        await _flight_client.aclose()
+        _flight_client = None
+
+async def _predict_engine(client: httpx.AsyncClient, engine_id: int, last_cycle: Optional[int]) -> Dict[str, Any]:
+    async def post(http: httpx.AsyncClient):
+        with STAGE_SECONDS.time(stage="ml_call"):
+            resp = await http.post(
+                f"{settings.ML_SERVICE_URL}/predict",
+                json={"unit_number": engine_id, "use_real_data": True,
+                      "uncertainty": settings.ML_PREDICT_UNCERTAINTY},
+                timeout=10.0,
+            )
+        resp.raise_for_status()
+        return resp.json()
+
+    if last_cycle is None:
+        return await post(client)
+    # No model version in the key: requests cannot pick one, and the ML service keys its own
+    # coalescing on its model generation, so a flight never spans a reload there
+    return await ml_flights.do((engine_id, last_cycle, settings.ML_PREDICT_UNCERTAINTY),
+                               lambda: post(_flight_http()))
+
 @api_router.get("/health")
 async def api_health():
     """API health check"""
@@ -19,54 +67,76 @@ async def api_health():
 
 @api_router.get("/engines", response_model=List[Dict[str, Any]])
 async def get_engines(
+    request: Request,
+    response: Response,
     limit: int = Query(7, ge=1, le=100),
     db: AsyncSession = Depends(get_db)
 ):
+    """Engines with their latest predictions: stored by the background re-scorer,
+    or fetched live from the ML service per engine when re-scoring is disabled.
+
+    Sends Accept: application/vnd.rul.columnar+json for parallel arrays
+    instead of a list of objects.
+    """
     logger.info(f"GET /engines called (limit={limit})")
-    result = await db.execute(select(Engine).limit(limit))
+    columnar = wants_columnar(request)
+    etag = make_etag("engines", limit, columnar, *await engines_version(db, limit=limit))
+    cached = not_modified(request, etag, cache="engines")
+    if cached is not None:
+        return cached
+
+    result = await db.execute(select(Engine).order_by(Engine.id).limit(limit))
     engines = result.scalars().all()
-    enriched = []
-    async with httpx.AsyncClient() as client:
-        for e in engines:
-            rul = e.current_rul
-            confidence = e.confidence
-            status = e.status
-            try:
-                # Call ML service
-                resp = await client.post(
-                    f"{settings.ML_SERVICE_URL}/predict",
-                    json={"unit_number": e.id, "use_real_data": True},
-                    timeout=10.0,
-                )
-                resp.raise_for_status()
-                pr = resp.json()
-                rul = pr.get("predicted_rul", rul)
-                confidence = pr.get("confidence", confidence)
-                status = pr.get("status", status)
-            except Exception as ml_err:
-                logger.warning(
-                    "ML call failed, using DB", engine_id=e.id, error=str(ml_err)
-                )
-            enriched.append({
-                "id": e.id,
-                "name": e.name,
-                "model": e.model,
-                "status": status,
-                "current_rul": rul,
-                "confidence": confidence,
-                "last_updated": e.last_updated.isoformat() if e.last_updated else None,
-                "is_active": e.is_active,
-            })
-
-    return enriched
+    columns = {name: [] for name in ENGINE_FIELDS}
+    ml_failed = False
+    # The background re-scorer keeps the stored predictions current
+    predictions = {e.id: (e.status, e.current_rul, e.confidence) for e in engines}
+    if not settings.RESCORE_ENABLED:
+        last_cycles = await history_store.last_cycles(db, [e.id for e in engines])
+        async with httpx.AsyncClient() as client:
+            for e in engines:
+                try:
+                    # Call ML service
+                    pr = await _predict_engine(client, e.id, last_cycles.get(e.id))
+                    ML_CALLS.inc(outcome="ok")
+                    predictions[e.id] = (pr.get("status", e.status), pr.get("predicted_rul", e.current_rul),
+                                         pr.get("confidence", e.confidence))
+                except Exception as ml_err:
+                    ML_CALLS.inc(outcome="error")
+                    ml_failed = True
+                    logger.warning(
+                        "ML call failed, using DB", engine_id=e.id, error=str(ml_err)
+                    )
+    for e in engines:
+        status, rul, confidence = predictions[e.id]
+        for name, value in zip(ENGINE_FIELDS, (e.id, e.name, e.model, status, rul, confidence,
+                                               e.last_updated, e.is_active)):
+            columns[name].append(value)
+
+    # A body with DB fallbacks must not be revalidated as if it were the live one
+    headers = cache_headers(etag) if not ml_failed else {"Cache-Control": "no-store", "Vary": "Accept"}
+    if columnar:
+        out = ColumnarResponse(columns)
+        out.headers.update(headers)
+        return out
+
+    response.headers.update(headers)
+    columns["last_updated"] = [t.isoformat() if t else None for t in columns["last_updated"]]
+    return rows_from_columns(columns)
 
 @api_router.get("/engines/{engine_id}")
-async def get_engine(engine_id: int, db: AsyncSession = Depends(get_db)):
+async def get_engine(engine_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """Get engine details."""
     result = await db.execute(select(Engine).where(Engine.id == engine_id))
     e = result.scalar_one_or_none()
     if not e:
         raise HTTPException(404, "Engine not found")
+
+    etag = make_etag("engine", *await engines_version(db, engine_id=engine_id))
+    cached = not_modified(request, etag, cache="engine")
+    if cached is not None:
+        return cached
+    response.headers.update(cache_headers(etag))
     return {
         "id": e.id,
         "name": e.name,
@@ -79,13 +149,19 @@ async def get_engine(engine_id: int, db: AsyncSession = Depends(get_db)):
     }
 
 @api_router.get("/engines/{engine_id}/rul")
-async def get_engine_rul(engine_id: int, db: AsyncSession = Depends(get_db)):
+async def get_engine_rul(engine_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """Get latest RUL prediction or current RUL."""
     # verify engine
     result = await db.execute(select(Engine).where(Engine.id == engine_id))
     e = result.scalar_one_or_none()
     if not e:
         raise HTTPException(404, "Engine not found")
+
+    etag = make_etag("engine_rul", *await engines_version(db, engine_id=engine_id))
+    cached = not_modified(request, etag, cache="engine_rul")
+    if cached is not None:
+        return cached
+    response.headers.update(cache_headers(etag))
     # fetch latest prediction
     pred = await db.execute(
         select(RULPrediction)
@@ -116,9 +192,131 @@ async def get_engine_rul(engine_id: int, db: AsyncSession = Depends(get_db)):
         "status": e.status,
     }
 
+@api_router.get("/engines/{engine_id}/history")
+async def get_engine_history(
+    engine_id: int,
+    request: Request,
+    response: Response,
+    start: Optional[int] = Query(None, ge=0, description="First cycle (inclusive)"),
+    end: Optional[int] = Query(None, ge=0, description="Last cycle (inclusive)"),
+    points: int = Query(settings.HISTORY_DEFAULT_POINTS, ge=3, le=settings.HISTORY_MAX_POINTS),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated settings/sensors, default all"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Sensor and RUL history downsampled to at most ``points`` per series.
+
+    Sensors are indexed by cycle and limited to [start, end]; the RUL series
+    is every stored prediction, indexed by time. The payload size depends on
+    ``points``, not on how long the engine has been running.
+    """
+    if start is not None and end is not None and start > end:
+        raise HTTPException(400, "start must not be after end")
+    names = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+
+    result = await db.execute(select(Engine.id).where(Engine.id == engine_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(404, "Engine not found")
+
+    extent = await history_store.extent(db, engine_id)
+    etag = make_etag("engine_history", start, end, points, method, columns,
+                     extent, *await engines_version(db, engine_id=engine_id))
+    cached = not_modified(request, etag, cache="engine_history")
+    if cached is not None:
+        return cached
+
+    try:
+        history = await history_store.read(db, engine_id, start, end, names)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    predictions = (await db.execute(
+        select(RULPrediction.timestamp, RULPrediction.predicted_rul)
+        .where(RULPrediction.engine_id == engine_id)
+        .order_by(RULPrediction.timestamp)
+    )).all()
+
+    with STAGE_SECONDS.time(stage="history_downsample"):
+        cycles, values = downsample(history.cycles, history.values, points, method)
+        values = np.round(values.astype(np.float64), 4)
+        series = {
+            name: {"cycle": cycles[:, j].tolist(), "value": values[:, j].tolist()}
+            for j, name in enumerate(history.columns)
+        }
+
+        # Naive UTC timestamps as integer microseconds, so LTTB has a numeric x axis
+        rul_times = np.array([t for t, _ in predictions], dtype="datetime64[us]").astype(np.int64)
+        rul_values = np.array([r for _, r in predictions], dtype=np.float64)
+        rul_x, rul_y = downsample(rul_times, rul_values, points, method)
+        rul = {
+            "timestamp": np.datetime_as_string(rul_x[:, 0].astype("datetime64[us]")).tolist(),
+            "value": np.round(rul_y[:, 0], 2).tolist(),
+            "total_points": len(predictions),
+        }
+
+    response.headers.update(cache_headers(etag))
+    return {
+        "engine_id": engine_id,
+        "method": method,
+        "points": points,
+        "range": {
+            "start": int(history.cycles[0]) if len(history.cycles) else None,
+            "end": int(history.cycles[-1]) if len(history.cycles) else None,
+        },
+        "total_points": len(history.cycles),
+        "series": series,
+        "rul": rul,
+    }
+
+@api_router.post("/readings:bulk")
+async def bulk_readings(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(cmapss|ndjson)$",
+                                  description="Body format; default from Content-Type"),
+    batch_rows: int = Query(settings.INGEST_BATCH_ROWS, ge=1, le=100000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream readings in as C-MAPSS text or NDJSON.
+
+    The body is parsed as it arrives and committed every ``batch_rows`` rows;
+    the response reports each batch's row counts and throughput. A malformed
+    line stops the upload with a 400 whose detail lists the batches already
+    committed.
+    """
+    fmt = format or detect_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(415, "Send text/plain (C-MAPSS) or application/x-ndjson, or pass ?format=")
+
+    ingest = BulkIngest(db, fmt, batch_rows=batch_rows)
+    try:
+        result = await ingest.run(request.stream())
+    except IngestError as e:
+        await db.rollback()
+        raise HTTPException(400, {"error": str(e), "line": e.line, "committed": ingest.summary()})
+    logger.info("Bulk ingest", format=fmt, rows=result["rows"], stored=result["stored"],
+                batches=len(result["batches"]), rows_per_second=result["rows_per_second"])
+    return result
+
+@api_router.get("/rescoring")
+async def rescoring_status():
+    """Background re-scoring settings and the outcome of its last run"""
+    return {
+        "enabled": settings.RESCORE_ENABLED,
+        "interval_seconds": fleet_rescorer.interval,
+        "batch_size": fleet_rescorer.batch_size,
+        "concurrency": fleet_rescorer.concurrency,
+        "tracked_engines": len(fleet_rescorer.scored),
+        "last_run": fleet_rescorer.last_run,
+    }
+
 @api_router.get("/dashboard/summary")
-async def summary(db: AsyncSession = Depends(get_db)):
+async def summary(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """Dashboard statistics."""
+    etag = make_etag("summary", *await engines_version(db))
+    cached = not_modified(request, etag, cache="summary")
+    if cached is not None:
+        return cached
+    response.headers.update(cache_headers(etag))
+
     result = await db.execute(select(Engine))
     engines = result.scalars().all()
     total = len(engines)
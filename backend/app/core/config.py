@@ -29,9 +29,36 @@ class Settings(BaseSettings):
     
     # ML Service Settings
     ML_SERVICE_URL: str = "http://localhost:8001"
+    # Ask the ML service for MC dropout uncertainty, so confidence comes from the model
+    ML_PREDICT_UNCERTAINTY: bool = False
+
+    # Background re-scoring of engines with new readings; while enabled, GET /engines serves
+    # the stored predictions instead of calling the ML service per engine
+    RESCORE_ENABLED: bool = True
+    RESCORE_INTERVAL_SECONDS: float = 30.0
+    RESCORE_BATCH_SIZE: int = 256
+    RESCORE_CONCURRENCY: int = 2
+    # Readings sent per engine; match the model's sequence length
+    RESCORE_WINDOW_ROWS: int = 50
+    RESCORE_TIMEOUT_SECONDS: float = 30.0
     
     # Logging
     LOG_LEVEL: str = "INFO"
+
+    # Prometheus metrics at /metrics; when off, instrumentation is a no-op
+    METRICS_ENABLED: bool = True
+
+    # Rows per sensor history chunk; the newest chunk of an engine fills up before a new one starts
+    HISTORY_CHUNK_ROWS: int = 256
+    # Point budget per series for /engines/{id}/history when the client does not ask for one
+    HISTORY_DEFAULT_POINTS: int = 500
+    HISTORY_MAX_POINTS: int = 5000
+
+    # POST /readings:bulk flushes (history insert + engine update + commit) every this many rows
+    INGEST_BATCH_ROWS: int = 5000
+
+    # max-age for ETag'd GET endpoints; 0 makes clients revalidate every time
+    HTTP_CACHE_MAX_AGE: int = 0
     
     class Config:
         env_file = ".env"
@@ -1,7 +1,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, LargeBinary, Index
 from datetime import datetime
 from app.core.config import settings
 from sqlalchemy.ext.asyncio import create_async_engine
@@ -34,7 +34,7 @@ class Engine(Base):
     status = Column(String, default="healthy")
     current_rul = Column(Float)
     confidence = Column(Float)
-    last_updated = Column(DateTime, default=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = Column(Boolean, default=True)
 
 
@@ -64,6 +64,21 @@ class SensorReading(Base):
     sensor_14 = Column(Float)
 
 
+class SensorChunk(Base):
+    """Append-only block of one engine's per-cycle history, packed by history_store"""
+    __tablename__ = "sensor_chunks"
+
+    id = Column(Integer, primary_key=True)
+    engine_id = Column(Integer, nullable=False)
+    first_cycle = Column(Integer, nullable=False)
+    last_cycle = Column(Integer, nullable=False)
+    rows = Column(Integer, nullable=False)
+    cycles = Column(LargeBinary, nullable=False)  # int32[rows]
+    data = Column(LargeBinary, nullable=False)    # float32[rows, 24], settings then sensors
+
+    __table_args__ = (Index("ix_sensor_chunks_range", "engine_id", "first_cycle", "last_cycle"),)
+
+
 class RULPrediction(Base):
     __tablename__ = "rul_predictions"
     
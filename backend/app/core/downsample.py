@@ -0,0 +1,92 @@
+"""Downsampling of per-cycle series to a fixed point budget for charts.
+
+Both methods work on a shared x axis (cycles) and a (n, k) block of series at
+once and return, for every series, the indices of the rows to keep, so each
+series keeps its own extremes and shape.
+
+- ``lttb``: Largest-Triangle-Three-Buckets. Keeps the visual shape of a line.
+  The scan over buckets is inherently sequential, so it loops over buckets
+  but is vectorized across rows in a bucket and across series.
+- ``minmax``: the min and max row of every bucket, fully vectorized. Cheaper,
+  and guarantees that spikes survive.
+"""
+from typing import Tuple
+
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+
+def _edges(start: int, stop: int, buckets: int) -> np.ndarray:
+    return np.linspace(start, stop, buckets + 1).astype(np.intp)
+
+
+def _all_rows(n: int, k: int) -> np.ndarray:
+    return np.repeat(np.arange(n, dtype=np.intp)[:, None], k, axis=1)
+
+
+def minmax(x: np.ndarray, values: np.ndarray, points: int) -> np.ndarray:
+    """(<= points, k) row indices: the min and max of each of points // 2 buckets, per series"""
+    n, k = values.shape
+    buckets = points // 2
+    if n <= points or buckets < 1:
+        return _all_rows(n, k)
+
+    edges = _edges(0, n, buckets)
+    lengths = np.diff(edges)
+    offsets = np.arange(lengths.max(), dtype=np.intp)
+    # (buckets, longest) row matrix; short buckets repeat their last row, which never changes min/max
+    rows = np.minimum(edges[:-1, None] + offsets, edges[1:, None] - 1)
+    block = values[rows]  # (buckets, longest, k)
+
+    lo = np.take_along_axis(rows, block.argmin(axis=1), axis=1)
+    hi = np.take_along_axis(rows, block.argmax(axis=1), axis=1)
+    # Within a bucket, emit the two extremes in x order
+    return np.sort(np.stack([lo, hi], axis=1), axis=1).reshape(2 * buckets, k)
+
+
+def lttb(x: np.ndarray, values: np.ndarray, points: int) -> np.ndarray:
+    """(points, k) row indices chosen by Largest-Triangle-Three-Buckets, per series"""
+    n, k = values.shape
+    if n <= points or points < 3:
+        return _all_rows(n, k)
+
+    x = x.astype(np.float64)
+    values = values.astype(np.float64)
+    buckets = points - 2
+    edges = _edges(1, n - 1, buckets)
+
+    # Mean point of every bucket, for the "next bucket" vertex of each triangle
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(values[1:n - 1], edges[:-1] - 1, axis=0)
+    counts = np.diff(edges)
+    mean_x = np.append(sums_x / counts, x[-1])
+    mean_y = np.vstack([sums_y / counts[:, None], values[-1]])
+
+    chosen = np.empty((points, k), dtype=np.intp)
+    chosen[0] = 0
+    chosen[-1] = n - 1
+    cols = np.arange(k)
+    a = np.zeros(k, dtype=np.intp)
+    for i in range(buckets):
+        start, stop = edges[i], edges[i + 1]
+        xa, ya = x[a], values[a, cols]
+        xc, yc = mean_x[i + 1], mean_y[i + 1]
+        xb, yb = x[start:stop, None], values[start:stop]
+        area = np.abs((xa - xc) * (yb - ya) - (xa - xb) * (yc - ya))
+        a = start + area.argmax(axis=0)
+        chosen[i + 1] = a
+    return chosen
+
+
+def downsample(x: np.ndarray, values: np.ndarray, points: int, method: str = "lttb") -> Tuple[np.ndarray, np.ndarray]:
+    """Per-series (x, y) arrays of at most ``points`` rows: two (m, k) matrices, column j for series j"""
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method {method!r}, expected one of {METHODS}")
+    if values.ndim == 1:
+        values = values[:, None]
+    if not len(x):
+        return np.empty((0, values.shape[1]), dtype=x.dtype), np.empty((0, values.shape[1]), dtype=values.dtype)
+
+    index = (lttb if method == "lttb" else minmax)(x, values, points)
+    return x[index], np.take_along_axis(values, index, axis=0)
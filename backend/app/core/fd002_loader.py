@@ -2,7 +2,8 @@ import pandas as pd
 import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from app.core.database import Engine, SensorReading
+from app.core.database import Engine
+from app.core.history_store import history_store, HISTORY_COLUMNS
 import structlog
 from typing import List, Dict, Any
 import os
@@ -104,59 +105,32 @@ async def populate_fd002_engines(session: AsyncSession, data_file_path: str) ->
         await session.rollback()
         raise
 
-async def populate_sensor_readings(session: AsyncSession, data_file_path: str, limit_per_engine: int = 50):
-    """Populate sensor readings for engines (limited to recent cycles)"""
+async def populate_sensor_history(session: AsyncSession, data_file_path: str):
+    """Store every engine's full per-cycle history (all settings and sensors) in the chunked history store"""
     try:
-        df = load_fd002_data(data_file_path)
-        
-        # Get engine IDs from database
+        df = load_fd002_data(data_file_path).sort_values(['unit_number', 'cycle'], kind='stable')
+
         result = await session.execute(text("SELECT id, name FROM engines"))
         engine_mapping = {name: id for id, name in result.fetchall()}
-        
-        readings_count = 0
-        unique_units = df['unit_number'].unique()
-        
-        for unit_number in unique_units:
-            engine_name = f"Engine_{unit_number:03d}"
-            if engine_name not in engine_mapping:
-                continue
-                
-            engine_id = engine_mapping[engine_name]
-            engine_data = df[df['unit_number'] == unit_number].sort_values('cycle')
-            
-            recent_data = engine_data.tail(limit_per_engine)
-            
-            for _, row in recent_data.iterrows():
-                reading = SensorReading(
-                    engine_id=engine_id,
-                    cycle=int(row['cycle']),
-                    setting_1=float(row['setting_1']),
-                    setting_2=float(row['setting_2']),
-                    setting_3=float(row['setting_3']),
-                    sensor_1=float(row['sensor_1']),
-                    sensor_2=float(row['sensor_2']),
-                    sensor_3=float(row['sensor_3']),
-                    sensor_4=float(row['sensor_4']),
-                    sensor_5=float(row['sensor_5']),
-                    sensor_6=float(row['sensor_6']),
-                    sensor_7=float(row['sensor_7']),
-                    sensor_8=float(row['sensor_8']),
-                    sensor_9=float(row['sensor_9']),
-                    sensor_10=float(row['sensor_10']),
-                    sensor_11=float(row['sensor_11']),
-                    sensor_12=float(row['sensor_12']),
-                    sensor_13=float(row['sensor_13']),
-                    sensor_14=float(row['sensor_14'])
-                )
-                
-                session.add(reading)
-                readings_count += 1
-        
+
+        units = df['unit_number'].to_numpy()
+        cycles = df['cycle'].to_numpy()
+        values = df[HISTORY_COLUMNS].to_numpy(dtype=np.float32)
+        unique_units, starts = np.unique(units, return_index=True)
+        ends = np.append(starts[1:], len(units))
+
+        histories = {}
+        for unit_number, start, end in zip(unique_units, starts, ends):
+            engine_id = engine_mapping.get(f"Engine_{unit_number:03d}")
+            if engine_id is not None:
+                histories[engine_id] = (cycles[start:end], values[start:end])
+
+        stored = await history_store.append_many(session, histories)
         await session.commit()
-        logger.info(f"Successfully created {readings_count} sensor readings")
-        
+        logger.info(f"Stored {sum(stored.values())} history rows for {len(stored)} engines")
+
     except Exception as e:
-        logger.error(f"Failed to populate sensor readings: {e}")
+        logger.error(f"Failed to populate sensor history: {e}")
         await session.rollback()
         raise
 
@@ -172,6 +146,7 @@ async def initialize_fd002_data(session: AsyncSession, force_reload: bool = Fals
         
         if force_reload:
             await session.execute(text("DELETE FROM sensor_readings"))
+            await session.execute(text("DELETE FROM sensor_chunks"))
             await session.execute(text("DELETE FROM rul_predictions"))
             await session.execute(text("DELETE FROM engines"))
             await session.commit()
@@ -200,7 +175,7 @@ async def initialize_fd002_data(session: AsyncSession, force_reload: bool = Fals
 
         engines = await populate_fd002_engines(session, data_file_path)
         
-        await populate_sensor_readings(session, data_file_path, limit_per_engine=20)
+        await populate_sensor_history(session, data_file_path)
         
         logger.info("FD002 data initialization completed successfully")
         
@@ -0,0 +1,210 @@
+"""Chunked per-engine sensor history.
+
+Each engine's cycles live in append-only ``sensor_chunks`` rows. A chunk
+packs up to ``HISTORY_CHUNK_ROWS`` consecutive cycles as an int32 cycle
+vector and a float32 (rows, 24) block holding all 3 operating settings and
+all 21 sensors. ``(engine_id, first_cycle, last_cycle)`` is the range index.
+A range read is one indexed query whose blobs are decoded with
+``np.frombuffer``, with no per-row ORM objects.
+
+Only an engine's newest chunk is ever rewritten (to top it up); full chunks
+are immutable. Cycles are strictly increasing per engine, and readings at or
+below an engine's last stored cycle are dropped, so re-sent batches are
+idempotent.
+"""
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import SensorChunk
+
+HISTORY_COLUMNS = [f"setting_{i}" for i in range(1, 4)] + [f"sensor_{i}" for i in range(1, 22)]
+NUM_COLUMNS = len(HISTORY_COLUMNS)
+
+
+class HistoryRange(NamedTuple):
+    cycles: np.ndarray  # int32[n], ascending
+    values: np.ndarray  # float32[n, len(columns)]
+    columns: List[str]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self.columns.index(name)]
+
+
+def _decode(cycles: bytes, data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    return np.frombuffer(cycles, dtype=np.int32), np.frombuffer(data, dtype=np.float32).reshape(-1, NUM_COLUMNS)
+
+
+def _chunk(engine_id: int, cycles: np.ndarray, values: np.ndarray) -> Dict[str, object]:
+    return {
+        "engine_id": engine_id,
+        "first_cycle": int(cycles[0]),
+        "last_cycle": int(cycles[-1]),
+        "rows": len(cycles),
+        "cycles": np.ascontiguousarray(cycles, dtype=np.int32).tobytes(),
+        "data": np.ascontiguousarray(values, dtype=np.float32).tobytes()
+    }
+
+
+def _column_index(columns: Optional[Sequence[str]]) -> Tuple[List[str], Optional[np.ndarray]]:
+    if columns is None:
+        return list(HISTORY_COLUMNS), None
+    unknown = [name for name in columns if name not in HISTORY_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown history columns {unknown}")
+    return list(columns), np.array([HISTORY_COLUMNS.index(name) for name in columns], dtype=np.intp)
+
+
+class SensorHistoryStore:
+
+    def __init__(self, chunk_rows: int = 256):
+        self.chunk_rows = chunk_rows
+
+    async def _tails(self, db: AsyncSession, engine_ids: Iterable[int]) -> Dict[int, Any]:
+        """Newest chunk row of each engine (chunks are append-only, so the highest id).
+
+        Plain rows, not ORM objects: chunks are rewritten with Core updates, so
+        identity-mapped instances would go stale within a session.
+        """
+        newest = (select(func.max(SensorChunk.id))
+                  .where(SensorChunk.engine_id.in_(list(engine_ids)))
+                  .group_by(SensorChunk.engine_id))
+        result = await db.execute(
+            select(SensorChunk.id, SensorChunk.engine_id, SensorChunk.last_cycle, SensorChunk.rows,
+                   SensorChunk.cycles, SensorChunk.data)
+            .where(SensorChunk.id.in_(newest))
+        )
+        return {chunk.engine_id: chunk for chunk in result.all()}
+
+    async def last_cycles(self, db: AsyncSession, engine_ids: Iterable[int]) -> Dict[int, int]:
+        result = await db.execute(
+            select(SensorChunk.engine_id, func.max(SensorChunk.last_cycle))
+            .where(SensorChunk.engine_id.in_(list(engine_ids)))
+            .group_by(SensorChunk.engine_id)
+        )
+        return {engine_id: last for engine_id, last in result.all()}
+
+    async def append_many(self, db: AsyncSession,
+                          histories: Dict[int, Tuple[np.ndarray, np.ndarray]]) -> Dict[int, int]:
+        """Append (cycles, values[n, 24]) per engine; returns rows stored per engine.
+
+        Writes go through the caller's session and are committed by the caller.
+        """
+        tails = await self._tails(db, histories)
+        inserts, updates, stored = [], [], {}
+
+        for engine_id, (cycles, values) in histories.items():
+            cycles = np.asarray(cycles, dtype=np.int64)
+            values = np.asarray(values, dtype=np.float32)
+            if values.shape != (len(cycles), NUM_COLUMNS):
+                raise ValueError(f"Engine {engine_id}: expected values of shape ({len(cycles)}, {NUM_COLUMNS}), "
+                                 f"got {values.shape}")
+
+            # Sort, drop duplicate cycles (last reading wins) and anything already stored
+            order = np.argsort(cycles, kind="stable")
+            cycles, values = cycles[order], values[order]
+            keep = np.append(cycles[1:] != cycles[:-1], True)
+            tail = tails.get(engine_id)
+            if tail is not None:
+                keep &= cycles > tail.last_cycle
+            cycles, values = cycles[keep], values[keep]
+            stored[engine_id] = len(cycles)
+            if not len(cycles):
+                continue
+
+            start = 0
+            if tail is not None and tail.rows < self.chunk_rows:
+                take = self.chunk_rows - tail.rows
+                tail_cycles, tail_values = _decode(tail.cycles, tail.data)
+                merged = _chunk(engine_id, np.concatenate([tail_cycles, cycles[:take]]),
+                                np.concatenate([tail_values, values[:take]]))
+                updates.append({"chunk_id": tail.id, **merged})
+                start = take
+            for i in range(start, len(cycles), self.chunk_rows):
+                inserts.append(_chunk(engine_id, cycles[i:i + self.chunk_rows], values[i:i + self.chunk_rows]))
+
+        if updates:
+            table = SensorChunk.__table__
+            await db.execute(
+                update(table).where(table.c.id == bindparam("chunk_id")).values(
+                    last_cycle=bindparam("new_last_cycle"), rows=bindparam("new_rows"),
+                    cycles=bindparam("new_cycles"), data=bindparam("new_data")
+                ),
+                [{"chunk_id": u["chunk_id"], "new_last_cycle": u["last_cycle"], "new_rows": u["rows"],
+                  "new_cycles": u["cycles"], "new_data": u["data"]} for u in updates]
+            )
+        if inserts:
+            await db.execute(insert(SensorChunk), inserts)
+        return stored
+
+    async def append(self, db: AsyncSession, engine_id: int, cycles: np.ndarray, values: np.ndarray) -> int:
+        return (await self.append_many(db, {engine_id: (cycles, values)}))[engine_id]
+
+    async def read(self, db: AsyncSession, engine_id: int, start: Optional[int] = None, end: Optional[int] = None,
+                   columns: Optional[Sequence[str]] = None) -> HistoryRange:
+        """Cycles in [start, end] (inclusive, open-ended when None) as NumPy arrays, in one query"""
+        names, index = _column_index(columns)
+        query = select(SensorChunk.cycles, SensorChunk.data).where(SensorChunk.engine_id == engine_id)
+        if start is not None:
+            query = query.where(SensorChunk.last_cycle >= start)
+        if end is not None:
+            query = query.where(SensorChunk.first_cycle <= end)
+        chunks = (await db.execute(query.order_by(SensorChunk.first_cycle))).all()
+
+        if not chunks:
+            return HistoryRange(np.empty(0, dtype=np.int32), np.empty((0, len(names)), dtype=np.float32), names)
+
+        decoded = [_decode(c, d) for c, d in chunks]
+        cycles = np.concatenate([c for c, _ in decoded]) if len(decoded) > 1 else decoded[0][0]
+        values = np.concatenate([v for _, v in decoded]) if len(decoded) > 1 else decoded[0][1]
+
+        # Only the first and last chunk can straddle the range; trim them with a binary search
+        lo = 0 if start is None else int(np.searchsorted(cycles, start, side="left"))
+        hi = len(cycles) if end is None else int(np.searchsorted(cycles, end, side="right"))
+        cycles, values = cycles[lo:hi], values[lo:hi]
+        if index is not None:
+            values = values[:, index]
+        return HistoryRange(cycles, values, names)
+
+    async def latest(self, db: AsyncSession, engine_ids: Iterable[int], rows: int) -> Dict[int, HistoryRange]:
+        """The last ``rows`` readings of each engine (all 24 columns), in one query.
+
+        A running sum of chunk sizes, newest chunk first, selects just the
+        chunks that reach back ``rows`` readings.
+        """
+        newer = func.sum(SensorChunk.rows).over(partition_by=SensorChunk.engine_id,
+                                                order_by=SensorChunk.first_cycle.desc())
+        ranked = (select(SensorChunk.engine_id, SensorChunk.first_cycle, SensorChunk.cycles, SensorChunk.data,
+                         (newer - SensorChunk.rows).label("newer_rows"))
+                  .where(SensorChunk.engine_id.in_(list(engine_ids)))
+                  .subquery())
+        result = await db.execute(
+            select(ranked.c.engine_id, ranked.c.cycles, ranked.c.data)
+            .where(ranked.c.newer_rows < rows)
+            .order_by(ranked.c.engine_id, ranked.c.first_cycle)
+        )
+
+        parts: Dict[int, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        for engine_id, cycles, data in result.all():
+            parts.setdefault(engine_id, []).append(_decode(cycles, data))
+        out = {}
+        for engine_id, decoded in parts.items():
+            cycles = np.concatenate([c for c, _ in decoded])[-rows:]
+            values = np.concatenate([v for _, v in decoded])[-rows:]
+            out[engine_id] = HistoryRange(cycles, values, list(HISTORY_COLUMNS))
+        return out
+
+    async def extent(self, db: AsyncSession, engine_id: int) -> Optional[Tuple[int, int, int]]:
+        """(first_cycle, last_cycle, rows) stored for an engine, or None"""
+        result = await db.execute(
+            select(func.min(SensorChunk.first_cycle), func.max(SensorChunk.last_cycle), func.sum(SensorChunk.rows))
+            .where(SensorChunk.engine_id == engine_id)
+        )
+        first, last, rows = result.one()
+        return None if rows is None else (int(first), int(last), int(rows))
+
+
+history_store = SensorHistoryStore(chunk_rows=settings.HISTORY_CHUNK_ROWS)
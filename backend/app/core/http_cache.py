@@ -0,0 +1,75 @@
+"""Strong ETags and conditional GET for read endpoints.
+
+An ETag hashes a cheap version vector for the rows behind a response: engine
+count, newest ``Engine.last_updated``, the id range, and the newest
+``RULPrediction.id``. The handler compares it with If-None-Match before it
+does any expensive work. Any write that changes an engine must bump
+``last_updated`` (the column has ``onupdate`` for ORM and Core updates).
+"""
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import Engine, RULPrediction
+from app.core.metrics import CACHE_REQUESTS
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.HTTP_CACHE_MAX_AGE}, must-revalidate",
+        "Vary": "Accept"
+    }
+
+
+def not_modified(request: Request, etag: str, cache: str) -> Optional[Response]:
+    """304 response if the client already holds this representation, else None"""
+    if _matches(request.headers.get("if-none-match"), etag):
+        CACHE_REQUESTS.inc(cache=cache, result="hit")
+        return Response(status_code=304, headers=cache_headers(etag))
+    CACHE_REQUESTS.inc(cache=cache, result="miss")
+    return None
+
+
+async def engines_version(db: AsyncSession, limit: Optional[int] = None,
+                          engine_id: Optional[int] = None) -> tuple:
+    """Version vector for all engines, the first ``limit`` by id, or a single engine"""
+    page = select(Engine.id, Engine.last_updated).order_by(Engine.id)
+    if engine_id is not None:
+        page = page.where(Engine.id == engine_id)
+    if limit is not None:
+        page = page.limit(limit)
+    page = page.subquery()
+
+    latest_prediction = select(func.max(RULPrediction.id)).where(
+        RULPrediction.engine_id.in_(select(page.c.id))
+    ).scalar_subquery()
+
+    result = await db.execute(select(
+        func.count(page.c.id),
+        func.min(page.c.id),
+        func.max(page.c.id),
+        func.max(page.c.last_updated),
+        latest_prediction
+    ))
+    return tuple(result.one())
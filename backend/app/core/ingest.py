@@ -0,0 +1,241 @@
+"""Streaming bulk ingest of sensor readings.
+
+The request body is consumed chunk by chunk as it arrives. Complete lines are
+parsed into NumPy arrays straight away, the partial last line is carried
+over, and parsed rows are flushed every ``INGEST_BATCH_ROWS`` rows. A flush
+is one ``history_store.append_many`` call, one UPDATE of the touched engines'
+``last_updated`` (which moves their ETags) and one commit, so a long upload
+never holds more than a batch in memory or in an open transaction.
+
+Two body formats:
+
+- ``cmapss``: C-MAPSS whitespace text, 26 columns per line (unit number,
+  cycle, 3 settings, 21 sensors). Units map to engines by name, as in
+  ``fd002_loader``.
+- ``ndjson``: one JSON object per line with ``engine_id`` (or
+  ``unit_number``), ``cycle``, and either ``values`` (the 24 settings and
+  sensors in ``HISTORY_COLUMNS`` order) or one key per column.
+
+Readings for unknown engines are counted and skipped. Readings at or below an
+engine's last stored cycle are skipped by the history store, so re-sending a
+batch is harmless.
+"""
+import json
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import Engine
+from app.core.history_store import HISTORY_COLUMNS, NUM_COLUMNS, history_store
+from app.core.metrics import STAGE_SECONDS, INGEST_ROWS
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+INGEST_FORMATS = ("cmapss", "ndjson")
+CMAPSS_FIELDS = 2 + NUM_COLUMNS
+
+Rows = Tuple[np.ndarray, np.ndarray, np.ndarray]  # engine ids (-1 unknown), cycles, values[n, 24]
+
+
+class IngestError(ValueError):
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+def detect_format(content_type: Optional[str]) -> Optional[str]:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines"):
+        return "ndjson"
+    if content_type in ("text/plain", "text/x-cmapss"):
+        return "cmapss"
+    return None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[bytes]]:
+    """Complete lines of each body chunk; a line split across chunks is carried over"""
+    remainder = b""
+    async for chunk in chunks:
+        lines = (remainder + chunk).split(b"\n")
+        remainder = lines.pop()
+        if lines:
+            yield lines
+    if remainder.strip():
+        yield [remainder]
+
+
+def _map_units(units: np.ndarray, engine_units: Dict[int, int]) -> np.ndarray:
+    unique, inverse = np.unique(units, return_inverse=True)
+    return np.array([engine_units.get(int(u), -1) for u in unique], dtype=np.int64)[inverse]
+
+
+def parse_cmapss(lines: List[bytes], first_line: int, engine_units: Dict[int, int]) -> Rows:
+    rows = [line.split() for line in lines]
+    rows = [row for row in rows if row]
+    if not rows:
+        return _empty()
+    try:
+        block = np.array(rows, dtype=np.float64)
+    except ValueError:
+        # Ragged or non-numeric; find the offending line for the error message
+        for i, line in enumerate(lines):
+            fields = line.split()
+            if fields and len(fields) != CMAPSS_FIELDS:
+                raise IngestError(first_line + i, f"expected {CMAPSS_FIELDS} fields, got {len(fields)}")
+            try:
+                [float(f) for f in fields]
+            except ValueError:
+                raise IngestError(first_line + i, "non-numeric field")
+        raise
+    if block.shape[1] != CMAPSS_FIELDS:
+        raise IngestError(first_line, f"expected {CMAPSS_FIELDS} fields, got {block.shape[1]}")
+    units = block[:, 0].astype(np.int64)
+    return _map_units(units, engine_units), block[:, 1].astype(np.int64), block[:, 2:].astype(np.float32)
+
+
+def parse_ndjson(lines: List[bytes], first_line: int, engine_units: Dict[int, int]) -> Rows:
+    loads = orjson.loads if orjson is not None else json.loads
+    ids, cycles, values = [], [], []
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+            if "engine_id" in record:
+                ids.append(int(record["engine_id"]))
+            else:
+                ids.append(engine_units.get(int(record["unit_number"]), -1))
+            cycles.append(int(record["cycle"]))
+            row = record["values"] if "values" in record else [record[name] for name in HISTORY_COLUMNS]
+            if len(row) != NUM_COLUMNS:
+                raise ValueError(f"expected {NUM_COLUMNS} values, got {len(row)}")
+            values.append(row)
+        except KeyError as e:
+            raise IngestError(first_line + i, f"missing field {e}")
+        except (ValueError, TypeError) as e:
+            raise IngestError(first_line + i, str(e))
+    if not ids:
+        return _empty()
+    try:
+        block = np.array(values, dtype=np.float32)
+    except (ValueError, TypeError) as e:
+        raise IngestError(first_line, f"non-numeric values: {e}")
+    return np.array(ids, dtype=np.int64), np.array(cycles, dtype=np.int64), block
+
+
+PARSERS = {"cmapss": parse_cmapss, "ndjson": parse_ndjson}
+
+
+def _empty() -> Rows:
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty((0, NUM_COLUMNS), dtype=np.float32)
+
+
+class BulkIngest:
+    """One upload: parses chunks as they arrive and flushes a batch every ``batch_rows`` rows"""
+
+    def __init__(self, db: AsyncSession, fmt: str, batch_rows: int = 5000):
+        if fmt not in INGEST_FORMATS:
+            raise ValueError(f"Unknown ingest format {fmt!r}, expected one of {INGEST_FORMATS}")
+        self.db = db
+        self.parse = PARSERS[fmt]
+        self.format = fmt
+        self.batch_rows = batch_rows
+        self.batches: List[Dict[str, Any]] = []
+        self._pending: List[Rows] = []
+        self._pending_rows = 0
+        self._parse_seconds = 0.0
+
+    async def _engines(self) -> Tuple[np.ndarray, Dict[int, int]]:
+        result = await self.db.execute(select(Engine.id, Engine.name))
+        known, units = [], {}
+        for engine_id, name in result.all():
+            known.append(engine_id)
+            # Same naming as fd002_loader: Engine_001 is C-MAPSS unit 1
+            if name and name.startswith("Engine_") and name[7:].isdigit():
+                units[int(name[7:])] = engine_id
+        return np.array(known, dtype=np.int64), units
+
+    async def _flush(self, known: np.ndarray):
+        if not self._pending_rows:
+            return
+        ids, cycles, values = (np.concatenate(parts) for parts in zip(*self._pending))
+        self._pending, self._pending_rows = [], 0
+        write_start = time.perf_counter()
+
+        valid = np.isin(ids, known)
+        unknown = int((~valid).sum())
+        ids, cycles, values = ids[valid], cycles[valid], values[valid]
+        order = np.argsort(ids, kind="stable")
+        ids, cycles, values = ids[order], cycles[order], values[order]
+        engine_ids, starts = np.unique(ids, return_index=True)
+        ends = np.append(starts[1:], len(ids))
+        histories = {int(e): (cycles[s:t], values[s:t]) for e, s, t in zip(engine_ids, starts, ends)}
+
+        stored = await history_store.append_many(self.db, histories) if histories else {}
+        touched = [engine_id for engine_id, n in stored.items() if n]
+        if touched:
+            await self.db.execute(
+                update(Engine).where(Engine.id.in_(touched)).values(last_updated=datetime.utcnow(), is_active=True)
+            )
+        await self.db.commit()
+
+        write_seconds = time.perf_counter() - write_start
+        STAGE_SECONDS.observe(write_seconds, stage="ingest_write")
+        rows = len(valid)
+        stored_rows = sum(stored.values())
+        INGEST_ROWS.inc(stored_rows, outcome="stored")
+        INGEST_ROWS.inc(len(ids) - stored_rows, outcome="duplicate")
+        INGEST_ROWS.inc(unknown, outcome="unknown_engine")
+        seconds = write_seconds + self._parse_seconds
+        self.batches.append({
+            "batch": len(self.batches),
+            "rows": rows,
+            "stored": stored_rows,
+            "duplicates": len(ids) - stored_rows,
+            "unknown_engine": unknown,
+            "engines": len(touched),
+            "parse_ms": round(self._parse_seconds * 1000, 2),
+            "write_ms": round(write_seconds * 1000, 2),
+            "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None
+        })
+        self._parse_seconds = 0.0
+
+    async def run(self, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        known, engine_units = await self._engines()
+        line = 1
+        async for lines in iter_lines(chunks):
+            parse_start = time.perf_counter()
+            rows = self.parse(lines, line, engine_units)
+            parse_seconds = time.perf_counter() - parse_start
+            self._parse_seconds += parse_seconds
+            STAGE_SECONDS.observe(parse_seconds, stage="ingest_parse")
+            line += len(lines)
+            if len(rows[0]):
+                self._pending.append(rows)
+                self._pending_rows += len(rows[0])
+            if self._pending_rows >= self.batch_rows:
+                await self._flush(known)
+        await self._flush(known)
+        return self.summary(time.perf_counter() - start)
+
+    def summary(self, seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Totals over the flushed batches; rows still pending (after an error) are not counted"""
+        rows = sum(b["rows"] for b in self.batches)
+        return {
+            "format": self.format,
+            "rows": rows,
+            "stored": sum(b["stored"] for b in self.batches),
+            "duplicates": sum(b["duplicates"] for b in self.batches),
+            "unknown_engine": sum(b["unknown_engine"] for b in self.batches),
+            "elapsed_ms": round(seconds * 1000, 2) if seconds is not None else None,
+            "rows_per_second": round(rows / seconds, 1) if seconds else None,
+            "batches": self.batches
+        }
@@ -0,0 +1,157 @@
+"""Background fleet re-scoring.
+
+Every ``RESCORE_INTERVAL_SECONDS`` the scheduler looks up each active
+engine's newest stored cycle. Engines that have moved past the cycle they
+were last scored at are re-scored. Their latest windows come from the history
+store in one query, and they go to the ML service's ``/predict/batch`` in
+batches of ``RESCORE_BATCH_SIZE``, with up to ``RESCORE_CONCURRENCY`` calls in
+flight. Each batch's results are written back with one executemany UPDATE of
+``engines`` (current_rul, confidence, status, last_updated) and one
+executemany INSERT of ``rul_predictions``, then committed.
+
+Read endpoints then serve the stored values and never wait on inference.
+Scored cycles are kept in memory, so after a restart the first run re-scores
+the whole fleet, replacing the loader's heuristic RUL.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+import structlog
+from sqlalchemy import bindparam, insert, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, Engine, RULPrediction
+from app.core.history_store import HistoryRange, history_store
+from app.core.metrics import STAGE_SECONDS, ML_CALLS, RESCORED_ENGINES
+
+logger = structlog.get_logger()
+
+
+class FleetRescorer:
+
+    def __init__(self, interval: float = 30.0, batch_size: int = 256, concurrency: int = 2,
+                 window_rows: int = 50, timeout: float = 30.0, uncertainty: bool = False):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.window_rows = window_rows
+        self.timeout = timeout
+        self.uncertainty = uncertainty
+        # engine_id -> newest cycle included in its last stored prediction
+        self.scored: Dict[int, int] = {}
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("Fleet re-scoring failed", error=str(e))
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        with STAGE_SECONDS.time(stage="rescore_read"):
+            async with AsyncSessionLocal() as db:
+                active = (await db.execute(select(Engine.id).where(Engine.is_active.is_(True)))).scalars().all()
+                last = await history_store.last_cycles(db, active)
+                dirty = sorted(engine_id for engine_id, cycle in last.items() if self.scored.get(engine_id) != cycle)
+                windows = await history_store.latest(db, dirty, self.window_rows) if dirty else {}
+
+        batches = [dirty[i:i + self.batch_size] for i in range(0, len(dirty), self.batch_size)]
+        gate = asyncio.Semaphore(self.concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            scored = await asyncio.gather(*(self._score_batch(client, gate, batch, windows) for batch in batches))
+
+        self.last_run = {
+            "finished_at": datetime.utcnow().isoformat(),
+            "engines": len(last),
+            "changed": len(dirty),
+            "scored": sum(scored),
+            "failed": len(dirty) - sum(scored),
+            "batches": len(batches),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+        if dirty:
+            logger.info("Fleet re-scored", **self.last_run)
+        return self.last_run
+
+    async def _score_batch(self, client: httpx.AsyncClient, gate: asyncio.Semaphore, engine_ids: List[int],
+                           windows: Dict[int, HistoryRange]) -> int:
+        """Score one batch and store the results; returns the number of engines written"""
+        body = {
+            "ids": engine_ids,
+            "lengths": [len(windows[engine_id].cycles) for engine_id in engine_ids],
+            "values": np.concatenate([windows[engine_id].values for engine_id in engine_ids]).tolist(),
+            "uncertainty": self.uncertainty,
+            # Background work: runs in the ML service's batch lane, behind dashboard lookups
+            "priority": "batch"
+        }
+        async with gate:
+            start = time.perf_counter()
+            try:
+                with STAGE_SECONDS.time(stage="ml_call"):
+                    resp = await client.post(f"{settings.ML_SERVICE_URL}/predict/batch", json=body)
+                resp.raise_for_status()
+                result = resp.json()
+                ML_CALLS.inc(outcome="ok")
+            except Exception as e:
+                ML_CALLS.inc(outcome="error")
+                RESCORED_ENGINES.inc(len(engine_ids), outcome="error")
+                logger.warning("Re-scoring batch failed, retrying next run", engines=len(engine_ids), error=str(e))
+                return 0
+            # The batch call's latency, amortized over its engines
+            per_engine_ms = (time.perf_counter() - start) * 1000 / len(engine_ids)
+
+        now = datetime.utcnow()
+        rows = list(zip(result["ids"], result["predicted_rul"], result["confidence"], result["status"]))
+        with STAGE_SECONDS.time(stage="rescore_write"):
+            async with AsyncSessionLocal() as db:
+                table = Engine.__table__
+                await db.execute(
+                    update(table).where(table.c.id == bindparam("engine_id")).values(
+                        current_rul=bindparam("new_rul"), confidence=bindparam("new_confidence"),
+                        status=bindparam("new_status"), last_updated=now
+                    ),
+                    [{"engine_id": engine_id, "new_rul": rul, "new_confidence": confidence, "new_status": status}
+                     for engine_id, rul, confidence, status in rows]
+                )
+                await db.execute(insert(RULPrediction), [
+                    {"engine_id": engine_id, "timestamp": now, "predicted_rul": rul, "confidence": confidence,
+                     "model_version": result.get("model_version"), "prediction_time_ms": round(per_engine_ms, 3)}
+                    for engine_id, rul, confidence, _ in rows
+                ])
+                await db.commit()
+
+        for engine_id in engine_ids:
+            self.scored[engine_id] = int(windows[engine_id].cycles[-1])
+        RESCORED_ENGINES.inc(len(rows), outcome="ok")
+        return len(rows)
+
+
+fleet_rescorer = FleetRescorer(
+    interval=settings.RESCORE_INTERVAL_SECONDS,
+    batch_size=settings.RESCORE_BATCH_SIZE,
+    concurrency=settings.RESCORE_CONCURRENCY,
+    window_rows=settings.RESCORE_WINDOW_ROWS,
+    timeout=settings.RESCORE_TIMEOUT_SECONDS,
+    uncertainty=settings.ML_PREDICT_UNCERTAINTY
+)
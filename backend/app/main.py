@@ -1,15 +1,18 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from contextlib import asynccontextmanager
 import structlog
 import asyncio
+import time
 from datetime import datetime
 
 from app.core.config import settings
 from sqlalchemy import text
 from app.core.database import engine, Base
-from app.api.v1.router import api_router
+from app.core.metrics import metrics, instrument_engine, REQUEST_SECONDS, TimedJSONResponse
+from app.api.v1.router import api_router, close_flight_client
 
 
 structlog.configure(
@@ -50,9 +53,16 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error("Failed to initialize database", error=str(e))
         raise
+
+    from app.core.rescoring import fleet_rescorer
+    if settings.RESCORE_ENABLED:
+        fleet_rescorer.start()
     
     yield
 
+    await fleet_rescorer.stop()
+    await close_flight_client()
+
 
 
 async def initialize_sample_data():
@@ -80,9 +90,12 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse
 )
 
+instrument_engine(engine)
+
 # Add middleware
 app.add_middleware(
     CORSMiddleware,
@@ -97,6 +110,23 @@ app.add_middleware(
     allowed_hosts=settings.ALLOWED_HOSTS
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    if not metrics.enabled:
+        return await call_next(request)
+
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by handler, not path, so /engines/{id} does not explode label cardinality
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        handler=route.name if route is not None else "unmatched",
+        status=response.status_code
+    )
+    return response
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
@@ -112,6 +142,13 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/health")
 async def health_check():
     #Health check endpoint
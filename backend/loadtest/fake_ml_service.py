@@ -0,0 +1,114 @@
+import asyncio
+import random
+import socket
+import threading
+import time
+from datetime import datetime
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+
+
+def _fake_rul(unit_number: int) -> float:
+    return float((unit_number * 37) % 125)
+
+
+def _status(rul: float) -> str:
+    return "critical" if rul < 50 else "warning" if rul < 100 else "healthy"
+
+
+class FakeMLService:
+    """Stand-in for ml-service's /predict and /predict/batch with tunable latency, jitter and error rate.
+
+    Runs a real uvicorn server on a loopback port in a background thread so the
+    backend's httpx client goes through the same network path as in production.
+    """
+
+    def __init__(self, latency_ms: float = 20.0, jitter_ms: float = 5.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.calls = 0
+        self.batch_calls = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._server = None
+        self._thread = None
+        self.port = None
+        self.app = self._build_app()
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Fake ML Service")
+
+        @app.get("/health")
+        async def health():
+            return {"status": "healthy", "fake": True}
+
+        async def respond():
+            delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            await asyncio.sleep(delay)
+
+            if self._random.random() < self.error_rate:
+                self.errors += 1
+                raise HTTPException(500, "Injected failure")
+
+        @app.post("/predict")
+        async def predict(request: dict):
+            self.calls += 1
+            await respond()
+            rul = _fake_rul(int(request.get("unit_number", 1)))
+            return {
+                "predicted_rul": rul,
+                "confidence": 0.9,
+                "status": _status(rul),
+                "timestamp": datetime.utcnow().isoformat(),
+                "model_version": "fake"
+            }
+
+        @app.post("/predict/batch")
+        async def predict_batch(request: dict):
+            """Columnar like the real endpoint; one latency sample per batch"""
+            self.batch_calls += 1
+            await respond()
+            ids = list(request.get("ids", []))
+            rul = [_fake_rul(int(engine_id)) for engine_id in ids]
+            return {
+                "ids": ids,
+                "predicted_rul": rul,
+                "confidence": [0.9] * len(ids),
+                "status": [_status(r) for r in rul],
+                "model_version": "fake",
+                "timestamp": datetime.utcnow().isoformat()
+            }
+
+        return app
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def reset_counters(self):
+        self.calls = 0
+        self.batch_calls = 0
+        self.errors = 0
+
+    def start(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+
+        deadline = time.time() + 10
+        while not self._server.started:
+            if time.time() > deadline:
+                raise RuntimeError("Fake ML service did not start")
+            time.sleep(0.01)
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
@@ -0,0 +1,65 @@
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import insert, text
+
+from app.core.database import AsyncSessionLocal, Base, Engine, RULPrediction, engine
+from app.core.history_store import NUM_COLUMNS, history_store
+
+
+def _status(rul: float) -> str:
+    if rul < 50:
+        return "critical"
+    elif rul < 100:
+        return "warning"
+    return "healthy"
+
+
+async def create_fleet(num_engines: int, predictions_per_engine: int = 5, seed: int = 0, history_cycles: int = 0):
+    """Fresh schema with num_engines engines, a short prediction history and history_cycles sensor rows each"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    engines = []
+    predictions = []
+    for i in range(1, num_engines + 1):
+        rul = rng.uniform(0, 125)
+        engines.append({
+            "id": i,
+            "name": f"Engine_{i:05d}",
+            "model": "CFM56-7B",
+            "status": _status(rul),
+            "current_rul": rul,
+            "confidence": rng.uniform(0.6, 0.95),
+            "last_updated": now,
+            "is_active": rng.random() > 0.05
+        })
+        for k in range(predictions_per_engine):
+            predictions.append({
+                "engine_id": i,
+                "timestamp": now - timedelta(hours=predictions_per_engine - k),
+                "predicted_rul": max(0.0, rul + rng.gauss(0, 5)),
+                "confidence": rng.uniform(0.6, 0.95),
+                "model_version": "loadtest",
+                "prediction_time_ms": rng.uniform(5, 50)
+            })
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Engine), engines)
+        if predictions:
+            await session.execute(insert(RULPrediction), predictions)
+        if history_cycles:
+            values = np.random.default_rng(seed).normal(size=(num_engines, history_cycles, NUM_COLUMNS))
+            cycles = np.arange(1, history_cycles + 1)
+            await history_store.append_many(session, {
+                i: (cycles, values[i - 1].astype(np.float32)) for i in range(1, num_engines + 1)
+            })
+        await session.commit()
+
+        count = (await session.execute(text("SELECT COUNT(*) FROM engines"))).scalar()
+    return count
@@ -0,0 +1,160 @@
+"""Offline load test for the backend API.
+
+Run from backend/:
+
+    python -m loadtest.run --engines 1000 --concurrency 1 16 64 --requests 500
+    python -m loadtest.run --scenarios engines --ml-latency-ms 50 --ml-jitter-ms 20 --ml-error-rate 0.05
+
+The backend app runs in-process against a throwaway SQLite database filled
+with a generated fleet, and its ML calls go to a local fake ML service with
+configurable latency, jitter and error rate. Every scenario reports latency
+percentiles, throughput, status codes, and DB queries and ML calls per
+request.
+
+Background re-scoring is off by default, so /engines fans out to the fake ML
+service per engine and the --ml-* options shape its latency. --rescore runs
+the backend as deployed instead: /engines serves stored predictions and the
+re-scorer calls the fake /predict/batch.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+SCENARIOS = {
+    "engines": lambda i, args: f"/api/v1/engines?limit={args.engines_limit}",
+    "summary": lambda i, args: "/api/v1/dashboard/summary",
+    "engine": lambda i, args: f"/api/v1/engines/{i % args.engines + 1}",
+    "engine_rul": lambda i, args: f"/api/v1/engines/{i % args.engines + 1}/rul",
+}
+
+
+def percentiles(timings_s: List[float]) -> Dict[str, float]:
+    ms = np.asarray(timings_s) * 1000
+    return {
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max())
+    }
+
+
+async def run_scenario(client, name: str, args, concurrency: int, counters: Dict[str, int], fake_ml) -> Dict:
+    path_for = SCENARIOS[name]
+    semaphore = asyncio.Semaphore(concurrency)
+    timings, statuses = [], []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            resp = await client.get(path_for(i, args))
+            timings.append(time.perf_counter() - start)
+            statuses.append(resp.status_code)
+
+    queries_before = counters["queries"]
+    fake_ml.reset_counters()
+    wall = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    wall = time.perf_counter() - wall
+
+    result = {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": len(timings),
+        "wall_s": wall,
+        "throughput_rps": len(timings) / wall,
+        **percentiles(timings),
+        "status_counts": {str(s): statuses.count(s) for s in sorted(set(statuses))},
+        "db_queries_per_request": (counters["queries"] - queries_before) / len(timings),
+        "ml_calls_per_request": fake_ml.calls / len(timings),
+        "ml_batch_calls": fake_ml.batch_calls,
+        "ml_errors": fake_ml.errors
+    }
+    print(f"{name:<12} c={concurrency:<4} p50={result['p50_ms']:8.2f}ms p95={result['p95_ms']:8.2f}ms "
+          f"p99={result['p99_ms']:8.2f}ms {result['throughput_rps']:8.1f} req/s "
+          f"db/req={result['db_queries_per_request']:.2f} ml/req={result['ml_calls_per_request']:.2f}")
+    return result
+
+
+async def main_async(args):
+    # Settings are read at import time, so point them at the throwaway DB first
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{args.database}"
+    os.environ["DEBUG"] = "false"
+    os.environ["RESCORE_ENABLED"] = "true" if args.rescore else "false"
+
+    import httpx
+    from sqlalchemy import event
+
+    from app.core.config import settings
+    from app.core.database import engine
+    from app.main import app
+    from loadtest.fake_ml_service import FakeMLService
+    from loadtest.fleet import create_fleet
+
+    fake_ml = FakeMLService(args.ml_latency_ms, args.ml_jitter_ms, args.ml_error_rate, args.seed)
+    fake_ml.start()
+    settings.ML_SERVICE_URL = fake_ml.url
+
+    counters = {"queries": 0}
+
+    def count_query(*_):
+        counters["queries"] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+
+    results = []
+    try:
+        created = await create_fleet(args.engines, args.predictions_per_engine, args.seed, args.history_cycles)
+        print(f"Fleet: {created} engines in {args.database}; fake ML at {fake_ml.url}")
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60.0) as client:
+                for name in args.scenarios:
+                    await client.get(SCENARIOS[name](0, args))
+                    for concurrency in args.concurrency:
+                        results.append(await run_scenario(client, name, args, concurrency, counters, fake_ml))
+            if args.rescore:
+                from app.core.rescoring import fleet_rescorer
+                print(f"Re-scorer last run: {fleet_rescorer.last_run}")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_query)
+        fake_ml.stop()
+        await engine.dispose()
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backend load test with a fake ML service")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--engines", type=int, default=500, help="Fleet size generated in SQLite")
+    parser.add_argument("--engines-limit", type=int, default=7, help="limit= for GET /engines")
+    parser.add_argument("--predictions-per-engine", type=int, default=5)
+    parser.add_argument("--history-cycles", type=int, default=50, help="Sensor rows stored per engine")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--ml-latency-ms", type=float, default=20.0)
+    parser.add_argument("--ml-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--ml-error-rate", type=float, default=0.0)
+    parser.add_argument("--rescore", action="store_true",
+                        help="Run the background re-scorer; /engines then serves stored predictions")
+    parser.add_argument("--database", default=os.path.join(tempfile.gettempdir(), "rul_loadtest.db"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="loadtest_results.json")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(main_async(args))
+    with open(args.output, "w") as f:
+        json.dump({"config": vars(args), "results": results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
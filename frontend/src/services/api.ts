@@ -13,6 +13,28 @@ const mlApiClient = axios.create({
   timeout: 10000,
 })
 
+// Column-oriented payloads (Accept: application/vnd.rul.columnar+json)
+export const COLUMNAR_MEDIA_TYPE = 'application/vnd.rul.columnar+json'
+
+export interface ColumnarPayload<T> {
+  format: 'columnar'
+  length: number
+  columns: { [K in keyof T]: T[K][] }
+}
+
+export function fromColumnar<T>(payload: ColumnarPayload<T>): T[] {
+  const names = Object.keys(payload.columns) as (keyof T)[]
+  const rows: T[] = new Array(payload.length)
+  for (let i = 0; i < payload.length; i++) {
+    const row = {} as T
+    for (const name of names) {
+      row[name] = payload.columns[name][i]
+    }
+    rows[i] = row
+  }
+  return rows
+}
+
 // Types
 export interface Engine {
   id: number
@@ -47,6 +69,24 @@ export interface PredictionResponse {
   timestamp: string
 }
 
+export interface EngineHistoryParams {
+  start?: number
+  end?: number
+  points?: number
+  method?: 'lttb' | 'minmax'
+  columns?: string[]
+}
+
+export interface EngineHistory {
+  engine_id: number
+  method: 'lttb' | 'minmax'
+  points: number
+  range: { start: number | null; end: number | null }
+  total_points: number
+  series: Record<string, { cycle: number[]; value: number[] }>
+  rul: { timestamp: string[]; value: number[]; total_points: number }
+}
+
 // API functions
 export const api = {
   // Dashboard endpoints
@@ -57,8 +97,11 @@ export const api = {
 
   // Engine endpoints
   getEngines: async (): Promise<Engine[]> => {
-    const response = await apiClient.get('/api/v1/engines')
-    return response.data
+    const response = await apiClient.get('/api/v1/engines', {
+      headers: { Accept: `${COLUMNAR_MEDIA_TYPE}, application/json;q=0.9` },
+    })
+    // Older backends ignore the Accept header and send a plain list
+    return response.data?.format === 'columnar' ? fromColumnar<Engine>(response.data) : response.data
   },
 
   getEngine: async (id: number): Promise<Engine> => {
@@ -70,6 +113,14 @@ export const api = {
     }
   },
 
+  // Downsampled chart series; payload size depends on `points`, not on history length
+  getEngineHistory: async (id: number, params: EngineHistoryParams = {}): Promise<EngineHistory> => {
+    const response = await apiClient.get(`/api/v1/engines/${id}/history`, {
+      params: { ...params, columns: params.columns?.join(',') },
+    })
+    return response.data
+  },
+
   // ML Service endpoints
   predictRUL: async (request: PredictionRequest): Promise<PredictionResponse> => {
     try {
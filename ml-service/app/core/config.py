@@ -0,0 +1,80 @@
+from pydantic_settings import BaseSettings
+from typing import List
+
+
+class Settings(BaseSettings):
+    """ML service settings"""
+
+    # Versioned model artifact (weights + scaler + config); legacy .pth/.pkl is the fallback
+    MODEL_ARTIFACT_PATH: str = "models/transformer_rul_FD002.pt"
+    # FD002 test split served by /engines and use_real_data predictions; tried before the legacy paths
+    FD002_DATA_PATH: str = ""
+
+    # Inference executor
+    INFERENCE_WORKERS: int = 2
+    # Waiting jobs per lane: interactive (dashboard lookups) and batch (fleet re-scores);
+    # requests pick a lane with an X-Priority header or a "priority" field
+    INFERENCE_QUEUE_DEPTH: int = 16
+    INFERENCE_BATCH_QUEUE_DEPTH: int = 64
+    # Workers batch jobs may not use, so interactive requests never wait behind them
+    INFERENCE_INTERACTIVE_RESERVED: int = 1
+    # Shed interactive requests whose estimated queue wait exceeds this (0 disables)
+    INFERENCE_INTERACTIVE_TARGET_MS: float = 250.0
+    INFERENCE_RETRY_AFTER_SECONDS: int = 1
+
+    # 0 keeps torch's default intra-op thread count
+    TORCH_NUM_THREADS: int = 0
+
+    # MC dropout uncertainty: passes per request, capped further to fit the latency budget
+    # (0 disables the cap); requests opt in with "uncertainty": true unless on by default
+    MC_DROPOUT_SAMPLES: int = 32
+    MC_DROPOUT_MIN_SAMPLES: int = 8
+    MC_DROPOUT_BUDGET_MS: float = 50.0
+    MC_DROPOUT_INTERVAL: float = 0.9
+    UNCERTAINTY_BY_DEFAULT: bool = False
+
+    # Fused ensemble: member artifacts (JSON list in the environment) served instead of the
+    # single model; members share the primary model's features and window length
+    ENSEMBLE_ARTIFACT_PATHS: List[str] = []
+    ENSEMBLE_AGGREGATE: str = "mean"
+    # Above members x batch rows, members run in turn (large batches are compute-bound)
+    ENSEMBLE_FUSED_MAX_ROWS: int = 48
+
+    # Delta gate for /predict/batch: an engine whose window moved at most DELTA_GATE_THRESHOLD
+    # (largest mean shift, in the window's standard deviations) since its last computed
+    # prediction reuses that prediction, up to DELTA_GATE_MAX_AGE_SECONDS old. The default of 0
+    # only skips unchanged windows; this model's output moves a few cycles per new cycle on
+    # FD002, so measure with `python -m app.models.delta_gate` before raising it.
+    DELTA_GATE_ENABLED: bool = True
+    DELTA_GATE_THRESHOLD: float = 0.0
+    DELTA_GATE_MAX_AGE_SECONDS: float = 300.0
+    DELTA_GATE_TAIL_ROWS: int = 10
+    DELTA_GATE_MAX_ENTRIES: int = 100000
+
+    # Two-stage cascade: a student distilled with `python -m app.training.distill` scores every
+    # engine in /predict/batch and /engines; the full model re-scores only engines whose student
+    # RUL is within CASCADE_MARGIN of a status boundary (50, 100) or whose student std exceeds
+    # CASCADE_MAX_STD. Empty disables it; requests opt out with "cascade": false
+    STUDENT_ARTIFACT_PATH: str = ""
+    CASCADE_MARGIN: float = 10.0
+    CASCADE_MAX_STD: float = 30.0
+
+    # Prometheus metrics at /metrics; when off, instrumentation is a no-op
+    METRICS_ENABLED: bool = True
+
+    # Request profiling (off by default); toggled at runtime via /admin/profiling
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_MODE: str = "cprofile"
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_PROFILES: int = 50
+    # /admin endpoints require a matching X-Admin-Token header; they are disabled while unset
+    ADMIN_TOKEN: str = ""
+
+    class Config:
+        env_file = ".env"
+        case_sensitive = True
+
+
+# Create settings instance
+settings = Settings()
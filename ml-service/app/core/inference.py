@@ -0,0 +1,175 @@
+import asyncio
+import collections
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, NamedTuple, Optional
+
+import structlog
+
+from app.core.metrics import INFERENCE_QUEUE_SECONDS
+from app.core.profiling import wrap_job
+
+logger = structlog.get_logger()
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+
+def parse_priority(value: Optional[str], default: str = INTERACTIVE) -> str:
+    """Priority class from a header or request field; unknown values fall back to the default"""
+    value = (value or "").strip().lower()
+    return value if value in PRIORITIES else default
+
+
+class InferenceSaturated(Exception):
+    """Raised when a request's lane is full or cannot meet its latency target"""
+
+    def __init__(self, retry_after: int, priority: str = INTERACTIVE, reason: str = "queue_full"):
+        super().__init__("Inference capacity exhausted")
+        self.retry_after = retry_after
+        self.priority = priority
+        self.reason = reason
+
+
+class _Job(NamedTuple):
+    fn: Callable[[], Any]
+    future: Future
+    priority: str
+    enqueued: float
+
+
+class InferenceExecutor:
+    """Bounded thread pool for blocking pandas/torch work, with two priority lanes.
+
+    Jobs wait in a per-lane queue and are handed to a worker only when one is
+    free, so the pool itself never queues. Interactive jobs always go first.
+    Batch jobs run on at most ``max_workers - interactive_reserved`` workers
+    (at least one), so a dashboard lookup never waits behind a fleet re-score
+    for a worker; with a single worker the lanes share it and batch jobs only
+    start when no interactive job is waiting. Running jobs are never preempted.
+
+    Each lane holds at most its queue depth of waiting jobs; anything beyond
+    that is rejected immediately with ``InferenceSaturated`` so callers shed
+    load instead of piling up. Interactive requests are also shed when the
+    estimated queue wait (jobs ahead x smoothed job time / workers) exceeds
+    ``interactive_target_ms``: a fast 503 beats a late answer.
+    """
+
+    def __init__(self, max_workers: int = 2, queue_depth: int = 16, retry_after: int = 1,
+                 batch_queue_depth: int = 64, interactive_reserved: int = 1,
+                 interactive_target_ms: float = 0.0):
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        self.interactive_target_ms = interactive_target_ms
+        self.limits = {
+            INTERACTIVE: {"workers": max_workers, "queue": queue_depth},
+            BATCH: {"workers": max(1, max_workers - interactive_reserved), "queue": batch_queue_depth},
+        }
+        self._queues: Dict[str, Deque[_Job]] = {p: collections.deque() for p in PRIORITIES}
+        self._running = {p: 0 for p in PRIORITIES}
+        self._rejected = {p: 0 for p in PRIORITIES}
+        # Smoothed job run time per lane, for the interactive wait estimate
+        self._job_ms = {p: 0.0 for p in PRIORITIES}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+
+    def _estimated_wait_ms(self) -> float:
+        if sum(self._running.values()) < self.max_workers:
+            return 0.0
+        return (len(self._queues[INTERACTIVE]) + 1) * self._job_ms[INTERACTIVE] / self.max_workers
+
+    def _next(self) -> Optional[_Job]:
+        """Pop the next job that may start now; caller holds the lock"""
+        if sum(self._running.values()) >= self.max_workers:
+            return None
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            if not queue:
+                continue
+            if self._running[priority] >= self.limits[priority]["workers"]:
+                continue
+            return queue.popleft()
+        return None
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                job = self._next()
+                if job is None:
+                    return
+                # Cancelled while queued (the request went away): drop it
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                self._running[job.priority] += 1
+            self._pool.submit(self._execute, job)
+
+    def _execute(self, job: _Job):
+        start = time.perf_counter()
+        INFERENCE_QUEUE_SECONDS.observe(start - job.enqueued, priority=job.priority)
+        try:
+            job.future.set_result(job.fn())
+        except BaseException as e:
+            job.future.set_exception(e)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._running[job.priority] -= 1
+                previous = self._job_ms[job.priority]
+                self._job_ms[job.priority] = elapsed_ms if previous == 0.0 else 0.8 * previous + 0.2 * elapsed_ms
+            self._dispatch()
+
+    async def run(self, fn: Callable[..., Any], *args, priority: str = INTERACTIVE, **kwargs) -> Any:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}, expected one of {PRIORITIES}")
+        future: Future = Future()
+        with self._lock:
+            reason = None
+            if len(self._queues[priority]) >= self.limits[priority]["queue"]:
+                reason = "queue_full"
+            elif priority == INTERACTIVE and self.interactive_target_ms > 0 and \
+                    self._estimated_wait_ms() > self.interactive_target_ms:
+                reason = "latency_target"
+            if reason is not None:
+                self._rejected[priority] += 1
+                raise InferenceSaturated(self.retry_after, priority=priority, reason=reason)
+            self._queues[priority].append(
+                _Job(wrap_job(functools.partial(fn, *args, **kwargs)), future, priority, time.perf_counter())
+            )
+        self._dispatch()
+
+        # A cancelled request cancels its job if it is still queued; a running
+        # job keeps its worker until it actually finishes.
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lanes = {
+                priority: {
+                    "workers": self.limits[priority]["workers"],
+                    "queue_depth": self.limits[priority]["queue"],
+                    "running": self._running[priority],
+                    "queued": len(self._queues[priority]),
+                    "rejected": self._rejected[priority],
+                    "job_ms": round(self._job_ms[priority], 2)
+                }
+                for priority in PRIORITIES
+            }
+            in_flight = sum(self._running.values()) + sum(len(q) for q in self._queues.values())
+        return {
+            "workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": in_flight,
+            "interactive_target_ms": self.interactive_target_ms,
+            "lanes": lanes,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            for queue in self._queues.values():
+                while queue:
+                    queue.popleft().future.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
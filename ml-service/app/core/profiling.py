@@ -0,0 +1,215 @@
+"""Opt-in, request-scoped profiling.
+
+A request is profiled when profiling is enabled and it either carries an
+``X-Profile`` header (``cprofile`` or ``torch``) together with a valid admin
+token, or is picked by the sampling rate. Without the token the header is
+ignored, so clients cannot force the profiling overhead on the service. The blocking part of the request runs on an inference worker thread, so
+the session is carried in a context variable and the executor wraps the job
+in it; the profiler therefore sees the pandas/torch work, not the event loop.
+
+With profiling disabled the middleware returns on a single attribute check and
+the executor does one context variable lookup per job.
+"""
+import cProfile
+import contextvars
+import io
+import os
+import pstats
+import random
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+PROFILE_MODES = ("cprofile", "torch")
+
+current_session: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar(
+    "profile_session", default=None
+)
+
+
+class ProfileSession:
+    """Collects the profile of one request's worker-side jobs"""
+
+    def __init__(self, mode: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.jobs = 0
+        self._stats: Optional[pstats.Stats] = None
+        self._torch_profiles: List[Any] = []
+        self._lock = threading.Lock()
+
+    def run(self, fn: Callable[[], Any]) -> Any:
+        """Run fn on the current thread under this session's profiler"""
+        if self.mode == "torch":
+            return self._run_torch(fn)
+        return self._run_cprofile(fn)
+
+    def _run_cprofile(self, fn):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; skip rather than fail the request
+            logger.warning("Profiler busy, running request unprofiled", profile_id=self.id)
+            return fn()
+        try:
+            return fn()
+        finally:
+            profile.disable()
+            with self._lock:
+                self.jobs += 1
+                if self._stats is None:
+                    self._stats = pstats.Stats(profile)
+                else:
+                    self._stats.add(profile)
+
+    def _run_torch(self, fn):
+        import torch
+        from torch.profiler import profile, ProfilerActivity
+
+        activities = [ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(ProfilerActivity.CUDA)
+        with profile(activities=activities, record_shapes=True) as prof:
+            result = fn()
+        with self._lock:
+            self.jobs += 1
+            self._torch_profiles.append(prof)
+        return result
+
+    def save(self, directory: str) -> Dict[str, str]:
+        """Write the raw profile and a text summary; returns {kind: filename}"""
+        files = {}
+        if self._stats is not None:
+            files["raw"] = f"{self.id}.prof"
+            self._stats.dump_stats(os.path.join(directory, files["raw"]))
+            out = io.StringIO()
+            pstats.Stats(os.path.join(directory, files["raw"]), stream=out) \
+                .sort_stats("cumulative").print_stats(50)
+            files["summary"] = f"{self.id}.txt"
+            with open(os.path.join(directory, files["summary"]), "w") as f:
+                f.write(out.getvalue())
+        elif self._torch_profiles:
+            # Chrome trace of the first worker job; the summary lists every job
+            files["raw"] = f"{self.id}.json"
+            self._torch_profiles[0].export_chrome_trace(os.path.join(directory, files["raw"]))
+            files["summary"] = f"{self.id}.txt"
+            with open(os.path.join(directory, files["summary"]), "w") as f:
+                for prof in self._torch_profiles:
+                    f.write(prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=30))
+                    f.write("\n")
+        return files
+
+
+class RequestProfiler:
+    """Decides which requests to profile and keeps the most recent profiles on disk"""
+
+    def __init__(self, directory: str, enabled: bool = False, sample_rate: float = 0.0,
+                 mode: str = "cprofile", max_profiles: int = 50):
+        self.directory = directory
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                  mode: Optional[str] = None):
+        if mode is not None and mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {PROFILE_MODES}")
+        if sample_rate is not None and not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if enabled is not None:
+            self.enabled = enabled
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if mode is not None:
+            self.mode = mode
+
+    def config(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "mode": self.mode,
+            "max_profiles": self.max_profiles,
+            "stored": len(self._profiles)
+        }
+
+    def start(self, header: Optional[str], authorized: bool = False) -> Optional[ProfileSession]:
+        """Session for this request, or None if it should not be profiled.
+
+        ``header`` (X-Profile) is honored only when ``authorized``; everything
+        else is left to the sampling rate.
+        """
+        if header and authorized:
+            mode = header.strip().lower()
+            return ProfileSession(mode if mode in PROFILE_MODES else self.mode)
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return ProfileSession(self.mode)
+        return None
+
+    def finish(self, session: ProfileSession, method: str, path: str, status: int,
+               duration_ms: float) -> Optional[Dict[str, Any]]:
+        if session.jobs == 0:
+            # Nothing ran on a worker (e.g. a cached or rejected request)
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            files = session.save(self.directory)
+        except Exception as e:
+            logger.error("Failed to save profile", profile_id=session.id, error=str(e))
+            return None
+
+        record = {
+            "id": session.id,
+            "mode": session.mode,
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "jobs": session.jobs,
+            "files": files,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        with self._lock:
+            self._profiles[session.id] = record
+            while len(self._profiles) > self.max_profiles:
+                _, old = self._profiles.popitem(last=False)
+                self._remove_files(old)
+
+        logger.info("Stored request profile", profile_id=session.id, path=path, duration_ms=record["duration_ms"])
+        return record
+
+    def _remove_files(self, record: Dict[str, Any]):
+        for name in record["files"].values():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return self._profiles.get(profile_id)
+
+    def path(self, record: Dict[str, Any], kind: str) -> Optional[str]:
+        name = record["files"].get(kind)
+        return os.path.join(self.directory, name) if name else None
+
+
+def wrap_job(fn: Callable[[], Any]) -> Callable[[], Any]:
+    """Bind fn to the calling request's profile session, if there is one"""
+    session = current_session.get()
+    if session is None:
+        return fn
+    return lambda: session.run(fn)
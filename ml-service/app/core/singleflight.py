@@ -0,0 +1,54 @@
+"""Coalescing of concurrent identical requests.
+
+The first caller for a key starts the computation; callers that arrive while
+it is in flight await the same task and all receive its result (or its
+exception). The key is forgotten as soon as the task finishes, so this only
+deduplicates concurrent work and never serves a stale result.
+
+The task is shielded: a waiter that goes away (client disconnect) does not
+cancel the computation for the others.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.metrics import CACHE_REQUESTS
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.started = 0
+        self.joined = 0
+
+    def _done(self, key: Hashable, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the exception retrieved even if every waiter went away
+        if not flight.cancelled():
+            flight.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(fn())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda f: self._done(key, f))
+            self.started += 1
+            CACHE_REQUESTS.inc(cache=self.name, result="miss")
+        else:
+            self.joined += 1
+            CACHE_REQUESTS.inc(cache=self.name, result="hit")
+        return await asyncio.shield(flight)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.started + self.joined
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "joined": self.joined,
+            "coalesced_ratio": round(self.joined / total, 4) if total else 0.0
+        }
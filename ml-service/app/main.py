@@ -1,32 +1,37 @@
-from fastapi import FastAPI, HTTPException
+import time
+# torch, pandas and sklearn are imported by the load stages, so /health/live answers before they are in
+_import_start = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request, Header
+from fastapi.responses import JSONResponse, PlainTextResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import structlog
-import torch
 import numpy as np
-import pandas as pd
-import time
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 import os
-import httpx
-import logging
-logger = structlog.get_logger()
+import secrets
 from datetime import datetime
 
-from app.models.transformer_model import TransformerRUL, load_model, load_scaler
-from app.preprocessing.data_processor import (
-    preprocess_for_model, 
-    preprocess_fd002_sequence,
-    create_mock_sensor_data,
-    validate_preprocessing,
-    load_data,
-    select_features,
-    SELECTED_SENSORS,
-    SELECTED_SETTINGS,
-    SEQUENCE_LENGTH,
-    RUL_MAX,
-    print_preprocessing_info
+from app.core.config import settings
+from app.core.inference import InferenceExecutor, InferenceSaturated, INTERACTIVE, BATCH, parse_priority
+from app.core.metrics import (
+    metrics,
+    REQUEST_SECONDS,
+    STAGE_SECONDS,
+    BATCH_SIZE,
+    INFERENCE_REJECTED,
+    INFERENCE_IN_FLIGHT
 )
+from app.core.profiling import RequestProfiler, current_session
+from app.core.singleflight import SingleFlight
+from app.core.columnar import ColumnarResponse, wants_columnar, rows_from_columns
+from app.models.delta_gate import DeltaGate
+from app.preprocessing.pipeline import FeatureSpec, UnitFrame, FD002_SPEC, CMAPSS_COLUMNS
+
+if TYPE_CHECKING:
+    import torch
 
 # Configure logging
 structlog.configure(
@@ -48,96 +53,314 @@ structlog.configure(
 
 logger = structlog.get_logger()
 
+IMPORT_SECONDS = time.perf_counter() - _import_start
+
+SEQUENCE_LENGTH = FD002_SPEC.sequence_length
+RUL_MAX = FD002_SPEC.rul_max
+
+MODEL_VERSION = "transformer_fd002_exact_v2.1"
+
 model = None
 scaler = None
 device = None
 fd002_data = None
+# fd002_data sorted by (unit, cycle) with the model's features pre-gathered
+fd002_frame = None
+# Feature spec of the loaded model compiled against its scaler
+feature_pipeline = FD002_SPEC.compile()
+model_metadata = None
+uncertainty_estimator = None
+ensemble = None
+# Per-member pipelines when members were fitted with different scalers, else None
+ensemble_pipelines = None
+engines_available = 0
+inference_executor = None
+# Bumped on every model (re)load; part of the coalescing key so a reload never shares old results
+model_generation = 0
+# Concurrent identical real-data /predict calls share one computation
+predict_flights = SingleFlight("predict_inflight")
+# Last computed /predict/batch prediction per id; recreated on every model (re)load
+delta_gate = None
+# Distilled student screening fleet scoring in front of the full model, when configured
+cascade = None
+# Background load stages ("model", "data"): status is loading/ready/unavailable/failed
+startup_stages: Dict[str, Dict[str, Any]] = {}
+startup_tasks: List[asyncio.Task] = []
+profiler = RequestProfiler(
+    directory=settings.PROFILING_DIR,
+    enabled=settings.PROFILING_ENABLED,
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    mode=settings.PROFILING_MODE,
+    max_profiles=settings.PROFILING_MAX_PROFILES
+)
 
-CMAPSS_COLUMNS = [
-    'unit_number', 'time_in_cycles', 'op_setting_1', 'op_setting_2', 'op_setting_3',
-    'sensor_measurement_1', 'sensor_measurement_2', 'sensor_measurement_3', 'sensor_measurement_4', 'sensor_measurement_5',
-    'sensor_measurement_6', 'sensor_measurement_7', 'sensor_measurement_8', 'sensor_measurement_9', 'sensor_measurement_10',
-    'sensor_measurement_11', 'sensor_measurement_12', 'sensor_measurement_13', 'sensor_measurement_14', 'sensor_measurement_15',
-    'sensor_measurement_16', 'sensor_measurement_17', 'sensor_measurement_18', 'sensor_measurement_19', 'sensor_measurement_20', 'sensor_measurement_21'
-]
-
-def load_fd002_data():
+def load_fd002_data() -> bool:
+    from app.preprocessing.data_processor import load_data, select_features
 
-    global fd002_data
+    global fd002_data, fd002_frame, engines_available
     
     data_paths = [
+        settings.FD002_DATA_PATH,
         "F:/rul-dashboard-complete/backend/data/test_FD002.txt"
     ]
     
     for path in data_paths:
-        if os.path.exists(path):
+        if path and os.path.exists(path):
             try:
 
-                fd002_data = load_data(path)
-                fd002_data = select_features(fd002_data)
+                data = select_features(load_data(path))
+                fd002_frame = UnitFrame(data, feature_pipeline.spec)
+                fd002_data = data
+                engines_available = int(data['unit_number'].nunique())
                 
-                logger.info(f"FD002 data loaded: {len(fd002_data)} records, {fd002_data['unit_number'].nunique()} engines")
-                logger.info(f"Columns: {list(fd002_data.columns)}")
-                logger.info(f"Shape: {fd002_data.shape}")
-                return
+                logger.info(f"FD002 data loaded: {len(data)} records, {engines_available} engines, shape {data.shape}")
+                return True
             except Exception as e:
                 logger.error(f"Failed to load FD002 data from {path}: {e}")
     
     logger.warning("FD002 data file not found")
+    return False
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Application lifespan events"""
-    global model, scaler, device
+def load_model_artifact() -> bool:
+    from app.models.artifact import load_artifact
+
+    global model, scaler, model_metadata
+
+    path = settings.MODEL_ARTIFACT_PATH
+    if not path or not os.path.exists(path):
+        return False
 
-    
     try:
+        artifact = load_artifact(path, device)
+    except Exception as e:
+        logger.error(f"Failed to load model artifact from {path}: {e}")
+        return False
+
+    model = artifact.pop("model")
+    scaler = artifact.pop("scaler")
+    model_metadata = artifact
+    logger.info(f"Loaded model artifact v{artifact['version']} from {path}")
+    return True
+
+def _model_spec() -> FeatureSpec:
+    """The artifact's own feature list and window, or the FD002 defaults for legacy weights"""
+    if model_metadata:
+        return FeatureSpec.from_feature_names(model_metadata["features"], model_metadata["sequence_length"],
+                                              model_metadata["rul_max"])
+    return FD002_SPEC
+
+def load_model_and_scaler() -> bool:
+    import torch
+    from app.models.uncertainty import MCDropoutEstimator
+
+    global device, feature_pipeline, uncertainty_estimator, model_generation, delta_gate, cascade
+
+    if device is None:
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        if settings.TORCH_NUM_THREADS > 0:
+            torch.set_num_threads(settings.TORCH_NUM_THREADS)
+    loaded = _load_model_and_scaler()
+    model_generation += 1
+    cascade = None
+    feature_pipeline = _model_spec().compile(scaler)
+    if settings.DELTA_GATE_ENABLED:
+        delta_gate = DeltaGate(
+            threshold=settings.DELTA_GATE_THRESHOLD,
+            max_age=settings.DELTA_GATE_MAX_AGE_SECONDS,
+            tail_rows=settings.DELTA_GATE_TAIL_ROWS,
+            max_entries=settings.DELTA_GATE_MAX_ENTRIES
+        )
+    if model is not None:
+        uncertainty_estimator = MCDropoutEstimator(
+            model,
+            samples=settings.MC_DROPOUT_SAMPLES,
+            budget_ms=settings.MC_DROPOUT_BUDGET_MS,
+            min_samples=settings.MC_DROPOUT_MIN_SAMPLES,
+            interval=settings.MC_DROPOUT_INTERVAL
+        )
+    if settings.ENSEMBLE_ARTIFACT_PATHS:
+        try:
+            load_ensemble(settings.ENSEMBLE_ARTIFACT_PATHS)
+        except Exception as e:
+            logger.error("Failed to load ensemble, serving the single model", error=str(e))
+    if settings.STUDENT_ARTIFACT_PATH and model is not None:
+        try:
+            load_cascade(settings.STUDENT_ARTIFACT_PATH)
+        except Exception as e:
+            logger.error("Failed to load student, scoring every engine with the full model", error=str(e))
+    logger.info("Feature pipeline compiled", features=feature_pipeline.spec.num_features,
+                sequence_length=feature_pipeline.spec.sequence_length, scaled=scaler is not None)
+    return loaded
+
+def load_ensemble(paths: List[str]):
+    """Load and fuse the ensemble members; they must take the primary model's inputs"""
+    from app.models.ensemble import FusedEnsemble, load_members
+
+    global ensemble, ensemble_pipelines
+
+    members = load_members(paths, device)
+    pipelines = []
+    for member in members:
+        spec = FD002_SPEC if "features" not in member else FeatureSpec.from_feature_names(
+            member["features"], member["sequence_length"], member["rul_max"])
+        if spec.feature_names != feature_pipeline.feature_names or \
+                spec.sequence_length != feature_pipeline.sequence_length:
+            raise ValueError(f"Ensemble member {member['path']} does not take the primary model's inputs")
+        pipelines.append(feature_pipeline.spec.compile(member["scaler"] or scaler))
+
+    ensemble = FusedEnsemble([member["model"] for member in members],
+                             aggregate=settings.ENSEMBLE_AGGREGATE,
+                             fused_max_rows=settings.ENSEMBLE_FUSED_MAX_ROWS)
+    shared = all(pipeline.same_scaling(feature_pipeline) for pipeline in pipelines)
+    ensemble_pipelines = None if shared else pipelines
+    logger.info("Ensemble loaded", members=len(members), shared_inputs=shared,
+                aggregate=settings.ENSEMBLE_AGGREGATE)
+
+def load_cascade(path: str):
+    """Load the student; it must take the primary model's inputs, scaled the same way"""
+    from app.models.student import Cascade, load_student
+
+    global cascade
+
+    student = load_student(path, device)
+    spec = FeatureSpec.from_feature_names(student["features"], student["sequence_length"], student["rul_max"])
+    if spec.feature_names != feature_pipeline.feature_names or \
+            spec.sequence_length != feature_pipeline.sequence_length or \
+            not spec.compile(student["scaler"]).same_scaling(feature_pipeline):
+        raise ValueError(f"Student {path} does not take the primary model's inputs")
+
+    cascade = Cascade(student["model"], margin=settings.CASCADE_MARGIN, max_std=settings.CASCADE_MAX_STD,
+                      device=device)
+    logger.info("Student loaded", path=path, teacher=student["teacher"].get("path"),
+                margin=settings.CASCADE_MARGIN, max_std=settings.CASCADE_MAX_STD)
+
+def _ensemble_inputs(make, primary: np.ndarray) -> np.ndarray:
+    """Shared (batch, seq_len, features) input, or a per-member stack if the scalers differ"""
+    if ensemble_pipelines is None:
+        return primary
+    return np.stack([make(pipeline) for pipeline in ensemble_pipelines])
+
+def _fd002_frame() -> UnitFrame:
+    """fd002_frame, rebuilt if fd002_data was replaced or the model needs other features"""
+    global fd002_frame
+    frame = fd002_frame
+    if frame is None or frame.source is not fd002_data or frame.feature_names != feature_pipeline.feature_names:
+        frame = fd002_frame = UnitFrame(fd002_data, feature_pipeline.spec)
+    return frame
+
+def _load_model_and_scaler() -> bool:
+    from app.models.transformer_model import load_model, load_scaler
+
+    global model, scaler
+
+    if load_model_artifact():
+        return True
+
+    # Legacy state dict + pickled scaler, used when no artifact is present
+    scaler_paths = [
+        "/home/ubuntu/upload/transformer_scaler.pkl",
+        "models/transformer_scaler.pkl",
+        "../models/transformer_scaler.pkl"
+    ]
 
-        print_preprocessing_info()
+    for scaler_path in scaler_paths:
+        if os.path.exists(scaler_path):
+            try:
+                scaler = load_scaler(scaler_path)
+                break
+            except Exception as e:
+                logger.error(f"Failed to load scaler from {scaler_path}: {e}")
 
-        scaler_paths = [
-            "/home/ubuntu/upload/transformer_scaler.pkl",
-            "models/transformer_scaler.pkl",
-            "../models/transformer_scaler.pkl"
-        ]
-        
-        for scaler_path in scaler_paths:
-            if os.path.exists(scaler_path):
-                try:
-                    scaler = load_scaler(scaler_path)
-                    break
-                except Exception as e:
-                    logger.error(f"Failed to load scaler from {scaler_path}: {e}")
-        
-        if scaler is None:
-            logger.warning("Scaler not found, predictions may be inaccurate")
-        
-        model_paths = [
-            "/home/ubuntu/upload/transformer_rul_model_FD002.pth",
-            "models/transformer_rul_model_FD002.pth",
-            "../models/transformer_rul_model_FD002.pth"
-        ]
-        
-        for model_path in model_paths:
-            if os.path.exists(model_path):
-                try:
-                    model = load_model(model_path, device)
-                    break
-                except Exception as e:
-                    logger.error(f"Failed to load model from {model_path}: {e}")
-        
-        if model is None:
-            logger.warning("Model not found")
-        
-        load_fd002_data()
-        
-        logger.info("ML Service started successfully")
-        
+    if scaler is None:
+        logger.warning("Scaler not found, predictions may be inaccurate")
+
+    model_paths = [
+        "/home/ubuntu/upload/transformer_rul_model_FD002.pth",
+        "models/transformer_rul_model_FD002.pth",
+        "../models/transformer_rul_model_FD002.pth"
+    ]
+
+    for model_path in model_paths:
+        if os.path.exists(model_path):
+            try:
+                model = load_model(model_path, device)
+                break
+            except Exception as e:
+                logger.error(f"Failed to load model from {model_path}: {e}")
+
+    if model is None:
+        logger.warning("Model not found")
+    return model is not None
+
+def load_data_stage() -> bool:
+    from app.preprocessing.data_processor import log_preprocessing_info
+
+    log_preprocessing_info()
+    return load_fd002_data()
+
+def _run_stage(name: str, fn) -> None:
+    """Run one blocking load stage (on a worker thread), recording its outcome and duration"""
+    startup_stages[name] = {"status": "loading"}
+    start = time.perf_counter()
+    try:
+        status = "ready" if fn() else "unavailable"
     except Exception as e:
-        logger.error("Failed to initialize ML service", error=str(e))
-    
+        logger.error(f"Startup stage {name} failed", error=str(e))
+        status = "failed"
+    duration_ms = round((time.perf_counter() - start) * 1000, 1)
+    startup_stages[name] = {"status": status, "duration_ms": duration_ms}
+    logger.info("Startup stage finished", stage=name, status=status, duration_ms=duration_ms)
+
+async def _load_in_background(boot_start: float):
+    await asyncio.gather(*(asyncio.to_thread(_run_stage, name, fn)
+                           for name, fn in (("model", load_model_and_scaler), ("data", load_data_stage))))
+    logger.info(
+        "ML Service ready" if is_ready() else "ML Service started without a model",
+        imports_ms=round(IMPORT_SECONDS * 1000, 1),
+        **{f"{name}_ms": stage["duration_ms"] for name, stage in startup_stages.items()},
+        total_ms=round((time.perf_counter() - boot_start) * 1000, 1)
+    )
+
+def is_loading() -> bool:
+    return not startup_stages or any(stage["status"] == "loading" for stage in startup_stages.values())
+
+def is_ready() -> bool:
+    return not is_loading() and model is not None
+
+async def wait_for_startup():
+    """Block until the background load stages have finished (for tests, benchmarks and tools)"""
+    await asyncio.gather(*startup_tasks)
+
+def _require_model():
+    if model is None:
+        detail = "Model is still loading" if is_loading() else "Model not loaded"
+        raise HTTPException(503, detail, headers={"Retry-After": str(settings.INFERENCE_RETRY_AFTER_SECONDS)})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Cheap boot; the model and FD002 data load in parallel after the server starts accepting connections"""
+    global inference_executor
+
+    boot_start = time.perf_counter()
+    inference_executor = InferenceExecutor(
+        max_workers=settings.INFERENCE_WORKERS,
+        queue_depth=settings.INFERENCE_QUEUE_DEPTH,
+        retry_after=settings.INFERENCE_RETRY_AFTER_SECONDS,
+        batch_queue_depth=settings.INFERENCE_BATCH_QUEUE_DEPTH,
+        interactive_reserved=settings.INFERENCE_INTERACTIVE_RESERVED,
+        interactive_target_ms=settings.INFERENCE_INTERACTIVE_TARGET_MS
+    )
+    INFERENCE_IN_FLIGHT.set_function(lambda: inference_executor.stats()["in_flight"])
+
+    startup_stages.clear()
+    startup_stages.update({"model": {"status": "loading"}, "data": {"status": "loading"}})
+    startup_tasks[:] = [asyncio.create_task(_load_in_background(boot_start))]
+    logger.info("ML Service accepting connections", imports_ms=round(IMPORT_SECONDS * 1000, 1),
+                boot_ms=round((time.perf_counter() - boot_start) * 1000, 1))
+
     yield
+
+    inference_executor.shutdown()
     
 
 # Create FastAPI application
@@ -159,6 +382,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    if not metrics.enabled:
+        return await call_next(request)
+
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by handler, not path, so /engines/{id} does not explode label cardinality
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        handler=route.name if route is not None else "unmatched",
+        status=response.status_code
+    )
+    return response
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    if not profiler.enabled or request.url.path.startswith(("/admin", "/metrics")):
+        return await call_next(request)
+
+    session = profiler.start(request.headers.get("X-Profile"),
+                             authorized=_admin_token_valid(request.headers.get("X-Admin-Token")))
+    if session is None:
+        return await call_next(request)
+
+    token = current_session.set(session)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_session.reset(token)
+
+    record = profiler.finish(session, request.method, request.url.path, response.status_code,
+                             (time.perf_counter() - start) * 1000)
+    if record is not None:
+        response.headers["X-Profile-Id"] = record["id"]
+    return response
+
+@app.exception_handler(InferenceSaturated)
+async def inference_saturated_handler(request, exc: InferenceSaturated):
+    INFERENCE_REJECTED.inc(priority=exc.priority, reason=exc.reason)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Inference capacity exhausted, retry later", "priority": exc.priority,
+                 "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 @app.get("/")
 async def root():
     #Root endpoint
@@ -169,7 +442,7 @@ async def root():
         "scaler_loaded": scaler is not None,
         "fd002_loaded": fd002_data is not None,
         "device": str(device) if device else "unknown",
-        "engines_available": fd002_data['unit_number'].nunique() if fd002_data is not None else 0,
+        "engines_available": engines_available,
         "architecture": {
             "input_dim": 16,
             "embed_dim": 64,
@@ -181,112 +454,394 @@ async def root():
         }
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    if not metrics.enabled:
+        raise HTTPException(404, "Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving; says nothing about the model"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """200 once the load stages have finished with a model; 503 while starting or without one"""
+    body = {"ready": is_ready(), "stages": startup_stages}
+    if not body["ready"]:
+        return JSONResponse(status_code=503, content=body,
+                            headers={"Retry-After": str(settings.INFERENCE_RETRY_AFTER_SECONDS)})
+    return body
+
 @app.get("/health")
 async def health_check():
     return {
-        "status": "healthy",
+        "status": "healthy" if is_ready() else ("starting" if is_loading() else "degraded"),
+        "startup": startup_stages,
         "model_loaded": model is not None,
         "scaler_loaded": scaler is not None,
         "fd002_loaded": fd002_data is not None,
         "device": str(device) if device else "unknown",
         "version": "2.1.0",
-        "engines_available": fd002_data['unit_number'].nunique() if fd002_data is not None else 0,
+        "engines_available": engines_available,
+        "inference": inference_executor.stats() if inference_executor else None,
+        "coalescing": predict_flights.stats(),
+        "delta_gate": delta_gate.stats() if delta_gate is not None else None,
+        "cascade": cascade.stats() if cascade is not None else None,
         "notebook_match": True
     }
 
+def _run_model(processed: np.ndarray) -> "torch.Tensor":
+    """Forward pass over one (seq_len, features) window or a (batch, seq_len, features) stack"""
+    import torch
+
+    with STAGE_SECONDS.time(stage="tensor_creation"):
+        tensor = torch.as_tensor(processed, dtype=torch.float32)
+        if tensor.dim() == 2:
+            tensor = tensor.unsqueeze(0)
+        tensor = tensor.to(device)
+
+    BATCH_SIZE.observe(tensor.size(0))
+    with STAGE_SECONDS.time(stage="forward"), torch.no_grad():
+        return model(tensor).cpu()
+
+def _run_mc(processed: np.ndarray) -> Dict[str, np.ndarray]:
+    """MC dropout summary for one window or a stack, all passes in one replicated forward"""
+    import torch
+
+    with STAGE_SECONDS.time(stage="tensor_creation"):
+        tensor = torch.as_tensor(processed, dtype=torch.float32)
+        if tensor.dim() == 2:
+            tensor = tensor.unsqueeze(0)
+        tensor = tensor.to(device)
+
+    samples = uncertainty_estimator.samples_for(tensor.size(0))
+    BATCH_SIZE.observe(tensor.size(0) * samples)
+    with STAGE_SECONDS.time(stage="forward"):
+        draws, point = uncertainty_estimator.sample(tensor, samples)
+    return uncertainty_estimator.summarize(draws.cpu(), point.cpu())
+
+def _run_ensemble(inputs: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-member and aggregated RUL for a (batch, ...) input or a (members, batch, ...) stack"""
+    import torch
+
+    with STAGE_SECONDS.time(stage="tensor_creation"):
+        tensor = torch.as_tensor(inputs, dtype=torch.float32).to(device)
+
+    BATCH_SIZE.observe(tensor.shape[-3])
+    with STAGE_SECONDS.time(stage="forward"):
+        return ensemble.predict(tensor)
+
+def _predict_sync(unit_number: int, use_real_data: bool, sensor_data: Dict[str, Any],
+                  uncertainty: bool = False) -> Dict[str, Any]:
+    """Blocking part of /predict, run on the inference executor.
+
+    MC dropout (uncertainty) runs on the primary model; otherwise a loaded
+    ensemble replaces it.
+    """
+    from app.preprocessing.data_processor import preprocess_for_model, validate_preprocessing
+
+    if use_real_data and fd002_data is not None:
+        with STAGE_SECONDS.time(stage="data_lookup"):
+            rows = _fd002_frame().unit_rows(unit_number)
+        if rows is None:
+            raise HTTPException(404, f"No data for engine {unit_number}")
+        make = lambda pipeline: pipeline.window(rows)[None]
+        with STAGE_SECONDS.time(stage="preprocessing"):
+            processed = feature_pipeline.window(rows)
+    else:
+        make = lambda pipeline: preprocess_for_model(sensor_data, pipeline.scaler)[None]
+        with STAGE_SECONDS.time(stage="preprocessing"):
+            processed = preprocess_for_model(sensor_data, scaler)
+
+    if not validate_preprocessing(processed):
+        raise HTTPException(400, "Preprocessing validation failed")
+
+    # Model inference
+    summary = None
+    members = None
+    if uncertainty and uncertainty_estimator is not None:
+        summary = _run_mc(processed)
+        rul_value = float(summary["point"][0])
+    elif ensemble is not None:
+        members = _run_ensemble(_ensemble_inputs(make, processed[None]))
+        rul_value = float(max(0, min(RUL_MAX, members["rul"][0])))
+    else:
+        raw_pred = _run_model(processed).item()
+        rul_value = float(max(0, min(RUL_MAX, raw_pred)))
+
+    # Determine status
+    if rul_value < 50:
+        status = "critical"
+    elif rul_value < 100:
+        status = "warning"
+    else:
+        status = "healthy"
+
+    if summary is not None:
+        # Share of MC samples that agree with the reported status
+        confidence = float(summary["confidence"][0])
+    else:
+        # Confidence heuristic
+        confidence = float(min(0.95, max(0.6, 1.0 - abs(rul_value - (RUL_MAX / 2)) / RUL_MAX)))
+
+    result = {
+        "predicted_rul": round(rul_value, 2),
+        "confidence": round(confidence, 3),
+        "status": status,
+        "timestamp": datetime.utcnow().isoformat(),
+        "model_version": MODEL_VERSION
+    }
+    if summary is not None:
+        result["uncertainty"] = {
+            "method": "mc_dropout",
+            "mean": round(float(summary["mean"][0]), 2),
+            "std": round(float(summary["std"][0]), 3),
+            "lower": round(float(summary["lower"][0]), 2),
+            "upper": round(float(summary["upper"][0]), 2),
+            "interval": settings.MC_DROPOUT_INTERVAL,
+            "samples": int(summary["samples"][0])
+        }
+    if members is not None:
+        result["ensemble"] = {
+            "aggregate": ensemble.aggregate,
+            "members": [round(float(v), 2) for v in members["members"][:, 0]],
+            "std": round(float(members["std"][0]), 3)
+        }
+
+    return result
+
+def _flight_key(unit_number: int, uncertainty: bool, priority: str) -> Optional[tuple]:
+    """(unit, last cycle, model generation, ...) for a real-data prediction, or None to not coalesce.
+
+    Only uses a frame that is already built, so the event loop never pays for a rebuild.
+    """
+    frame = fd002_frame
+    if frame is None or frame.source is not fd002_data or frame.feature_names != feature_pipeline.feature_names:
+        return None
+    span = frame.locate(unit_number)
+    if span is None:
+        return None
+    return unit_number, int(frame.cycles[span[1] - 1]), model_generation, uncertainty, priority
+
 @app.post("/predict")
-async def predict_rul(request: Dict[str, Any]):
+async def predict_rul(request: Dict[str, Any], x_priority: Optional[str] = Header(None)):
+    """Single-engine prediction; "priority" (or X-Priority) picks the inference lane, default interactive"""
     logger.info("predict called", payload=request)
     try:
+        priority = parse_priority(request.get("priority") or x_priority, default=INTERACTIVE)
         unit_number = int(request.get("unit_number", 1))
         use_real_data = bool(request.get("use_real_data", True))
         sensor_data = request.get("sensor_data", {})
+        uncertainty = bool(request.get("uncertainty", settings.UNCERTAINTY_BY_DEFAULT))
+        _require_model()
+        if use_real_data and startup_stages.get("data", {}).get("status") == "loading":
+            raise HTTPException(503, "FD002 data is still loading",
+                                headers={"Retry-After": str(settings.INFERENCE_RETRY_AFTER_SECONDS)})
+
+        run = lambda: inference_executor.run(_predict_sync, unit_number, use_real_data, sensor_data, uncertainty,
+                                             priority=priority)
+        key = _flight_key(unit_number, uncertainty, priority) if use_real_data else None
+        if key is None:
+            return await run()
+        return await predict_flights.do(key, run)
+
+    except (HTTPException, InferenceSaturated):
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Prediction error: {e}")
 
-        if use_real_data and fd002_data is not None:
-            df = fd002_data[fd002_data["unit_number"] == unit_number]
-            if df.empty:
-                raise HTTPException(404, f"No data for engine {unit_number}")
-            seq = df.tail(SEQUENCE_LENGTH)
-            processed = preprocess_fd002_sequence(seq, scaler)
+ENGINES_CHUNK = 512
+
+# Raw history rows without unit and cycle: 3 settings then 21 sensors, as the backend stores them
+HISTORY_LAYOUT = CMAPSS_COLUMNS[2:]
+
+def _forward_rul(windows: np.ndarray) -> np.ndarray:
+    """Full model (or ensemble) RUL in ENGINES_CHUNK forwards; ensemble inputs may lead with members"""
+    rows = windows.shape[-3]
+    if ensemble is not None:
+        return np.concatenate([_run_ensemble(windows[..., i:i + ENGINES_CHUNK, :, :])["rul"]
+                               for i in range(0, rows, ENGINES_CHUNK)])
+    return np.concatenate([_run_model(windows[i:i + ENGINES_CHUNK]).reshape(-1).numpy()
+                           for i in range(0, rows, ENGINES_CHUNK)])
+
+def _screen(primary: np.ndarray, windows: np.ndarray) -> Dict[str, np.ndarray]:
+    """Student RUL for every row, the full model's for the rows the cascade escalates"""
+    with STAGE_SECONDS.time(stage="screening"):
+        return cascade.predict(primary, lambda rows: _forward_rul(windows[..., rows, :, :]))
+
+def _predict_batch_sync(ids: List[Any], values: np.ndarray, lengths: np.ndarray,
+                        uncertainty: bool, use_gate: bool = True, use_cascade: bool = True) -> Dict[str, Any]:
+    """Blocking part of /predict/batch: one gather-scale-pad over all histories, chunked forwards.
+
+    Without uncertainty, ids whose window has not moved past the delta gate's
+    threshold reuse their last computed prediction and skip the forward pass,
+    and the rest go through the student cascade when one is loaded.
+    """
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    index = feature_pipeline.index_for(HISTORY_LAYOUT)
+    # MC dropout is sampled, so only deterministic predictions are reused
+    gate = delta_gate if use_gate and not uncertainty else None
+    with STAGE_SECONDS.time(stage="preprocessing"):
+        windows = feature_pipeline.windows(values, ends, starts, index)
+        if gate is not None:
+            run, gated_rul, gate_summaries = gate.check(ids, windows)
+            selected = np.flatnonzero(run)
         else:
-            processed = preprocess_for_model(sensor_data, scaler)
+            selected = np.arange(len(ids))
+        primary = windows
+        if ensemble is not None and not uncertainty:
+            windows = _ensemble_inputs(lambda pipeline: pipeline.windows(values, ends, starts, index), windows)
+        if len(selected) < len(ids):
+            primary = primary[selected]
+            windows = windows[..., selected, :, :]
+    screen = cascade is not None and use_cascade and not uncertainty
+
+    start = time.perf_counter()
+    confidence = None
+    std = None
+    if uncertainty and uncertainty_estimator is not None:
+        summaries = [_run_mc(windows[i:i + ENGINES_CHUNK]) for i in range(0, len(ids), ENGINES_CHUNK)]
+        rul = np.concatenate([s["point"] for s in summaries])
+        confidence = np.concatenate([s["confidence"] for s in summaries])
+        mc_mean = np.concatenate([s["mean"] for s in summaries])
+        std = np.concatenate([s["std"] for s in summaries])
+    elif not len(selected):
+        rul = np.empty(0)
+        screen = False
+    elif screen:
+        screened = _screen(primary, windows)
+        rul = screened["rul"]
+    else:
+        rul = _forward_rul(windows)
+    inference_ms = (time.perf_counter() - start) * 1000
+
+    if gate is not None:
+        gate.update([ids[i] for i in selected], gate_summaries[selected], rul)
+        gated_rul[selected] = rul
+        rul = gated_rul
+
+    rul = np.clip(rul.astype(np.float64), 0, RUL_MAX)
+    if confidence is None:
+        # Same heuristic as /predict
+        confidence = np.clip(1.0 - np.abs(rul - RUL_MAX / 2) / RUL_MAX, 0.6, 0.95)
+    status = np.where(rul < 50, "critical", np.where(rul < 100, "warning", "healthy"))
+
+    result = {
+        "ids": ids,
+        "predicted_rul": np.round(rul, 2).tolist(),
+        "confidence": np.round(confidence.astype(np.float64), 3).tolist(),
+        "status": status.tolist(),
+        "model_version": MODEL_VERSION,
+        "inference_ms": round(inference_ms, 2),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    if std is not None:
+        result["uncertainty_mean"] = np.round(mc_mean, 2).tolist()
+        result["uncertainty_std"] = np.round(std.astype(np.float64), 3).tolist()
+    if gate is not None:
+        result["computed"] = len(selected)
+        result["reused"] = len(ids) - len(selected)
+    if screen:
+        result["escalated"] = int(screened["escalated"].sum())
+    return result
+
+@app.post("/predict/batch")
+async def predict_batch(request: Dict[str, Any], x_priority: Optional[str] = Header(None)):
+    """Score many raw histories in one call.
+
+    Columnar body: ``ids`` (echoed back), ``lengths`` (rows per history) and
+    ``values``, all histories' rows concatenated in cycle order, each row the
+    3 settings and 21 sensors. Only the last sequence_length rows of a history
+    are used; shorter ones are padded. Returns parallel arrays in ``ids`` order.
+    Runs in the batch lane unless "priority" (or X-Priority) says interactive.
+    ``"gate": false`` recomputes every id even when its window has not moved;
+    ``"cascade": false`` scores every id with the full model.
+    """
+    _require_model()
+    try:
+        ids = list(request["ids"])
+        lengths = np.asarray(request["lengths"], dtype=np.intp)
+        values = np.asarray(request["values"], dtype=np.float32).reshape(-1, len(HISTORY_LAYOUT))
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(400, f"Invalid batch: {e}")
+    if len(lengths) != len(ids) or (lengths < 1).any() or lengths.sum() != len(values):
+        raise HTTPException(400, "Invalid batch: need one length >= 1 per id, summing to the number of rows")
+    if not ids:
+        return {"ids": [], "predicted_rul": [], "confidence": [], "status": [], "model_version": MODEL_VERSION}
+    uncertainty = bool(request.get("uncertainty", settings.UNCERTAINTY_BY_DEFAULT))
+    priority = parse_priority(request.get("priority") or x_priority, default=BATCH)
+    use_gate = bool(request.get("gate", True))
+    use_cascade = bool(request.get("cascade", True))
 
-        if not validate_preprocessing(processed):
-            raise HTTPException(400, "Preprocessing validation failed")
+    try:
+        return await inference_executor.run(_predict_batch_sync, ids, values, lengths, uncertainty, use_gate,
+                                            use_cascade, priority=priority)
+    except (HTTPException, InferenceSaturated):
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Prediction error: {e}")
 
-        # Model inference
-        with torch.no_grad():
-            tensor = torch.FloatTensor(processed).unsqueeze(0).to(device)
-            raw_pred = model(tensor).cpu().item()
-        rul_value = float(max(0, min(RUL_MAX, raw_pred)))
+ENGINE_FIELDS = ("unit_number", "name", "max_cycle", "total_records", "estimated_rul")
 
-        # Determine status
-        if rul_value < 50:
-            status = "critical"
-        elif rul_value < 100:
-            status = "warning"
-        else:
-            status = "healthy"
+def _list_engines_sync() -> Dict[str, List[Any]]:
+    """Blocking part of /engines, run on the inference executor; returns per-field columns.
 
-        # Confidence heuristic
-        confidence = float(min(0.95, max(0.6, 1.0 - abs(rul_value - (RUL_MAX / 2)) / RUL_MAX)))
+    Every unit's latest window comes from one gather over the fleet frame and is
+    scored in chunked batch forwards instead of one DataFrame filter and forward per unit.
+    With a student loaded, only the units the cascade escalates reach the full model.
+    """
+    with STAGE_SECONDS.time(stage="data_lookup"):
+        frame = _fd002_frame()
 
-        result = {
-            "predicted_rul": round(rul_value, 2),
-            "confidence": round(confidence, 3),
-            "status": status,
-            "timestamp": datetime.utcnow().isoformat(),
-            "model_version": "transformer_fd002_exact_v2.1"
-        }
-
-        return result
-
-    except HTTPException:
-        raise
+    try:
+        if model is not None:
+            with STAGE_SECONDS.time(stage="preprocessing"):
+                primary = windows = frame.last_windows(feature_pipeline)
+                if ensemble is not None:
+                    windows = _ensemble_inputs(frame.last_windows, windows)
+            rul = _screen(primary, windows)["rul"] if cascade is not None else _forward_rul(windows)
+            rul = np.maximum(rul, 0)
+        else:
+            # Fallback calculation
+            rul = np.clip(np.random.uniform(20, 120, len(frame)), 0, RUL_MAX)
     except Exception as e:
-        raise HTTPException(500, f"Prediction error: {e}")
+        logger.warning(f"Failed to predict engines: {e}")
+        rul = np.full(len(frame), 75.0)
+
+    return {
+        "unit_number": frame.units.astype(int).tolist(),
+        "name": [f"Engine_{int(unit):03d}" for unit in frame.units],
+        "max_cycle": frame.last_cycles.astype(int).tolist(),
+        "total_records": frame.counts.tolist(),
+        "estimated_rul": np.round(rul.astype(float), 2).tolist()
+    }
 
 @app.get("/engines")
-async def get_engines():
+async def get_engines(request: Request, x_priority: Optional[str] = Header(None)):
+    """Accept: application/vnd.rul.columnar+json returns parallel arrays instead of a list of objects"""
     try:
         if fd002_data is None:
+            if startup_stages.get("data", {}).get("status") == "loading":
+                raise HTTPException(503, "FD002 data is still loading",
+                                    headers={"Retry-After": str(settings.INFERENCE_RETRY_AFTER_SECONDS)})
             return {"engines": [], "message": "FD002 data not loaded"}
         
-        engines = []
-        for unit_number in sorted(fd002_data['unit_number'].unique()):
-            engine_data = fd002_data[fd002_data['unit_number'] == unit_number]
-            max_cycle = engine_data['time_in_cycles'].max()
+        columns = await inference_executor.run(_list_engines_sync, priority=parse_priority(x_priority))
+        if wants_columnar(request):
+            return ColumnarResponse(columns, total_records=len(fd002_data))
 
-            try:
-                processed_data = preprocess_fd002_sequence(engine_data.tail(50), scaler)
-                
-                if model is not None:
-                    with torch.no_grad():
-                        input_tensor = torch.FloatTensor(processed_data).unsqueeze(0).to(device)
-                        prediction = model(input_tensor)
-                        rul = max(0, float(prediction.cpu().numpy()[0]))
-                else:
-                    # Fallback calculation
-                    rul = max(0, min(RUL_MAX, np.random.uniform(20, 120)))
-                
-            except Exception as e:
-                logger.warning(f"Failed to predict for engine {unit_number}: {e}")
-                rul = 75.0
-            
-            engines.append({
-                "unit_number": int(unit_number),
-                "name": f"Engine_{unit_number:03d}",
-                "max_cycle": int(max_cycle),
-                "total_records": len(engine_data),
-                "estimated_rul": round(float(rul), 2)
-            })
-        
-        return {
+        engines = rows_from_columns(columns)
+        return JSONResponse({
             "engines": engines,
             "total_engines": len(engines),
             "total_records": len(fd002_data)
-        }
+        }, headers={"Vary": "Accept"})
         
+    except (HTTPException, InferenceSaturated):
+        raise
     except Exception as e:
         logger.error("Failed to get engines", error=str(e))
         raise HTTPException(status_code=500, detail=f"Failed to get engines: {str(e)}")
@@ -309,63 +864,111 @@ async def get_model_info():
             "max_rul": RUL_MAX,
             "dropout_rate": 0.1
         },
-        "features": {
-            "selected_sensors": SELECTED_SENSORS,
-            "selected_settings": SELECTED_SETTINGS,
-            "total_features": len(SELECTED_SENSORS) + len(SELECTED_SETTINGS),
-            "dropped_sensors": [1, 5, 6, 10, 16, 18, 19],
-            "dropped_settings": [3]
-        },
+        "features": feature_pipeline.spec.to_dict(),
+        "ensemble": {
+            "members": settings.ENSEMBLE_ARTIFACT_PATHS,
+            "aggregate": ensemble.aggregate,
+            "shared_inputs": ensemble_pipelines is None
+        } if ensemble is not None else None,
         "device": str(device) if device else "unknown",
+        "artifact": {
+            "version": model_metadata["version"],
+            "created_at": model_metadata["created_at"],
+            "architecture": model_metadata["architecture"],
+            "metrics": model_metadata["metrics"]
+        } if model_metadata else None,
         "training_dataset": "C-MAPSS FD002",
-        "fd002_engines": fd002_data['unit_number'].nunique() if fd002_data is not None else 0
+        "fd002_engines": engines_available
     }
 
+def _validate_dataset_sync() -> Dict[str, Any]:
+    """Blocking part of /dataset/validate, run on the inference executor"""
+    from app.preprocessing.data_processor import validate_preprocessing
+
+    rows = _fd002_frame().unit_rows(1)
+    if rows is None:
+        raise ValueError("Engine 1 not in FD002 data")
+    processed = feature_pipeline.window(rows[:SEQUENCE_LENGTH])
+    
+    validation_result = {
+        "status": "success" if validate_preprocessing(processed) else "error",
+        "shape": processed.shape,
+        "expected_shape": (feature_pipeline.spec.sequence_length, feature_pipeline.spec.num_features),
+        "has_nan": bool(np.isnan(processed).any()),
+        "has_inf": bool(np.isinf(processed).any()),
+        "feature_range": {
+            "min": float(processed.min()),
+            "max": float(processed.max()),
+            "mean": float(processed.mean())
+        },
+        "notebook_match": True,
+        "preprocessing_config": feature_pipeline.spec.to_dict()
+    }
+    
+    return validation_result
+
 @app.post("/dataset/validate")
 async def validate_dataset():
     try:
         if fd002_data is None:
             return {"status": "error", "message": "FD002 data not loaded"}
         
-        sample_engine = fd002_data[fd002_data['unit_number'] == 1].head(50)
-        processed = preprocess_fd002_sequence(sample_engine, scaler)
-        
-        validation_result = {
-            "status": "success" if validate_preprocessing(processed) else "error",
-            "shape": processed.shape,
-            "expected_shape": (SEQUENCE_LENGTH, 16),
-            "has_nan": bool(np.isnan(processed).any()),
-            "has_inf": bool(np.isinf(processed).any()),
-            "feature_range": {
-                "min": float(processed.min()),
-                "max": float(processed.max()),
-                "mean": float(processed.mean())
-            },
-            "notebook_match": True,
-            "preprocessing_config": {
-                "selected_sensors": SELECTED_SENSORS,
-                "selected_settings": SELECTED_SETTINGS,
-                "sequence_length": SEQUENCE_LENGTH,
-                "rul_max": RUL_MAX
-            }
-        }
-        
-        return validation_result
+        return await inference_executor.run(_validate_dataset_sync)
         
+    except InferenceSaturated:
+        raise
     except Exception as e:
         logger.error("Validation failed", error=str(e))
         return {"status": "error", "message": str(e)}
 
+def _admin_token_valid(token: Optional[str]) -> bool:
+    return bool(settings.ADMIN_TOKEN) and token is not None and secrets.compare_digest(token, settings.ADMIN_TOKEN)
+
+def _check_admin(token: Optional[str]):
+    # No token configured means no admin endpoints, not open ones
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(403, "Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if not _admin_token_valid(token):
+        raise HTTPException(403, "Invalid admin token")
+
+@app.get("/admin/profiling")
+async def get_profiling(x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    return {**profiler.config(), "profiles": profiler.list()}
+
+@app.put("/admin/profiling")
+async def update_profiling(request: Dict[str, Any], x_admin_token: Optional[str] = Header(None)):
+    """Body: any of {"enabled": bool, "sample_rate": 0..1, "mode": "cprofile"|"torch"}"""
+    _check_admin(x_admin_token)
+    try:
+        profiler.configure(
+            enabled=request.get("enabled"),
+            sample_rate=float(request["sample_rate"]) if "sample_rate" in request else None,
+            mode=request.get("mode")
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    logger.info("Profiling reconfigured", **profiler.config())
+    return profiler.config()
+
+@app.get("/admin/profiles/{profile_id}")
+async def download_profile(profile_id: str, kind: str = "raw", x_admin_token: Optional[str] = Header(None)):
+    """kind=raw returns the .prof (pstats/snakeviz) or chrome trace; kind=summary returns text"""
+    _check_admin(x_admin_token)
+    record = profiler.get(profile_id)
+    path = profiler.path(record, kind) if record else None
+    if path is None or not os.path.exists(path):
+        raise HTTPException(404, f"Profile {profile_id} ({kind}) not found")
+
+    if kind == "summary":
+        with open(path) as f:
+            return PlainTextResponse(f.read())
+    return FileResponse(path, filename=os.path.basename(path), media_type="application/octet-stream")
+
 @app.get("/debug/preprocessing")
 async def debug_preprocessing():
     return {
-        "selected_sensors": SELECTED_SENSORS,
-        "selected_settings": SELECTED_SETTINGS,
-        "total_features": len(SELECTED_SENSORS) + len(SELECTED_SETTINGS),
-        "sequence_length": SEQUENCE_LENGTH,
-        "rul_max": RUL_MAX,
-        "dropped_sensors": [1, 5, 6, 10, 16, 18, 19],
-        "dropped_settings": [3],
+        **feature_pipeline.spec.to_dict(),
         "scaler_loaded": scaler is not None,
         "scaler_type": type(scaler).__name__ if scaler else None,
         "fd002_columns": list(fd002_data.columns) if fd002_data is not None else None,
@@ -0,0 +1,133 @@
+"""Single-file model artifact: weights, scaler, feature list and config together.
+
+    python -m app.models.artifact --model models/transformer_rul_model_FD002.pth \
+        --scaler models/transformer_scaler.pkl -o models/transformer_rul_FD002.pt
+"""
+import argparse
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+from sklearn.preprocessing import MinMaxScaler
+
+from app.models.transformer_model import TransformerRUL, load_model, load_scaler
+
+ARTIFACT_FORMAT = "transformer_rul_artifact"
+ARTIFACT_VERSION = 1
+
+DEFAULT_ARCHITECTURE = {
+    "input_dim": 16,
+    "embed_dim": 64,
+    "num_layers": 2,
+    "num_heads": 4,
+    "dff": 128,
+    "rate": 0.1,
+    "max_rul": 125
+}
+
+
+def scaler_to_params(scaler: MinMaxScaler) -> Dict[str, Any]:
+    return {
+        "feature_range": [float(v) for v in scaler.feature_range],
+        "data_min": torch.from_numpy(np.asarray(scaler.data_min_, dtype=np.float64)),
+        "data_max": torch.from_numpy(np.asarray(scaler.data_max_, dtype=np.float64)),
+        "n_samples_seen": int(scaler.n_samples_seen_)
+    }
+
+
+def scaler_from_params(params: Dict[str, Any], feature_names: Optional[List[str]] = None) -> MinMaxScaler:
+    """Rebuild a fitted MinMaxScaler without unpickling sklearn objects"""
+    low, high = params["feature_range"]
+    data_min = params["data_min"].numpy()
+    data_max = params["data_max"].numpy()
+    data_range = data_max - data_min
+
+    scaler = MinMaxScaler(feature_range=(low, high))
+    scaler.data_min_ = data_min
+    scaler.data_max_ = data_max
+    scaler.data_range_ = data_range
+    scaler.scale_ = (high - low) / np.where(data_range == 0.0, 1.0, data_range)
+    scaler.min_ = low - data_min * scaler.scale_
+    scaler.n_samples_seen_ = params["n_samples_seen"]
+    scaler.n_features_in_ = len(data_min)
+    if feature_names is not None:
+        scaler.feature_names_in_ = np.asarray(feature_names, dtype=object)
+    return scaler
+
+
+def save_artifact(path: str, model: TransformerRUL, scaler: MinMaxScaler, features: List[str],
+                  sequence_length: int, rul_max: int, architecture: Dict[str, Any],
+                  metrics: Optional[Dict[str, Any]] = None):
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "created_at": datetime.utcnow().isoformat(),
+        "architecture": dict(architecture),
+        "features": list(features),
+        "sequence_length": int(sequence_length),
+        "rul_max": int(rul_max),
+        "scaler": scaler_to_params(scaler),
+        "metrics": metrics or {},
+        "state_dict": {k: v.detach().cpu() for k, v in model.state_dict().items()}
+    }
+
+    # Write-then-rename so a crash never leaves a truncated artifact behind
+    tmp_path = f"{path}.tmp"
+    torch.save(artifact, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def is_artifact(path: str) -> bool:
+    try:
+        header = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    except Exception:
+        return False
+    return isinstance(header, dict) and header.get("format") == ARTIFACT_FORMAT
+
+
+def load_artifact(path: str, device: torch.device) -> Dict[str, Any]:
+    """Load model, scaler and metadata from one memory-mapped read"""
+    artifact = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    if not isinstance(artifact, dict) or artifact.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} is not a {ARTIFACT_FORMAT} file")
+    if artifact["version"] > ARTIFACT_VERSION:
+        raise ValueError(f"Artifact version {artifact['version']} is newer than supported version {ARTIFACT_VERSION}")
+
+    model = TransformerRUL(**artifact["architecture"])
+    # assign=True adopts the mmapped tensors instead of copying into fresh parameters
+    model.load_state_dict(artifact["state_dict"], assign=True)
+    model.to(device)
+    model.eval()
+
+    return {
+        "model": model,
+        "scaler": scaler_from_params(artifact["scaler"], artifact["features"]),
+        "features": artifact["features"],
+        "sequence_length": artifact["sequence_length"],
+        "rul_max": artifact["rul_max"],
+        "architecture": artifact["architecture"],
+        "metrics": artifact["metrics"],
+        "version": artifact["version"],
+        "created_at": artifact["created_at"]
+    }
+
+
+def main(argv=None):
+    from app.preprocessing.data_processor import get_feature_names, SEQUENCE_LENGTH, RUL_MAX
+
+    parser = argparse.ArgumentParser(description="Bundle a legacy state dict and scaler into one artifact")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--scaler", required=True)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model, torch.device("cpu"))
+    scaler = load_scaler(args.scaler)
+    save_artifact(args.output, model, scaler, get_feature_names(), SEQUENCE_LENGTH, RUL_MAX, DEFAULT_ARCHITECTURE)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Delta-gated re-prediction for fleet scoring.
+
+A new cycle usually moves an engine's scaled window very little, and running
+the transformer again gives nearly the same RUL. The gate keeps, per engine,
+a summary of the window behind its last real prediction (per-feature means
+over the whole window and over its newest ``tail_rows`` rows, and the
+per-feature standard deviation) together with that prediction and when it
+was made.
+
+For a batch it computes the change of every engine at once: the largest shift
+of either mean, in units of the cached window's standard deviation of that
+feature. Engines whose change is at most ``threshold`` and whose cached
+prediction is younger than ``max_age`` seconds reuse the cached RUL; only the
+rest go through the model. The cache is compared against the window of the
+last *computed* prediction, not the last request, so slow drift still adds up
+to a re-prediction.
+
+The measure is relative because scaled features are not on a common scale:
+FD002's six operating regimes put many rows far outside the scaler's fitted
+range, so a fixed threshold in scaled units would mean something different for
+every feature.
+
+    python -m app.models.delta_gate --model models/transformer_rul_FD002.pt --data data/test_FD002.txt --cycles 30
+"""
+import argparse
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+
+class DeltaGate:
+
+    def __init__(self, threshold: float = 0.0, max_age: float = 300.0, tail_rows: int = 10,
+                 max_entries: int = 100000):
+        self.threshold = threshold
+        self.max_age = max_age
+        self.tail_rows = tail_rows
+        self.max_entries = max_entries
+        self._slots: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._summaries: Optional[np.ndarray] = None  # (capacity, 3, features)
+        self._rul: Optional[np.ndarray] = None
+        self._scored_at: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.skipped = 0
+
+    def reset(self):
+        with self._lock:
+            self._slots.clear()
+            self._summaries = self._rul = self._scored_at = None
+            self.checked = self.skipped = 0
+
+    def summarize(self, windows: np.ndarray) -> np.ndarray:
+        """(batch, 3, features): per-feature mean, mean of the newest rows and standard deviation"""
+        return np.stack([windows.mean(axis=1), windows[:, -self.tail_rows:].mean(axis=1), windows.std(axis=1)],
+                        axis=1)
+
+    def change(self, summaries: np.ndarray, cached: np.ndarray) -> np.ndarray:
+        """(batch,) largest mean shift, in cached standard deviations (constant features count in raw units)"""
+        spread = cached[:, 2:3]
+        shift = np.abs(summaries[:, :2] - cached[:, :2]) / np.where(spread > 0, spread, 1.0)
+        return shift.max(axis=(1, 2))
+
+    def check(self, keys: List[Hashable], windows: np.ndarray,
+              now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(run, cached_rul, summaries): which rows need the model, the cached RUL of the others"""
+        now = time.monotonic() if now is None else now
+        summaries = self.summarize(windows)
+        run = np.ones(len(keys), dtype=bool)
+        cached = np.full(len(keys), np.nan)
+
+        with self._lock:
+            if self._summaries is not None and self._summaries.shape[1:] == summaries.shape[1:]:
+                slots = np.array([self._slots.get(key, -1) for key in keys], dtype=np.intp)
+                known = np.flatnonzero(slots >= 0)
+                if len(known):
+                    s = slots[known]
+                    change = self.change(summaries[known], self._summaries[s])
+                    fresh = (change <= self.threshold) & (now - self._scored_at[s] <= self.max_age)
+                    run[known[fresh]] = False
+                    cached[known[fresh]] = self._rul[s[fresh]]
+            self.checked += len(keys)
+            self.skipped += int((~run).sum())
+        return run, cached, summaries
+
+    def _slot(self, key: Hashable) -> int:
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._slots.move_to_end(key)
+            return slot
+        if len(self._slots) < len(self._rul):
+            slot = len(self._slots)
+        elif len(self._rul) < self.max_entries:
+            capacity = min(self.max_entries, 2 * len(self._rul))
+            grow = capacity - len(self._rul)
+            self._summaries = np.concatenate([self._summaries, np.empty((grow, *self._summaries.shape[1:]),
+                                                                        dtype=self._summaries.dtype)])
+            self._rul = np.concatenate([self._rul, np.empty(grow)])
+            self._scored_at = np.concatenate([self._scored_at, np.empty(grow)])
+            slot = len(self._slots)
+        else:
+            # Evict the engine that was predicted least recently
+            _, slot = self._slots.popitem(last=False)
+        self._slots[key] = slot
+        return slot
+
+    def update(self, keys: List[Hashable], summaries: np.ndarray, rul: np.ndarray, now: Optional[float] = None):
+        """Record freshly computed predictions (only the rows that ran the model)"""
+        if not len(keys):
+            return
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._summaries is None or self._summaries.shape[1:] != summaries.shape[1:]:
+                self._slots.clear()
+                capacity = min(self.max_entries, max(64, len(keys)))
+                self._summaries = np.empty((capacity, *summaries.shape[1:]), dtype=summaries.dtype)
+                self._rul = np.empty(capacity)
+                self._scored_at = np.empty(capacity)
+            slots = np.array([self._slot(key) for key in keys], dtype=np.intp)
+            self._summaries[slots] = summaries
+            self._rul[slots] = rul
+            self._scored_at[slots] = now
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold": self.threshold,
+            "max_age_seconds": self.max_age,
+            "cached_engines": len(self._slots),
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_rate": round(self.skipped / self.checked, 4) if self.checked else 0.0
+        }
+
+
+def benchmark(model, pipeline, frame, num_cycles: int, threshold: float, tail_rows: int = 10) -> Dict[str, float]:
+    """Replay each unit's history one cycle at a time, gated vs. always re-predicting"""
+    import torch
+
+    gate = DeltaGate(threshold=threshold, max_age=float("inf"), tail_rows=tail_rows)
+    keys = frame.units.tolist()
+    # Start each unit num_cycles before its end (or at its first row) and advance one cycle per step
+    first = np.maximum(frame.starts + 1, frame.ends - num_cycles)
+    steps = [pipeline.windows(frame.features, np.minimum(first + c, frame.ends), frame.starts)
+             for c in range(num_cycles + 1)]
+
+    def forward(windows):
+        with torch.inference_mode():
+            return model(torch.as_tensor(windows)).reshape(-1).numpy().astype(np.float64)
+
+    forward(steps[0])
+    start = time.perf_counter()
+    full = [forward(windows) for windows in steps]
+    full_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    gated = []
+    for windows in steps:
+        run, rul, summaries = gate.check(keys, windows)
+        if run.any():
+            rul[run] = forward(windows[run])
+            gate.update([k for k, r in zip(keys, run) if r], summaries[run], rul[run])
+        gated.append(rul)
+    gated_s = time.perf_counter() - start
+
+    # The first step fills the cache; compare the steady state
+    error = np.abs(np.stack(full[1:]) - np.stack(gated[1:]))
+    return {
+        "engines": len(keys),
+        "cycles": num_cycles,
+        "threshold": threshold,
+        "skip_rate": gate.skipped / gate.checked,
+        "full_ms_per_cycle": full_s / len(steps) * 1000,
+        "gated_ms_per_cycle": gated_s / len(steps) * 1000,
+        "speedup": full_s / gated_s,
+        "mean_abs_error": float(error.mean()),
+        "max_abs_error": float(error.max())
+    }
+
+
+def main(argv=None):
+    import torch
+    from app.models.artifact import is_artifact, load_artifact
+    from app.models.transformer_model import load_model
+    from app.preprocessing.data_processor import load_data, select_features
+    from app.preprocessing.pipeline import FD002_SPEC, FeatureSpec, UnitFrame
+
+    parser = argparse.ArgumentParser(description="Measure the skip rate and error of delta-gated re-prediction")
+    parser.add_argument("--model", default="models/transformer_rul_FD002.pt")
+    parser.add_argument("--data", default="data/test_FD002.txt")
+    parser.add_argument("--cycles", type=int, default=30)
+    parser.add_argument("--threshold", type=float, nargs="+", default=[0.05, 0.1, 0.2])
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    if is_artifact(args.model):
+        artifact = load_artifact(args.model, torch.device("cpu"))
+        model, scaler = artifact["model"], artifact["scaler"]
+        spec = FeatureSpec.from_feature_names(artifact["features"], artifact["sequence_length"], artifact["rul_max"])
+    else:
+        model, scaler, spec = load_model(args.model, torch.device("cpu")), None, FD002_SPEC
+    frame = UnitFrame(select_features(load_data(args.data)), spec)
+    pipeline = spec.compile(scaler)
+    for threshold in args.threshold:
+        print(benchmark(model, pipeline, frame, args.cycles, threshold))
+
+
+if __name__ == "__main__":
+    main()
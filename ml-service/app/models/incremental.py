@@ -0,0 +1,201 @@
+"""Incremental inference for per-cycle streaming.
+
+When an engine reports one new cycle its window slides by one row. The GCU
+and linear_gcu stage is local (receptive field of kernel_size // 2 rows on
+either side), so most per-timestep embeddings of the previous window can be
+shifted into place; only the edge positions touched by zero padding are
+recomputed. Attention is global, so the encoder stack always runs in full.
+
+    python -m app.models.incremental --model models/transformer_rul_FD002.pt --engines 512 --cycles 30
+"""
+import argparse
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List
+
+import torch
+
+from app.models.transformer_model import TransformerRUL
+
+
+class IncrementalEncoder:
+    """Caches each engine's last window and its embedded timesteps.
+
+    A request whose window equals the cached one shifted by one row reuses
+    the interior embeddings; an identical window reuses them all; anything
+    else (gaps, restarts, first sight) falls back to a full embed. Cached
+    windows and embeddings live in slot-indexed tensors so the match checks
+    and cache updates are a handful of batched ops, not per-engine calls.
+    """
+
+    def __init__(self, model: TransformerRUL, max_entries: int = 10000):
+        self.model = model
+        self.max_entries = max_entries
+        self.halo = model.gcu.conv.kernel_size[0] // 2
+        self._slots: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._windows = None
+        self._embedded = None
+        self._predictions = None
+        self.stats = {"full": 0, "incremental": 0, "unchanged": 0}
+
+    def reset(self):
+        self._slots.clear()
+        self._windows = None
+        self._embedded = None
+        self._predictions = None
+        self.stats = {k: 0 for k in self.stats}
+
+    def _assign_slots(self, keys: List[Hashable], windows: torch.Tensor) -> torch.Tensor:
+        seq_len = windows.size(1)
+        if self._windows is None or self._windows.shape[1:] != windows.shape[1:]:
+            self._slots.clear()
+            capacity = min(self.max_entries, max(64, len(keys)))
+            self._windows = windows.new_empty((capacity, *windows.shape[1:]))
+            self._embedded = windows.new_empty((capacity, seq_len, self.model.embed_dim))
+            self._predictions = windows.new_empty((capacity, 1))
+
+        # Refresh every known key first so none of them is evicted for a newcomer in the same batch
+        for key in keys:
+            if key in self._slots:
+                self._slots.move_to_end(key)
+
+        slots = []
+        for key in keys:
+            slot = self._slots.get(key)
+            if slot is None:
+                if len(self._slots) < len(self._windows):
+                    slot = len(self._slots)
+                elif len(self._windows) < self.max_entries:
+                    capacity = min(self.max_entries, 2 * len(self._windows))
+                    self._windows = torch.cat([self._windows, self._windows.new_empty((capacity - len(self._windows), *self._windows.shape[1:]))])
+                    self._embedded = torch.cat([self._embedded, self._embedded.new_empty((capacity - len(self._embedded), *self._embedded.shape[1:]))])
+                    self._predictions = torch.cat([self._predictions, self._predictions.new_empty((capacity - len(self._predictions), 1))])
+                    slot = len(self._slots)
+                else:
+                    # Evict the least recently scored engine
+                    _, slot = self._slots.popitem(last=False)
+                self._slots[key] = slot
+            slots.append(slot)
+        return torch.tensor(slots, dtype=torch.long)
+
+    def _shifted_embed(self, prev_embedded: torch.Tensor, windows: torch.Tensor) -> torch.Tensor:
+        r = self.halo
+        seq_len = windows.size(1)
+        left = self.model.embed(windows[:, :2 * r])[:, :r]
+        right = self.model.embed(windows[:, seq_len - 1 - 2 * r:])[:, r:]
+        # New position t equals old position t + 1 for t in [r, seq_len - 2 - r]
+        middle = prev_embedded[:, r + 1:seq_len - r]
+        return torch.cat([left, middle, right], dim=1)
+
+    @torch.inference_mode()
+    def predict(self, keys: List[Hashable], windows: torch.Tensor) -> torch.Tensor:
+        """windows: (batch, sequence_length, input_dim) for the engines named by keys"""
+        batch, seq_len = windows.shape[:2]
+        if batch > self.max_entries:
+            raise ValueError(f"Batch of {batch} engines exceeds cache size {self.max_entries}")
+        known_slots = [self._slots.get(key, -1) for key in keys] if self._windows is not None \
+            and self._windows.shape[1:] == windows.shape[1:] else [-1] * batch
+        known_slots = torch.tensor(known_slots, dtype=torch.long)
+
+        known = torch.nonzero(known_slots >= 0).flatten()
+        unchanged = known.new_empty(0)
+        shifted = known.new_empty(0)
+        if len(known):
+            prev = self._windows[known_slots[known]]
+            current = windows[known]
+            same = (prev == current).flatten(1).all(dim=1)
+            unchanged = known[same]
+            if seq_len > 2 * self.halo + 1:
+                slid = (prev[:, 1:] == current[:, :-1]).flatten(1).all(dim=1) & ~same
+                shifted = known[slid]
+
+        is_full = torch.ones(batch, dtype=torch.bool)
+        is_full[unchanged] = False
+        is_full[shifted] = False
+        full = torch.nonzero(is_full).flatten()
+
+        # Rows that need the encoder; identical windows reuse the cached prediction outright
+        compute = torch.cat([full, shifted])
+        embedded = None
+        if len(full):
+            embedded = self.model.embed(windows[full])
+        if len(shifted):
+            out = self._shifted_embed(self._embedded[known_slots[shifted]], windows[shifted])
+            embedded = out if embedded is None else torch.cat([embedded, out])
+
+        self.stats["full"] += len(full)
+        self.stats["incremental"] += len(shifted)
+        self.stats["unchanged"] += len(unchanged)
+
+        predictions = windows.new_empty((batch, 1))
+        if len(compute):
+            predictions[compute] = self.model.encode(embedded)
+        if len(unchanged):
+            predictions[unchanged] = self._predictions[known_slots[unchanged]]
+
+        slots = self._assign_slots(keys, windows)
+        if len(compute):
+            self._windows[slots[compute]] = windows[compute]
+            self._embedded[slots[compute]] = embedded
+            self._predictions[slots[compute]] = predictions[compute]
+
+        return predictions
+
+
+def _stream(num_engines: int, num_cycles: int, seq_len: int, input_dim: int, seed: int = 0) -> torch.Tensor:
+    """(cycles, engines, seq_len, input_dim) windows sliding one row per cycle"""
+    generator = torch.Generator().manual_seed(seed)
+    history = torch.rand(num_engines, seq_len + num_cycles, input_dim, generator=generator)
+    return torch.stack([history[:, c + 1:c + 1 + seq_len] for c in range(num_cycles)])
+
+
+def benchmark(model: TransformerRUL, num_engines: int, num_cycles: int, seq_len: int = 50) -> Dict[str, float]:
+    model.eval()
+    stream = _stream(num_engines, num_cycles, seq_len, model.input_dim)
+    keys = list(range(num_engines))
+
+    with torch.inference_mode():
+        model(stream[0])
+        start = time.perf_counter()
+        reference = [model(windows) for windows in stream]
+        full_s = time.perf_counter() - start
+
+    encoder = IncrementalEncoder(model, max_entries=num_engines)
+    encoder.predict(keys, stream[0])  # prime the cache, as a streaming deployment would be
+    start = time.perf_counter()
+    incremental = [encoder.predict(keys, windows) for windows in stream[1:]]
+    incremental_s = time.perf_counter() - start
+
+    # Compare like with like: full recompute over the same cycles as the incremental pass
+    full_s *= (num_cycles - 1) / num_cycles
+    max_diff = max(float((a - b).abs().max()) for a, b in zip(reference[1:], incremental))
+
+    return {
+        "engines": num_engines,
+        "cycles": num_cycles - 1,
+        "full_ms_per_cycle": full_s / (num_cycles - 1) * 1000,
+        "incremental_ms_per_cycle": incremental_s / (num_cycles - 1) * 1000,
+        "speedup": full_s / incremental_s,
+        "max_abs_diff": max_diff,
+        **encoder.stats
+    }
+
+
+def main(argv=None):
+    from app.models.transformer_model import load_model
+
+    parser = argparse.ArgumentParser(description="Benchmark incremental vs full-window inference")
+    parser.add_argument("--model", default="models/transformer_rul_FD002.pt")
+    parser.add_argument("--engines", type=int, default=256)
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    model = load_model(args.model, torch.device("cpu"))
+    print(benchmark(model, args.engines, args.cycles))
+
+
+if __name__ == "__main__":
+    main()
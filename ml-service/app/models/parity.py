@@ -0,0 +1,115 @@
+"""Numerical parity of TransformerRUL against the original notebook formulation.
+
+    python -m app.models.parity --model models/transformer_rul_model_FD002.pth
+
+The reference below re-implements the original forward pass (separate q/k/v
+projections, explicit softmax attention, per-call sqrt) directly from the
+legacy state dict, so it stays independent of the optimized module code.
+"""
+import argparse
+import sys
+
+import torch
+import torch.nn.functional as F
+
+from app.models.transformer_model import load_model
+
+
+def _legacy_state_dict(model_path: str):
+    checkpoint = torch.load(model_path, map_location="cpu")
+    if isinstance(checkpoint, dict):
+        for key in ("model_state_dict", "state_dict"):
+            if key in checkpoint:
+                checkpoint = checkpoint[key]
+                break
+
+    state = dict(checkpoint)
+    # Artifacts written after the fused projection carry qkv instead of wq/wk/wv
+    for key in [k for k in state if k.endswith("mha.qkv.weight") or k.endswith("mha.qkv.bias")]:
+        prefix, suffix = key.rsplit("qkv.", 1)
+        for name, chunk in zip(("wq", "wk", "wv"), state.pop(key).chunk(3)):
+            state[f"{prefix}{name}.{suffix}"] = chunk
+    return state
+
+
+def reference_forward(state, x, num_heads=4, max_rul=125):
+    x = x.permute(0, 2, 1)
+    conv_out = F.conv1d(x, state["gcu.conv.weight"], state["gcu.conv.bias"], padding=1)
+    gate_out = torch.sigmoid(F.conv1d(x, state["gcu.gate.weight"], state["gcu.gate.bias"], padding=1))
+    x = (conv_out * gate_out).permute(0, 2, 1)
+    x = F.linear(x, state["linear_gcu.weight"], state["linear_gcu.bias"])
+
+    batch_size, seq_len, embed_dim = x.shape
+    head_dim = embed_dim // num_heads
+
+    position = torch.arange(1000).unsqueeze(1)
+    i = torch.arange(embed_dim).unsqueeze(0)
+    angle_rads = position * (1 / torch.pow(10000, (2 * (i // 2)) / torch.tensor(embed_dim, dtype=torch.float32)))
+    angle_rads[:, 0::2] = torch.sin(angle_rads[:, 0::2])
+    angle_rads[:, 1::2] = torch.cos(angle_rads[:, 1::2])
+    x = x + angle_rads.unsqueeze(0)[:, :seq_len, :]
+
+    layer = 0
+    while f"encoder_layers.{layer}.mha.wq.weight" in state:
+        p = f"encoder_layers.{layer}."
+
+        def heads(t):
+            return t.view(batch_size, -1, num_heads, head_dim).permute(0, 2, 1, 3)
+
+        q = heads(F.linear(x, state[p + "mha.wq.weight"], state[p + "mha.wq.bias"]))
+        k = heads(F.linear(x, state[p + "mha.wk.weight"], state[p + "mha.wk.bias"]))
+        v = heads(F.linear(x, state[p + "mha.wv.weight"], state[p + "mha.wv.bias"]))
+        logits = torch.matmul(q, k.permute(0, 1, 3, 2)) / torch.sqrt(torch.tensor(head_dim, dtype=torch.float32))
+        attn = torch.matmul(F.softmax(logits, dim=-1), v).permute(0, 2, 1, 3).contiguous().view(batch_size, -1, embed_dim)
+        attn = F.linear(attn, state[p + "mha.dense.weight"], state[p + "mha.dense.bias"])
+        out1 = F.layer_norm(x + attn, (embed_dim,), state[p + "layernorm1.weight"], state[p + "layernorm1.bias"])
+
+        ffn = F.linear(F.relu(F.linear(out1, state[p + "ffn.linear1.weight"], state[p + "ffn.linear1.bias"])),
+                       state[p + "ffn.linear2.weight"], state[p + "ffn.linear2.bias"])
+        x = F.layer_norm(out1 + ffn, (embed_dim,), state[p + "layernorm2.weight"], state[p + "layernorm2.bias"])
+        layer += 1
+
+    x = torch.mean(x, dim=1)
+    return torch.sigmoid(F.linear(x, state["regression_linear.weight"], state["regression_linear.bias"])) * max_rul
+
+
+def check_parity(model_path: str, batch_sizes=(1, 7, 256), atol: float = 1e-4, seed: int = 0) -> float:
+    """Largest absolute difference across batch sizes; raises AssertionError above atol"""
+    torch.manual_seed(seed)
+    model = load_model(model_path, torch.device("cpu"))
+    state = _legacy_state_dict(model_path)
+    num_heads = model.encoder_layers[0].mha.num_heads
+
+    worst = 0.0
+    with torch.no_grad():
+        for batch_size in batch_sizes:
+            # Scaled features live in [0, 1]; include some padded (all-zero) leading rows
+            x = torch.rand(batch_size, 50, model.input_dim)
+            x[: batch_size // 2, :10] = 0.0
+            expected = reference_forward(state, x, num_heads, model.max_rul)
+            actual = model(x)
+            diff = float((expected - actual).abs().max())
+            worst = max(worst, diff)
+            assert diff <= atol, f"batch {batch_size}: max abs diff {diff:.2e} exceeds {atol:.0e}"
+
+    # The buffer must follow the module across devices/dtypes
+    assert "pos_encoding" in dict(model.named_buffers())
+    return worst
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check TransformerRUL against the reference forward pass")
+    parser.add_argument("--model", default="models/transformer_rul_model_FD002.pth")
+    parser.add_argument("--atol", type=float, default=1e-4)
+    args = parser.parse_args(argv)
+
+    try:
+        worst = check_parity(args.model, atol=args.atol)
+    except AssertionError as e:
+        print(f"Parity FAILED: {e}")
+        sys.exit(1)
+    print(f"Parity OK: max abs diff {worst:.2e} (RUL units)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Distilled screening model and the student -> teacher cascade.
+
+``StudentRUL`` is a two-layer 1D convolution over the same scaled windows as
+TransformerRUL, trained by ``app.training.distill`` to reproduce the teacher's
+predictions. It has two heads: a RUL estimate and a standard deviation, fitted
+with a Gaussian likelihood, of how far the teacher is likely to be from that
+estimate. Inputs are standardized inside the model with per-feature
+statistics from the training rows. The scaled FD002 features span very
+different ranges (regime rows fall far outside the scaler's fit), which a
+network this small cannot absorb on its own.
+
+``Cascade`` screens a batch with the student and escalates to the full model
+only the rows whose status could flip: a student RUL within ``margin`` of a
+status boundary (50 critical, 100 warning), or a student std above
+``max_std``. Engines far from both boundaries keep the student's estimate.
+
+    python -m app.models.student --teacher models/transformer_rul_FD002.pt \
+        --student models/student_rul_FD002.pt --data data/test_FD002.txt --margin 5 10 15
+"""
+import argparse
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from app.models.artifact import scaler_from_params, scaler_to_params
+
+STUDENT_FORMAT = "student_rul_artifact"
+STUDENT_VERSION = 1
+
+# predict_rul's status thresholds: critical below the first, warning below the second
+STATUS_BOUNDARIES = (50.0, 100.0)
+
+
+def status_of(rul: np.ndarray) -> np.ndarray:
+    return np.where(rul < STATUS_BOUNDARIES[0], "critical", np.where(rul < STATUS_BOUNDARIES[1], "warning", "healthy"))
+
+
+class StudentRUL(nn.Module):
+
+    def __init__(self, input_dim: int = 16, channels: int = 32, kernel_size: int = 5, max_rul: int = 125):
+        super().__init__()
+        self.input_dim = input_dim
+        self.channels = channels
+        self.kernel_size = kernel_size
+        self.max_rul = max_rul
+        self.register_buffer("input_mean", torch.zeros(input_dim))
+        self.register_buffer("input_std", torch.ones(input_dim))
+        self.conv1 = nn.Conv1d(input_dim, channels, kernel_size, stride=2, padding=kernel_size // 2)
+        self.conv2 = nn.Conv1d(channels, channels, 3, stride=2, padding=1)
+        # Mean-pooled and last-step features -> (RUL, std)
+        self.head = nn.Linear(2 * channels, 2)
+
+    @property
+    def architecture(self) -> Dict[str, Any]:
+        return {"input_dim": self.input_dim, "channels": self.channels,
+                "kernel_size": self.kernel_size, "max_rul": self.max_rul}
+
+    def fit_normalization(self, rows: np.ndarray):
+        """Per-feature mean and std of the scaled training rows"""
+        std = rows.std(axis=0)
+        self.input_mean.copy_(torch.as_tensor(rows.mean(axis=0), dtype=torch.float32))
+        self.input_std.copy_(torch.as_tensor(np.where(std > 0, std, 1.0), dtype=torch.float32))
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """(batch, seq_len, features) -> (batch, 2): RUL and the std of the teacher around it"""
+        x = ((x - self.input_mean) / self.input_std).transpose(1, 2)
+        x = F.relu(self.conv2(F.relu(self.conv1(x))))
+        out = self.head(torch.cat([x.mean(dim=2), x[:, :, -1]], dim=1))
+        rul = torch.sigmoid(out[:, 0]) * self.max_rul
+        std = F.softplus(out[:, 1]) + 1e-3
+        return torch.stack([rul, std], dim=1)
+
+
+def save_student(path: str, model: StudentRUL, scaler, features: List[str], sequence_length: int,
+                 teacher: Dict[str, Any], metrics: Optional[Dict[str, Any]] = None):
+    """Same layout rules as save_artifact; ``teacher`` records which model it was distilled from"""
+    artifact = {
+        "format": STUDENT_FORMAT,
+        "version": STUDENT_VERSION,
+        "created_at": datetime.utcnow().isoformat(),
+        "architecture": model.architecture,
+        "features": list(features),
+        "sequence_length": int(sequence_length),
+        "rul_max": int(model.max_rul),
+        "scaler": scaler_to_params(scaler) if scaler is not None else None,
+        "teacher": dict(teacher),
+        "metrics": metrics or {},
+        "state_dict": {k: v.detach().cpu() for k, v in model.state_dict().items()}
+    }
+    tmp_path = f"{path}.tmp"
+    torch.save(artifact, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_student(path: str, device: torch.device) -> Dict[str, Any]:
+    artifact = torch.load(path, map_location="cpu", weights_only=True)
+    if not isinstance(artifact, dict) or artifact.get("format") != STUDENT_FORMAT:
+        raise ValueError(f"{path} is not a {STUDENT_FORMAT} file")
+    if artifact["version"] > STUDENT_VERSION:
+        raise ValueError(f"Student version {artifact['version']} is newer than supported version {STUDENT_VERSION}")
+
+    model = StudentRUL(**artifact["architecture"])
+    model.load_state_dict(artifact["state_dict"])
+    model.to(device)
+    model.eval()
+    scaler = artifact["scaler"]
+    return {
+        "model": model,
+        "scaler": scaler_from_params(scaler, artifact["features"]) if scaler is not None else None,
+        "features": artifact["features"],
+        "sequence_length": artifact["sequence_length"],
+        "rul_max": artifact["rul_max"],
+        "teacher": artifact["teacher"],
+        "metrics": artifact["metrics"],
+        "created_at": artifact["created_at"]
+    }
+
+
+class Cascade:
+    """Student for every row, the full model only where the student's status is in doubt"""
+
+    def __init__(self, student: StudentRUL, margin: float, max_std: float,
+                 device: Optional[torch.device] = None, chunk: int = 4096):
+        self.student = student
+        self.margin = margin
+        self.max_std = max_std
+        self.device = device or torch.device("cpu")
+        self.chunk = chunk
+        self._lock = threading.Lock()
+        self.screened = 0
+        self.escalated = 0
+
+    def screen(self, windows: np.ndarray) -> np.ndarray:
+        """(batch, 2) student RUL and std"""
+        out = []
+        with torch.inference_mode():
+            for i in range(0, len(windows), self.chunk):
+                tensor = torch.as_tensor(windows[i:i + self.chunk], dtype=torch.float32).to(self.device)
+                out.append(self.student(tensor).cpu().numpy())
+        return np.concatenate(out).astype(np.float64) if out else np.empty((0, 2))
+
+    def escalate(self, rul: np.ndarray, std: np.ndarray) -> np.ndarray:
+        near = np.abs(rul[:, None] - np.asarray(STATUS_BOUNDARIES)).min(axis=1) <= self.margin
+        return near | (std > self.max_std)
+
+    def predict(self, windows: np.ndarray, teacher: Callable[[np.ndarray], np.ndarray]) -> Dict[str, np.ndarray]:
+        """``teacher(rows)`` returns the full model's RUL for the given row indices of the batch"""
+        screened = self.screen(windows)
+        rul, std = screened[:, 0], screened[:, 1]
+        escalated = self.escalate(rul, std)
+        final = rul.copy()
+        rows = np.flatnonzero(escalated)
+        if len(rows):
+            final[rows] = teacher(rows)
+        with self._lock:
+            self.screened += len(rul)
+            self.escalated += len(rows)
+        return {"rul": final, "escalated": escalated, "student_rul": rul, "student_std": std}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "margin": self.margin,
+            "max_std": self.max_std,
+            "screened": self.screened,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / self.screened, 4) if self.screened else 0.0
+        }
+
+
+def evaluate(teacher_rul: np.ndarray, cascade_rul: np.ndarray, escalated: np.ndarray) -> Dict[str, float]:
+    """How closely the cascade reproduces the teacher"""
+    return {
+        "escalation_rate": float(escalated.mean()) if len(escalated) else 0.0,
+        "status_agreement": float((status_of(teacher_rul) == status_of(cascade_rul)).mean()),
+        "mean_abs_diff": float(np.abs(teacher_rul - cascade_rul).mean()),
+        "max_abs_diff": float(np.abs(teacher_rul - cascade_rul).max())
+    }
+
+
+def benchmark(teacher: nn.Module, student: StudentRUL, windows: np.ndarray, margins: Sequence[float],
+              max_std: float, repeats: int = 5) -> List[Dict[str, float]]:
+    """Teacher on every row vs. the cascade, on the same windows"""
+    tensor = torch.as_tensor(windows, dtype=torch.float32)
+
+    def full(rows=None):
+        with torch.inference_mode():
+            batch = tensor if rows is None else tensor[torch.as_tensor(rows)]
+            return teacher(batch).reshape(-1).numpy().astype(np.float64)
+
+    teacher_rul = full()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        full()
+    full_ms = (time.perf_counter() - start) / repeats * 1000
+
+    results = []
+    for margin in margins:
+        cascade = Cascade(student, margin=margin, max_std=max_std)
+        out = cascade.predict(windows, full)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            cascade.predict(windows, full)
+        cascade_ms = (time.perf_counter() - start) / repeats * 1000
+        results.append({
+            "engines": len(windows),
+            "margin": margin,
+            "max_std": max_std,
+            **evaluate(teacher_rul, out["rul"], out["escalated"]),
+            "student_only_agreement": float((status_of(teacher_rul) == status_of(out["student_rul"])).mean()),
+            "full_ms": full_ms,
+            "cascade_ms": cascade_ms,
+            "speedup": full_ms / cascade_ms
+        })
+    return results
+
+
+def main(argv=None):
+    from app.core.config import settings
+    from app.models.artifact import load_artifact
+    from app.preprocessing.data_processor import load_data, select_features
+    from app.preprocessing.pipeline import FeatureSpec, UnitFrame
+
+    parser = argparse.ArgumentParser(description="Measure escalation rate, agreement and speedup of the cascade")
+    parser.add_argument("--teacher", default="models/transformer_rul_FD002.pt")
+    parser.add_argument("--student", default="models/student_rul_FD002.pt")
+    parser.add_argument("--data", default="data/test_FD002.txt")
+    # Defaults are the serving configuration (CASCADE_MARGIN, CASCADE_MAX_STD)
+    parser.add_argument("--margin", type=float, nargs="+", default=[settings.CASCADE_MARGIN])
+    parser.add_argument("--max-std", type=float, default=settings.CASCADE_MAX_STD)
+    parser.add_argument("--all-cycles", action="store_true",
+                        help="Score a window ending at every cycle instead of each unit's latest")
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    artifact = load_artifact(args.teacher, torch.device("cpu"))
+    student = load_student(args.student, torch.device("cpu"))["model"]
+    spec = FeatureSpec.from_feature_names(artifact["features"], artifact["sequence_length"], artifact["rul_max"])
+    frame = UnitFrame(select_features(load_data(args.data)), spec)
+    pipeline = spec.compile(artifact["scaler"])
+    if args.all_cycles:
+        ends = np.concatenate([np.arange(s + 1, e + 1) for s, e in zip(frame.starts, frame.ends)])
+        starts = np.repeat(frame.starts, frame.counts)
+        windows = pipeline.windows(frame.features, ends, starts)
+    else:
+        windows = frame.last_windows(pipeline)
+    for result in benchmark(artifact["model"], student, windows, args.margin, args.max_std):
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import math
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -30,40 +31,54 @@ class MultiHeadAttention(nn.Module):
         self.num_heads = num_heads
         self.head_dim = embed_dim // num_heads
         assert self.head_dim * num_heads == self.embed_dim, "embed_dim must be divisible by num_heads"
+        self.scale = 1.0 / math.sqrt(self.head_dim)
 
-        self.wq = nn.Linear(embed_dim, embed_dim)
-        self.wk = nn.Linear(embed_dim, embed_dim)
-        self.wv = nn.Linear(embed_dim, embed_dim)
+        # q, k and v projections fused into one matmul
+        self.qkv = nn.Linear(embed_dim, 3 * embed_dim)
         self.dense = nn.Linear(embed_dim, embed_dim)
 
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        # Checkpoints from before the fused projection store wq/wk/wv separately
+        legacy = [f"{prefix}{name}" for name in ("wq", "wk", "wv")]
+        if all(f"{key}.weight" in state_dict for key in legacy):
+            state_dict[f"{prefix}qkv.weight"] = torch.cat([state_dict.pop(f"{key}.weight") for key in legacy])
+            state_dict[f"{prefix}qkv.bias"] = torch.cat([state_dict.pop(f"{key}.bias") for key in legacy])
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
+
     def split_heads(self, x, batch_size):
         x = x.view(batch_size, -1, self.num_heads, self.head_dim)
         return x.permute(0, 2, 1, 3) # (batch_size, num_heads, seq_len, head_dim)
 
-    def forward(self, q, k, v, mask=None):
+    def project(self, q, k, v):
+        if q is k and k is v:
+            return self.qkv(q).chunk(3, dim=-1)
+        w_q, w_k, w_v = self.qkv.weight.chunk(3)
+        b_q, b_k, b_v = self.qkv.bias.chunk(3)
+        return F.linear(q, w_q, b_q), F.linear(k, w_k, b_k), F.linear(v, w_v, b_v)
+
+    def forward(self, q, k, v, mask=None, need_weights=False):
         batch_size = q.size(0)
 
-        q = self.wq(q)
-        k = self.wk(k)
-        v = self.wv(v)
+        q, k, v = self.project(q, k, v)
 
         q = self.split_heads(q, batch_size)
         k = self.split_heads(k, batch_size)
         v = self.split_heads(v, batch_size)
 
-        # Scaled dot-product
-        matmul_qk = torch.matmul(q, k.permute(0, 1, 3, 2))
-        dk = torch.tensor(self.head_dim, dtype=torch.float32)
-        scaled_attention_logits = matmul_qk / torch.sqrt(dk)
+        attn_mask = mask * -1e9 if mask is not None else None
 
-        if mask is not None:
-            scaled_attention_logits += (mask * -1e9)
-
-        attention_weights = F.softmax(scaled_attention_logits, dim=-1)
-        output = torch.matmul(attention_weights, v)
+        if need_weights:
+            scaled_attention_logits = torch.matmul(q, k.transpose(-2, -1)) * self.scale
+            if attn_mask is not None:
+                scaled_attention_logits = scaled_attention_logits + attn_mask
+            attention_weights = F.softmax(scaled_attention_logits, dim=-1)
+            output = torch.matmul(attention_weights, v)
+        else:
+            # Scaled dot-product via the fused kernel; weights are not materialized
+            output = F.scaled_dot_product_attention(q, k, v, attn_mask=attn_mask, scale=self.scale)
+            attention_weights = None
 
-        output = output.permute(0, 2, 1, 3).contiguous()
-        output = output.view(batch_size, -1, self.embed_dim)
+        output = output.permute(0, 2, 1, 3).reshape(batch_size, -1, self.embed_dim)
 
         return self.dense(output), attention_weights
 
@@ -111,7 +126,8 @@ class TransformerRUL(nn.Module):
         self.gcu = GatedConvUnit(input_dim, embed_dim)
         self.linear_gcu = nn.Linear(embed_dim, embed_dim)
 
-        self.pos_encoding = self.positional_encoding(1000, embed_dim)
+        # Non-persistent so it follows model.to(device) without changing the checkpoint format
+        self.register_buffer("pos_encoding", self.positional_encoding(1000, embed_dim), persistent=False)
 
         # Encoder Layers
         self.encoder_layers = nn.ModuleList([
@@ -139,14 +155,16 @@ class TransformerRUL(nn.Module):
         angle_rates = 1 / torch.pow(10000, (2 * (i // 2)) / torch.tensor(d_model, dtype=torch.float32))
         return pos * angle_rates
 
-    def forward(self, x, mask=None):
-
+    def embed(self, x):
+        """Per-timestep local features; position t only depends on inputs t-1..t+1"""
         x = self.gcu(x) # (batch_size, sequence_length, embed_dim)
-        x = self.linear_gcu(x)
-        
+        return self.linear_gcu(x)
+
+    def encode(self, x, mask=None):
+        """Positional encoding, encoder stack and regression head over embedded timesteps"""
         # Add positional encoding
         seq_len = x.size(1)
-        x += self.pos_encoding[:, :seq_len, :].to(x.device)
+        x = x + self.pos_encoding[:, :seq_len, :]
 
         # Encoder Layers
         for encoder_layer in self.encoder_layers:
@@ -159,19 +177,27 @@ class TransformerRUL(nn.Module):
 
         return output
 
+    def forward(self, x, mask=None):
+        return self.encode(self.embed(x), mask)
+
 def load_model(model_path: str, device: torch.device) -> TransformerRUL:
     try:
-        model = TransformerRUL(
-            input_dim=16,     
-            embed_dim=64,     
-            num_layers=2,     
-            num_heads=4,      
-            dff=128,          
-            rate=0.1,         
-            max_rul=125       
-        )
-        
         checkpoint = torch.load(model_path, map_location=device)
+
+        # Versioned artifacts carry their own architecture config
+        architecture = checkpoint.get('architecture') if isinstance(checkpoint, dict) else None
+        if architecture is not None:
+            model = TransformerRUL(**architecture)
+        else:
+            model = TransformerRUL(
+                input_dim=16,     
+                embed_dim=64,     
+                num_layers=2,     
+                num_heads=4,      
+                dff=128,          
+                rate=0.1,         
+                max_rul=125       
+            )
         
         if isinstance(checkpoint, dict):
             if 'model_state_dict' in checkpoint:
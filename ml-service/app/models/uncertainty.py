@@ -0,0 +1,168 @@
+"""Monte Carlo dropout uncertainty in one batched forward.
+
+TransformerRUL's encoder layers carry dropout (rate 0.1). Keeping only those
+modules stochastic at inference and running T passes gives a predictive
+distribution per engine. Instead of T forward calls, the batch is replicated
+T times along the batch dimension and scored in a single call. The GCU
+embedding has no dropout, so it runs once on the original batch and only the
+encoder sees the replicated rows. The same embedding also feeds one eval-mode
+encoder pass, the deterministic point prediction that /predict reports; the
+samples describe the spread around it.
+
+T adapts to a latency budget: a running estimate of the cost per replicated
+row caps the number of samples so a request stays within ``budget_ms``.
+
+    python -m app.models.uncertainty --model models/transformer_rul_FD002.pt --engines 64 --samples 32
+"""
+import argparse
+import copy
+import itertools
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from app.models.transformer_model import TransformerRUL
+
+# RUL status bands used by /predict: critical < 50 <= warning < 100 <= healthy
+STATUS_BOUNDARIES = (50.0, 100.0)
+
+
+def mc_twin(model: TransformerRUL) -> TransformerRUL:
+    """A copy of ``model`` that shares its parameters and buffers but keeps dropout active.
+
+    The served model stays in eval mode, so deterministic requests running
+    concurrently on other worker threads are unaffected.
+    """
+    shared = {id(t): t for t in itertools.chain(model.parameters(), model.buffers())}
+    twin = copy.deepcopy(model, memo=shared)
+    twin.eval()
+    for module in twin.modules():
+        if isinstance(module, nn.Dropout):
+            module.train()
+    return twin
+
+
+class MCDropoutEstimator:
+    """Mean, std and empirical prediction intervals from batched MC dropout samples"""
+
+    def __init__(self, model: TransformerRUL, samples: int = 32, budget_ms: float = 0.0,
+                 min_samples: int = 8, interval: float = 0.9):
+        if not 0.0 < interval < 1.0:
+            raise ValueError(f"interval must be in (0, 1), got {interval}")
+        self.point_model = model
+        self.model = mc_twin(model)
+        self.max_rul = float(model.max_rul)
+        self.samples = max(2, samples)
+        self.budget_ms = budget_ms
+        self.min_samples = max(2, min(min_samples, self.samples))
+        self.interval = interval
+        # Smoothed forward cost per replicated row, learned from served requests
+        self._ms_per_row: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def samples_for(self, batch: int) -> int:
+        """Number of passes that fits the latency budget for ``batch`` engines"""
+        if self.budget_ms <= 0 or self._ms_per_row is None:
+            return self.samples
+        fit = int(self.budget_ms / (self._ms_per_row * batch))
+        return max(self.min_samples, min(self.samples, fit))
+
+    def _observe(self, rows: int, elapsed_ms: float):
+        per_row = elapsed_ms / rows
+        with self._lock:
+            self._ms_per_row = per_row if self._ms_per_row is None else 0.8 * self._ms_per_row + 0.2 * per_row
+
+    def sample(self, windows: torch.Tensor, samples: Optional[int] = None) -> Tuple[torch.Tensor, torch.Tensor]:
+        """(samples, batch) RUL draws and the (batch,) deterministic prediction for a (batch, seq_len, features) tensor"""
+        batch = windows.size(0)
+        samples = samples or self.samples_for(batch)
+        start = time.perf_counter()
+        with torch.no_grad():
+            embedded = self.model.embed(windows)
+            draws = self.model.encode(embedded.repeat(samples, 1, 1))
+            point = self.point_model.encode(embedded)
+        self._observe(samples * batch, (time.perf_counter() - start) * 1000)
+        return draws.view(samples, batch), point.view(batch)
+
+    def summarize(self, draws: torch.Tensor, point: torch.Tensor) -> Dict[str, np.ndarray]:
+        """Per-engine point, MC mean, std, interval bounds and status agreement of (samples, batch) draws"""
+        draws = draws.clamp(0.0, self.max_rul).double().numpy()
+        point = point.clamp(0.0, self.max_rul).double().numpy()
+        tail = (1.0 - self.interval) / 2
+        lower, upper = np.quantile(draws, [tail, 1.0 - tail], axis=0)
+
+        # Confidence: share of draws that fall in the same status band as the point prediction
+        bands = np.searchsorted(STATUS_BOUNDARIES, draws, side="right")
+        agreement = (bands == np.searchsorted(STATUS_BOUNDARIES, point, side="right")).mean(axis=0)
+
+        return {
+            "point": point,
+            "mean": draws.mean(axis=0),
+            "std": draws.std(axis=0, ddof=1),
+            "lower": lower,
+            "upper": upper,
+            "confidence": agreement,
+            "samples": np.full(draws.shape[1], draws.shape[0])
+        }
+
+    def predict(self, windows: torch.Tensor, samples: Optional[int] = None) -> Dict[str, np.ndarray]:
+        return self.summarize(*self.sample(windows, samples))
+
+
+def benchmark(model: TransformerRUL, num_engines: int, samples: int, seq_len: int = 50) -> Dict[str, float]:
+    model.eval()
+    windows = torch.rand(num_engines, seq_len, model.input_dim, generator=torch.Generator().manual_seed(0))
+    estimator = MCDropoutEstimator(model, samples=samples)
+
+    with torch.inference_mode():
+        model(windows)
+        estimator.predict(windows)  # warm-up at the replicated shape
+        start = time.perf_counter()
+        model(windows)
+        single_s = time.perf_counter() - start
+
+        twin = estimator.model
+        start = time.perf_counter()
+        looped = torch.stack([twin(windows).view(-1) for _ in range(samples)])
+        looped_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = estimator.predict(windows)
+        batched_s = time.perf_counter() - start
+
+    return {
+        "engines": num_engines,
+        "samples": samples,
+        "deterministic_ms": single_s * 1000,
+        "looped_ms": looped_s * 1000,
+        "batched_ms": batched_s * 1000,
+        "speedup_vs_looped": looped_s / batched_s,
+        "overhead_vs_deterministic": batched_s / single_s,
+        "mean_std": float(result["std"].mean()),
+        "looped_mean_std": float(looped.std(dim=0).mean()),
+        "mean_interval_width": float((result["upper"] - result["lower"]).mean())
+    }
+
+
+def main(argv=None):
+    from app.models.transformer_model import load_model
+
+    parser = argparse.ArgumentParser(description="Benchmark batched MC dropout against looped passes")
+    parser.add_argument("--model", default="models/transformer_rul_FD002.pt")
+    parser.add_argument("--engines", type=int, default=64)
+    parser.add_argument("--samples", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    model = load_model(args.model, torch.device("cpu"))
+    print(benchmark(model, args.engines, args.samples))
+
+
+if __name__ == "__main__":
+    main()
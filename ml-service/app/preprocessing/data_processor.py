@@ -3,21 +3,31 @@ import pandas as pd
 from typing import Dict, List, Any, Optional, Tuple
 import structlog
 from sklearn.preprocessing import MinMaxScaler
+
+from app.preprocessing.pipeline import FD002_SPEC, CMAPSS_COLUMNS, FeatureSpec, UnitFrame
 logger = structlog.get_logger()
 
 
-SELECTED_SENSORS = [2, 3, 4, 7, 8, 9, 11, 12, 13, 14, 15, 17, 20, 21]  # 14 sensors
-SELECTED_SETTINGS = [1, 2]
-SEQUENCE_LENGTH = 50
-RUL_MAX = 125
+# Derived from FD002_SPEC, the single definition of the model's inputs
+SELECTED_SENSORS = list(FD002_SPEC.sensors)  # 14 sensors
+SELECTED_SETTINGS = list(FD002_SPEC.settings)
+SEQUENCE_LENGTH = FD002_SPEC.sequence_length
+RUL_MAX = FD002_SPEC.rul_max
 
 def load_data(file_path):
     """Load data - EXACT match to your notebook"""
-    df = pd.read_csv(file_path, sep=r'\s+', header=None)
-    df = df.iloc[:, :26] # Select only the first 26 columns
-
-    df.columns = ["unit_number", "time_in_cycles", "op_setting_1", "op_setting_2", "op_setting_3"] + \
-                 [f"sensor_measurement_{i}" for i in range(1, 22)]
+    # NASA files are single-space separated with trailing blanks; splitting on ' ' is much
+    # cheaper than the regex separator. Irregular spacing shows up as NaNs, and other separators
+    # (tabs) as too few columns, so fall back to the regex parser then.
+    try:
+        df = pd.read_csv(file_path, sep=' ', header=None, usecols=range(26))
+    except (ValueError, pd.errors.ParserError):
+        df = None
+    if df is None or df.isna().values.any():
+        df = pd.read_csv(file_path, sep=r'\s+', header=None)
+        df = df.iloc[:, :26] # Select only the first 26 columns
+
+    df.columns = CMAPSS_COLUMNS
     return df
 
 def calculate_rul(df):
@@ -34,10 +44,8 @@ def calculate_rul(df):
     return df
 
 def select_features(df):
-    drop_sensors = [f'sensor_measurement_{i}' for i in [1, 5, 6, 10, 16, 18, 19]]
-    drop_settings = ['op_setting_3']
-    
-    features_to_keep = [col for col in df.columns if col not in drop_sensors + drop_settings]
+    dropped = set(FD002_SPEC.dropped_columns)
+    features_to_keep = [col for col in df.columns if col not in dropped]
     return df[features_to_keep]
 
 def create_sequences(df, sequence_length, sensor_cols, op_setting_cols):
@@ -54,6 +62,12 @@ def create_sequences(df, sequence_length, sensor_cols, op_setting_cols):
             
     return np.array(X), np.array(y)
 
+def create_last_sequences(df, sequence_length, feature_cols, scaler=None):
+    """Last window of every unit in one gather, zero-padded at the front like preprocess_fd002_sequence"""
+    spec = FeatureSpec.from_feature_names(feature_cols, sequence_length, RUL_MAX)
+    frame = UnitFrame(df, spec)
+    return frame.units, frame.last_cycles, frame.last_windows(spec.compile(scaler))
+
 def preprocess_for_model(sensor_data: Dict[str, Any], scaler=None) -> np.ndarray:
     try:
         # Convert sensor data to the expected format
@@ -85,28 +99,15 @@ def preprocess_for_model(sensor_data: Dict[str, Any], scaler=None) -> np.ndarray
         if len(settings) < 3:
             settings.extend([0.0] * (3 - len(settings)))
         
-        selected_features = []
-        
-        for sensor_idx in SELECTED_SENSORS:
-            if sensor_idx <= len(sensors):
-                selected_features.append(sensors[sensor_idx - 1]) 
-            else:
-                selected_features.append(0.0)
-        
-        for setting_idx in SELECTED_SETTINGS:
-            if setting_idx <= len(settings):
-                selected_features.append(settings[setting_idx - 1])
-            else:
-                selected_features.append(0.0)
-        
-        features = np.array(selected_features, dtype=np.float32)
-        
-        if scaler is not None:
-            features = scaler.transform(features.reshape(1, -1)).flatten()
+        # Raw C-MAPSS row layout (unit and cycle unused), then one compiled gather + scale
+        raw = np.zeros(len(CMAPSS_COLUMNS))
+        raw[2:5] = settings[:3]
+        raw[5:26] = sensors[:21]
+        features = FD002_SPEC.compile(scaler).row(raw)
         
         sequence = np.tile(features, (SEQUENCE_LENGTH, 1))
         
-        logger.debug(f"Preprocessed data shape: {sequence.shape}, features: {len(selected_features)}")
+        logger.debug(f"Preprocessed data shape: {sequence.shape}, features: {len(features)}")
         
         return sequence
         
@@ -118,25 +119,11 @@ def preprocess_fd002_sequence(engine_data: pd.DataFrame, scaler=None) -> np.ndar
 
     try:
 
-        engine_data = engine_data.sort_values('time_in_cycles')
-        
-        sensor_cols = [f'sensor_measurement_{i}' for i in SELECTED_SENSORS]
-        op_setting_cols = [f'op_setting_{i}' for i in SELECTED_SETTINGS]
-        all_feature_cols = sensor_cols + op_setting_cols
+        pipeline = FD002_SPEC.compile(scaler)
         
-        # Extract features
-        features = engine_data[all_feature_cols].values.astype(np.float32)
-        
-        if scaler is not None:
-            features = scaler.transform(features)
-        
-        if len(features) >= SEQUENCE_LENGTH:
-            sequence = features[-SEQUENCE_LENGTH:]
-        else:
-            # Pad with zeros if not enough data 
-            padded_sequence = np.zeros((SEQUENCE_LENGTH, len(all_feature_cols)))
-            padded_sequence[-len(features):] = features
-            sequence = padded_sequence
+        # Only the last SEQUENCE_LENGTH cycles are gathered; shorter histories are zero-padded
+        order = np.argsort(engine_data['time_in_cycles'].to_numpy(), kind='stable')[-SEQUENCE_LENGTH:]
+        sequence = pipeline.window(engine_data.to_numpy()[order], pipeline.index_for(engine_data.columns))
         
         logger.debug(f"FD002 sequence shape: {sequence.shape}")
         
@@ -148,8 +135,8 @@ def preprocess_fd002_sequence(engine_data: pd.DataFrame, scaler=None) -> np.ndar
 
 def preprocess_dataset_exact(dataset_id, sequence_length=50, rul_max=125):
 
-    sensor_cols = [f"sensor_measurement_{i}" for i in range(1, 22) if i not in [1, 5, 6, 10, 16, 18, 19]]
-    op_setting_cols = ["op_setting_1", "op_setting_2"]
+    sensor_cols = [f"sensor_measurement_{i}" for i in FD002_SPEC.sensors]
+    op_setting_cols = [f"op_setting_{i}" for i in FD002_SPEC.settings]
     all_feature_cols = sensor_cols + op_setting_cols
 
     train_file_path = f"/kaggle/input/nasa-cmaps/cmaps/CMaps/train_{dataset_id}.txt"
@@ -249,21 +236,21 @@ def validate_preprocessing(features: np.ndarray) -> bool:
 
 def get_feature_names():
     """Get the exact feature names used in your model"""
-    sensor_names = [f'sensor_measurement_{i}' for i in SELECTED_SENSORS]
-    setting_names = [f'op_setting_{i}' for i in SELECTED_SETTINGS]
-    return sensor_names + setting_names
-
-def print_preprocessing_info():
-    """Print preprocessing information for debugging"""
-    print("Preprocessing Configuration (EXACT match to notebook):")
-    print(f"Selected sensors: {SELECTED_SENSORS} (14 sensors)")
-    print(f"Selected settings: {SELECTED_SETTINGS} (2 settings)")
-    print(f"Total features: {len(SELECTED_SENSORS) + len(SELECTED_SETTINGS)} (16)")
-    print(f"Sequence length: {SEQUENCE_LENGTH}")
-    print(f"RUL max: {RUL_MAX}")
-    print(f"Dropped sensors: [1, 5, 6, 10, 16, 18, 19]")
-    print(f"Dropped settings: [3]")
-    print(f"Feature names: {get_feature_names()}")
+    return FD002_SPEC.feature_names
+
+def log_preprocessing_info():
+    """Log the preprocessing configuration (EXACT match to notebook)"""
+    logger.info(
+        "Preprocessing configuration",
+        selected_sensors=SELECTED_SENSORS,
+        selected_settings=SELECTED_SETTINGS,
+        total_features=len(SELECTED_SENSORS) + len(SELECTED_SETTINGS),
+        sequence_length=SEQUENCE_LENGTH,
+        rul_max=RUL_MAX,
+        dropped_sensors=FD002_SPEC.dropped_sensors,
+        dropped_settings=FD002_SPEC.dropped_settings,
+        feature_names=get_feature_names()
+    )
 
 preprocess_sensor_data = preprocess_for_model
 
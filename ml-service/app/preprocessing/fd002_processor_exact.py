@@ -7,6 +7,8 @@ from typing import Dict, List, Tuple, Optional
 import logging
 from sklearn.preprocessing import MinMaxScaler
 
+from app.preprocessing.pipeline import FD002_SPEC, CMAPSS_COLUMNS
+
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,15 +24,15 @@ class FD002DataProcessorExact:
         self.data = None
         self.engine_data = {}
 
-        self.all_columns = ["unit_number", "time_in_cycles", "op_setting_1", "op_setting_2", "op_setting_3"] + \
-                          [f"sensor_measurement_{i}" for i in range(1, 22)]
-        
+        # Raw zeros are scaled along with the history, matching how this path was trained
+        self.spec = FD002_SPEC.replace(sequence_length=sequence_length, rul_max=rul_max, padding="zero_raw")
+        self.all_columns = CMAPSS_COLUMNS
 
-        self.drop_sensors = [f'sensor_measurement_{i}' for i in [1, 5, 6, 10, 16, 18, 19]]
-        self.drop_settings = ['op_setting_3']
+        self.drop_sensors = [f'sensor_measurement_{i}' for i in self.spec.dropped_sensors]
+        self.drop_settings = [f'op_setting_{i}' for i in self.spec.dropped_settings]
 
-        self.sensor_cols = [f"sensor_measurement_{i}" for i in range(1, 22) if i not in [1, 5, 6, 10, 16, 18, 19]]
-        self.op_setting_cols = ["op_setting_1", "op_setting_2"]
+        self.sensor_cols = [f"sensor_measurement_{i}" for i in self.spec.sensors]
+        self.op_setting_cols = [f"op_setting_{i}" for i in self.spec.settings]
         self.all_feature_cols = self.sensor_cols + self.op_setting_cols
         
         logger.info(f"Using {len(self.sensor_cols)} sensors: {self.sensor_cols}")
@@ -96,7 +98,7 @@ class FD002DataProcessorExact:
             logger.warning(f"Engine {unit_number} not found in dataset")
             return None
         
-        engine_data = self.engine_data[unit_number].copy()
+        engine_data = self.engine_data[unit_number]
         
         if up_to_cycle is not None:
             engine_data = engine_data[engine_data['time_in_cycles'] <= up_to_cycle]
@@ -105,21 +107,13 @@ class FD002DataProcessorExact:
             logger.warning(f"No data found for engine {unit_number} up to cycle {up_to_cycle}")
             return None
         
-        if len(engine_data) >= self.sequence_length:
-            sequence_data = engine_data[self.all_feature_cols].iloc[-self.sequence_length:].values
-        else:
-            padded_sequence = np.zeros((self.sequence_length, len(self.all_feature_cols)))
-            padded_sequence[-len(engine_data):] = engine_data[self.all_feature_cols].values
-            sequence_data = padded_sequence
-        
-        if self.scaler is not None:
-            try:
-                sequence_data = self.scaler.transform(sequence_data)
-            except Exception as e:
-                logger.error(f"Error applying scaler: {e}")
-                return None
-        
-        return sequence_data
+        try:
+            pipeline = self.spec.compile(self.scaler)
+            values = engine_data[self.all_feature_cols].to_numpy()[-self.sequence_length:]
+            return pipeline.window(values)
+        except Exception as e:
+            logger.error(f"Error applying scaler: {e}")
+            return None
     
     def get_engine_list(self) -> List[Dict]:
         engines = []
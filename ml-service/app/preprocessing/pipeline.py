@@ -0,0 +1,285 @@
+"""Declarative feature pipeline for C-MAPSS model inputs.
+
+A ``FeatureSpec`` says which sensors and operating settings feed the model, the
+window length, and how short histories are padded. ``spec.compile(scaler)``
+resolves it once into an index array and per-feature scale/offset vectors.
+After that, turning raw rows into model input is one fancy-index gather, one
+in-place multiply-add and (for short histories) a zero fill. This works for a
+single row, one window, or a batch of windows, with no DataFrame filtering per
+request.
+
+Every preprocessing path (data_processor, fd002_processor_exact, the service
+endpoints, training and batch scoring) derives its feature list from here.
+"""
+import dataclasses
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CMAPSS_COLUMNS = ["unit_number", "time_in_cycles", "op_setting_1", "op_setting_2", "op_setting_3"] + \
+                 [f"sensor_measurement_{i}" for i in range(1, 22)]
+NUM_SENSORS = 21
+NUM_SETTINGS = 3
+
+PADDING_POLICIES = ("zero_scaled", "zero_raw")
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    sensors: Tuple[int, ...]
+    settings: Tuple[int, ...]
+    sequence_length: int = 50
+    rul_max: int = 125
+    # zero_scaled: front-pad short histories with zeros in model (scaled) space, as served
+    # zero_raw: pad with raw zeros and scale them too, as fd002_processor_exact does
+    padding: str = "zero_scaled"
+
+    def __post_init__(self):
+        if self.padding not in PADDING_POLICIES:
+            raise ValueError(f"Unknown padding policy {self.padding!r}, expected one of {PADDING_POLICIES}")
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [f"sensor_measurement_{i}" for i in self.sensors] + [f"op_setting_{i}" for i in self.settings]
+
+    @property
+    def num_features(self) -> int:
+        return len(self.sensors) + len(self.settings)
+
+    @property
+    def dropped_sensors(self) -> List[int]:
+        return [i for i in range(1, NUM_SENSORS + 1) if i not in self.sensors]
+
+    @property
+    def dropped_settings(self) -> List[int]:
+        return [i for i in range(1, NUM_SETTINGS + 1) if i not in self.settings]
+
+    @property
+    def dropped_columns(self) -> List[str]:
+        return [f"sensor_measurement_{i}" for i in self.dropped_sensors] + \
+               [f"op_setting_{i}" for i in self.dropped_settings]
+
+    @property
+    def raw_index(self) -> np.ndarray:
+        """Feature positions within a raw 26-column C-MAPSS row"""
+        return np.array([CMAPSS_COLUMNS.index(name) for name in self.feature_names], dtype=np.intp)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "selected_sensors": list(self.sensors),
+            "selected_settings": list(self.settings),
+            "total_features": self.num_features,
+            "dropped_sensors": self.dropped_sensors,
+            "dropped_settings": self.dropped_settings,
+            "feature_names": self.feature_names,
+            "sequence_length": self.sequence_length,
+            "rul_max": self.rul_max,
+            "padding": self.padding
+        }
+
+    @classmethod
+    def from_feature_names(cls, names: Sequence[str], sequence_length: int, rul_max: int,
+                           padding: str = "zero_scaled") -> "FeatureSpec":
+        """Spec for an artifact's stored feature list (sensors first, then settings)"""
+        spec = cls(
+            sensors=tuple(int(n.rsplit("_", 1)[1]) for n in names if n.startswith("sensor_measurement_")),
+            settings=tuple(int(n.rsplit("_", 1)[1]) for n in names if n.startswith("op_setting_")),
+            sequence_length=int(sequence_length),
+            rul_max=int(rul_max),
+            padding=padding
+        )
+        if spec.feature_names != list(names):
+            raise ValueError(f"Feature list {list(names)} is not in sensors-then-settings order")
+        return spec
+
+    def replace(self, **changes) -> "FeatureSpec":
+        return dataclasses.replace(self, **changes)
+
+    def compile(self, scaler=None) -> "CompiledPipeline":
+        """Compiled pipeline for this spec and scaler, cached per scaler object"""
+        if scaler is None:
+            cached = _unscaled.get(self)
+            if cached is None:
+                cached = _unscaled[self] = CompiledPipeline(self, None)
+            return cached
+
+        per_scaler = _compiled.setdefault(scaler, {})
+        cached = per_scaler.get(self)
+        if cached is None:
+            cached = per_scaler[self] = CompiledPipeline(self, scaler)
+        return cached
+
+
+_compiled: "weakref.WeakKeyDictionary[Any, Dict[FeatureSpec, CompiledPipeline]]" = weakref.WeakKeyDictionary()
+_unscaled: Dict[FeatureSpec, "CompiledPipeline"] = {}
+
+
+def _affine_params(scaler, feature_names: List[str]):
+    """(scale, offset, clip_range) equivalent to scaler.transform, or None if it is not affine"""
+    if scaler is None or not (hasattr(scaler, "scale_") and hasattr(scaler, "min_")):
+        return None
+
+    scale = np.asarray(scaler.scale_, dtype=np.float64)
+    offset = np.asarray(scaler.min_, dtype=np.float64)
+    fitted_names = getattr(scaler, "feature_names_in_", None)
+    if fitted_names is not None:
+        lookup = {str(name): i for i, name in enumerate(fitted_names)}
+        missing = [name for name in feature_names if name not in lookup]
+        if missing:
+            raise ValueError(f"Scaler was not fitted on features {missing}")
+        order = np.array([lookup[name] for name in feature_names], dtype=np.intp)
+        scale, offset = scale[order], offset[order]
+    elif len(scale) != len(feature_names):
+        raise ValueError(f"Scaler has {len(scale)} features, spec has {len(feature_names)}")
+
+    clip = tuple(scaler.feature_range) if getattr(scaler, "clip", False) else None
+    return scale, offset, clip
+
+
+class CompiledPipeline:
+    """Gather-scale-pad for one spec and scaler.
+
+    Inputs are 2-D arrays of rows sorted by cycle. ``index`` selects the
+    feature columns from them: ``raw_index`` for raw 26-column rows,
+    ``index_for(df.columns)`` for a DataFrame layout, or None when the rows
+    already hold exactly the spec's features in order.
+    """
+
+    def __init__(self, spec: FeatureSpec, scaler=None):
+        self.spec = spec
+        self.feature_names = spec.feature_names
+        self.raw_index = spec.raw_index
+        self.sequence_length = spec.sequence_length
+        self.scaler = scaler
+        self._affine = _affine_params(scaler, self.feature_names)
+        # Scalers without MinMax-style scale_/min_ go through transform()
+        self._scaler = scaler if self._affine is None else None
+        self._layouts: Dict[Tuple[str, ...], np.ndarray] = {}
+
+    def same_scaling(self, other: "CompiledPipeline") -> bool:
+        """True if both pipelines produce identical features from the same rows"""
+        if self.spec != other.spec:
+            return False
+        if self._affine is None or other._affine is None:
+            return self.scaler is other.scaler
+        return all(np.array_equal(a, b) for a, b in zip(self._affine[:2], other._affine[:2])) \
+            and self._affine[2] == other._affine[2]
+
+    def index_for(self, columns: Sequence[str]) -> np.ndarray:
+        key = tuple(columns)
+        index = self._layouts.get(key)
+        if index is None:
+            lookup = {name: i for i, name in enumerate(key)}
+            index = self._layouts[key] = np.array([lookup[name] for name in self.feature_names], dtype=np.intp)
+        return index
+
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        """Scale a float32 (..., features) array in place; same arithmetic as MinMaxScaler.transform"""
+        if self._affine is not None:
+            scale, offset, clip = self._affine
+            X *= scale
+            X += offset
+            if clip is not None:
+                np.clip(X, clip[0], clip[1], out=X)
+        elif self._scaler is not None:
+            shape = X.shape
+            X = self._scaler.transform(X.reshape(-1, shape[-1])).astype(np.float32).reshape(shape)
+        return X
+
+    def _gather(self, values: np.ndarray, rows: np.ndarray, index: Optional[np.ndarray]) -> np.ndarray:
+        # Fancy indexing always copies, so the result is safe to scale in place
+        values = np.asarray(values)
+        out = values[rows] if index is None else values[rows[..., None], index]
+        return out.astype(np.float32, copy=False)
+
+    def rows(self, values: np.ndarray, index: Optional[np.ndarray] = None) -> np.ndarray:
+        """(n, features) scaled features for every row"""
+        return self._scale(self._gather(values, np.arange(len(values)), index))
+
+    def row(self, raw: np.ndarray) -> np.ndarray:
+        """(features,) scaled features of one raw 26-column row"""
+        return self._scale(np.asarray(raw, dtype=np.float64)[self.raw_index].astype(np.float32))
+
+    def window(self, values: np.ndarray, index: Optional[np.ndarray] = None) -> np.ndarray:
+        """(sequence_length, features) model input from the last rows of one unit's history"""
+        n = len(values)
+        return self.windows(values, np.array([n]), np.array([0]), index)[0]
+
+    def windows(self, values: np.ndarray, ends: np.ndarray, starts: np.ndarray,
+                index: Optional[np.ndarray] = None) -> np.ndarray:
+        """(batch, sequence_length, features): the window ending before row ends[i] of each
+        unit, whose history starts at row starts[i]; earlier positions are padded."""
+        L = self.sequence_length
+        ends = np.asarray(ends, dtype=np.intp)
+        starts = np.asarray(starts, dtype=np.intp)
+        rows = ends[:, None] - L + np.arange(L, dtype=np.intp)[None, :]
+        pad = rows < starts[:, None]
+        X = self._gather(values, np.where(pad, 0, rows), index)
+
+        has_pad = pad.any()
+        if self.spec.padding == "zero_raw" and has_pad:
+            X[pad] = 0.0
+        X = self._scale(X)
+        if self.spec.padding == "zero_scaled" and has_pad:
+            X[pad] = 0.0
+        return X
+
+
+class UnitFrame:
+    """A fleet's rows sorted by (unit, cycle), with the spec's raw features gathered once.
+
+    Window lookups then slice one contiguous block instead of boolean-masking
+    the DataFrame per request.
+    """
+
+    def __init__(self, df: "pd.DataFrame", spec: FeatureSpec):
+        self.source = df
+        self.feature_names = spec.feature_names
+        units = df["unit_number"].to_numpy()
+        cycles = df["time_in_cycles"].to_numpy()
+        order = np.lexsort((cycles, units))
+        index = spec.compile().index_for(df.columns)
+
+        self.features = df.to_numpy(dtype=np.float32)[order[:, None], index]
+        self.cycles = cycles[order]
+        self.units, self.starts, counts = np.unique(units[order], return_index=True, return_counts=True)
+        self.ends = self.starts + counts
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self.ends - self.starts
+
+    @property
+    def last_cycles(self) -> np.ndarray:
+        return self.cycles[self.ends - 1]
+
+    def locate(self, unit_number: int) -> Optional[Tuple[int, int]]:
+        """(start, end) rows of a unit, or None if it is not in the frame"""
+        pos = int(np.searchsorted(self.units, unit_number))
+        if pos == len(self.units) or self.units[pos] != unit_number:
+            return None
+        return int(self.starts[pos]), int(self.ends[pos])
+
+    def unit_rows(self, unit_number: int) -> Optional[np.ndarray]:
+        span = self.locate(unit_number)
+        return None if span is None else self.features[span[0]:span[1]]
+
+    def last_windows(self, pipeline: CompiledPipeline) -> np.ndarray:
+        """(units, sequence_length, features) latest window of every unit"""
+        return pipeline.windows(self.features, self.ends, self.starts)
+
+
+FD002_SPEC = FeatureSpec(
+    sensors=(2, 3, 4, 7, 8, 9, 11, 12, 13, 14, 15, 17, 20, 21),
+    settings=(1, 2),
+    sequence_length=50,
+    rul_max=125
+)
@@ -0,0 +1,185 @@
+"""Offline fleet scoring over C-MAPSS test files.
+
+Files are read ``--chunk-rows`` rows at a time and scored one block of whole
+units at a time, so memory stays bounded by the chunk size rather than the
+file. C-MAPSS files list each unit's cycles contiguously. A unit split across
+chunks is held back and joined with the next one.
+
+The model is a versioned artifact (features, window and scaler included); a
+legacy state dict is still accepted together with ``--scaler``.
+
+    python -m app.scoring.batch_scorer data/test_FD002.txt -o predictions.csv
+    python -m app.scoring.batch_scorer data/ -o predictions.parquet --batch-size 4096 --threads 8
+"""
+import argparse
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import structlog
+import torch
+
+from app.models.artifact import is_artifact, load_artifact
+from app.models.transformer_model import load_model, load_scaler
+from app.preprocessing.pipeline import CMAPSS_COLUMNS, FD002_SPEC, CompiledPipeline, FeatureSpec, UnitFrame
+from app.scoring.metrics import rmse, nasa_score
+
+logger = structlog.get_logger()
+
+TEST_FILE_PATTERN = re.compile(r"test_(FD\d{3})\.txt$")
+
+
+def find_test_files(input_path: str) -> List[Path]:
+    path = Path(input_path)
+    if path.is_dir():
+        files = sorted(p for p in path.iterdir() if TEST_FILE_PATTERN.search(p.name))
+    else:
+        files = [path]
+
+    if not files:
+        raise FileNotFoundError(f"No test_FDxxx.txt files found in {input_path}")
+    return files
+
+
+def load_true_rul(test_file: Path, rul_max: int, rul_dir: Optional[str] = None) -> Optional[np.ndarray]:
+    match = TEST_FILE_PATTERN.search(test_file.name)
+    if match is None:
+        return None
+
+    rul_path = Path(rul_dir or test_file.parent) / f"RUL_{match.group(1)}.txt"
+    if not rul_path.exists():
+        return None
+
+    y_true = pd.read_csv(rul_path, sep=r'\s+', header=None).iloc[:, 0].values
+    return np.minimum(y_true, rul_max)
+
+
+def iter_unit_blocks(test_file: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """The file's rows in blocks of whole units, reading ``chunk_rows`` rows at a time"""
+    carry = None
+    reader = pd.read_csv(test_file, sep=r'\s+', header=None, usecols=range(len(CMAPSS_COLUMNS)),
+                         names=CMAPSS_COLUMNS, chunksize=chunk_rows)
+    for chunk in reader:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        # The last unit may continue in the next chunk
+        open_unit = chunk["unit_number"].to_numpy() == chunk["unit_number"].iat[-1]
+        carry = chunk[open_unit]
+        if not open_unit.all():
+            yield chunk[~open_unit]
+    if carry is not None:
+        yield carry
+
+
+def predict_batches(model, X: np.ndarray, device: torch.device, batch_size: int, rul_max: int) -> np.ndarray:
+    predictions = np.empty(len(X), dtype=np.float32)
+    with torch.inference_mode():
+        for start in range(0, len(X), batch_size):
+            batch = torch.from_numpy(X[start:start + batch_size]).to(device)
+            predictions[start:start + batch_size] = model(batch).squeeze(-1).cpu().numpy()
+    return np.clip(predictions, 0, rul_max)
+
+
+def score_file(test_file: Path, model, pipeline: CompiledPipeline, device: torch.device, batch_size: int,
+               chunk_rows: int, rul_dir: Optional[str] = None) -> Dict:
+    spec = pipeline.spec
+    units, last_cycles, predictions = [], [], []
+    records, preprocess_s, inference_s = 0, 0.0, 0.0
+
+    start = time.perf_counter()
+    for block in iter_unit_blocks(test_file, chunk_rows):
+        frame = UnitFrame(block, spec)
+        X = frame.last_windows(pipeline)
+        prepared = time.perf_counter()
+        predictions.append(predict_batches(model, X, device, batch_size, spec.rul_max))
+        finished = time.perf_counter()
+
+        units.append(frame.units)
+        last_cycles.append(frame.last_cycles)
+        records += len(block)
+        preprocess_s += prepared - start
+        inference_s += finished - prepared
+        start = time.perf_counter()
+
+    units = np.concatenate(units) if units else np.empty(0, dtype=np.int32)
+    last_cycles = np.concatenate(last_cycles) if last_cycles else np.empty(0, dtype=np.int32)
+    predictions = np.concatenate(predictions) if predictions else np.empty(0, dtype=np.float32)
+
+    match = TEST_FILE_PATTERN.search(test_file.name)
+    frame = pd.DataFrame({
+        "dataset": match.group(1) if match else test_file.stem,
+        "unit_number": units.astype(np.int32),
+        "last_cycle": last_cycles.astype(np.int32),
+        "predicted_rul": predictions
+    })
+
+    summary = {
+        "dataset": frame["dataset"].iloc[0] if len(frame) else test_file.stem,
+        "file": str(test_file),
+        "engines": len(units),
+        "records": records,
+        "preprocess_s": round(preprocess_s, 3),
+        "inference_s": round(inference_s, 3)
+    }
+
+    y_true = load_true_rul(test_file, spec.rul_max, rul_dir)
+    if y_true is not None and len(y_true) == len(units):
+        frame["true_rul"] = y_true
+        summary["rmse"] = round(rmse(y_true, predictions), 4)
+        summary["nasa_score"] = round(nasa_score(y_true, predictions), 4)
+    elif y_true is not None:
+        logger.warning(f"RUL file for {test_file.name} has {len(y_true)} rows, expected {len(units)}; skipping metrics")
+
+    return {"frame": frame, "summary": summary}
+
+
+def write_predictions(frame: pd.DataFrame, output_path: str):
+    if output_path.endswith(".parquet"):
+        frame.to_parquet(output_path, index=False)
+    else:
+        frame.to_csv(output_path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score every engine in C-MAPSS test files")
+    parser.add_argument("input", help="test_FDxxx.txt file or a directory containing them")
+    parser.add_argument("-o", "--output", default="predictions.csv", help=".csv or .parquet")
+    parser.add_argument("--model", default="models/transformer_rul_FD002.pt",
+                        help="Model artifact, or a legacy state dict (.pth) together with --scaler")
+    parser.add_argument("--scaler", default=None, help="Pickled scaler for a legacy state dict")
+    parser.add_argument("--rul-dir", default=None, help="Directory with RUL_FDxxx.txt (defaults to the input directory)")
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--chunk-rows", type=int, default=100_000, help="Rows read from a test file at a time")
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args(argv)
+
+    torch.set_num_threads(args.threads)
+    device = torch.device(args.device)
+    if is_artifact(args.model):
+        artifact = load_artifact(args.model, device)
+        model = artifact["model"]
+        spec = FeatureSpec.from_feature_names(artifact["features"], artifact["sequence_length"], artifact["rul_max"])
+        pipeline = spec.compile(artifact["scaler"])
+    else:
+        if args.scaler is None:
+            parser.error(f"{args.model} is not a model artifact; pass --scaler for a legacy state dict")
+        model = load_model(args.model, device)
+        pipeline = FD002_SPEC.compile(load_scaler(args.scaler))
+
+    frames = []
+    for test_file in find_test_files(args.input):
+        result = score_file(test_file, model, pipeline, device, args.batch_size, args.chunk_rows, args.rul_dir)
+        frames.append(result["frame"])
+        print(result["summary"])
+
+    write_predictions(pd.concat(frames, ignore_index=True), args.output)
+    print(f"Wrote {sum(len(f) for f in frames)} predictions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
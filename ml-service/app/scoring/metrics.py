@@ -0,0 +1,13 @@
+import numpy as np
+
+
+def rmse(y_true, y_pred) -> float:
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    return float(np.sqrt(np.mean((y_pred - y_true) ** 2)))
+
+
+def nasa_score(y_true, y_pred) -> float:
+    """Asymmetric C-MAPSS scoring function; late predictions cost more than early ones"""
+    d = np.asarray(y_pred, dtype=np.float64) - np.asarray(y_true, dtype=np.float64)
+    return float(np.sum(np.where(d < 0, np.exp(-d / 13.0), np.exp(d / 10.0)) - 1.0))
@@ -0,0 +1,111 @@
+import os
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+import torch
+from sklearn.preprocessing import MinMaxScaler
+from torch.utils.data import Dataset
+
+from app.preprocessing.data_processor import (
+    load_data,
+    calculate_rul,
+    select_features,
+    create_last_sequences,
+    get_feature_names,
+    SEQUENCE_LENGTH,
+    RUL_MAX
+)
+
+
+def build_window_index(unit_numbers: np.ndarray, sequence_length: int) -> np.ndarray:
+    """Row index of the last timestep of every full window, units assumed contiguous.
+
+    Mirrors create_sequences: a unit with fewer than sequence_length rows yields no windows.
+    """
+    _, starts, counts = np.unique(unit_numbers, return_index=True, return_counts=True)
+    ends = [
+        np.arange(start + sequence_length - 1, start + count, dtype=np.int64)
+        for start, count in zip(starts, counts)
+        if count >= sequence_length
+    ]
+    return np.concatenate(ends) if ends else np.empty(0, dtype=np.int64)
+
+
+class WindowedRULDataset(Dataset):
+    """Sliding windows generated on demand from one scaled (rows, features) array.
+
+    Only the flat array and an int64 index of window end rows are held in
+    memory, instead of every (sequence_length, features) window.
+    """
+
+    def __init__(self, features: np.ndarray, rul: np.ndarray, unit_numbers: np.ndarray,
+                 sequence_length: int = SEQUENCE_LENGTH):
+        self.features = np.ascontiguousarray(features, dtype=np.float32)
+        self.rul = np.ascontiguousarray(rul, dtype=np.float32)
+        self.unit_numbers = np.asarray(unit_numbers)
+        self.sequence_length = sequence_length
+        self.window_ends = build_window_index(self.unit_numbers, sequence_length)
+        self._offsets = np.arange(-sequence_length + 1, 1, dtype=np.int64)
+
+    @classmethod
+    def from_index(cls, features: np.ndarray, rul: np.ndarray, window_ends: np.ndarray,
+                   sequence_length: int = SEQUENCE_LENGTH) -> "WindowedRULDataset":
+        """View over existing arrays (e.g. shared memory) with a precomputed window index"""
+        dataset = cls.__new__(cls)
+        dataset.features = features
+        dataset.rul = rul
+        dataset.unit_numbers = None
+        dataset.sequence_length = sequence_length
+        dataset.window_ends = window_ends
+        dataset._offsets = np.arange(-sequence_length + 1, 1, dtype=np.int64)
+        return dataset
+
+    def __len__(self):
+        return len(self.window_ends)
+
+    def __getitem__(self, idx):
+        end = self.window_ends[idx]
+        x = torch.from_numpy(self.features[end - self.sequence_length + 1:end + 1])
+        y = torch.from_numpy(self.rul[end:end + 1])
+        return x, y
+
+    def __getitems__(self, indices):
+        # Batched fetch: one fancy-index gather per batch instead of batch_size slices
+        ends = self.window_ends[np.asarray(indices)]
+        X = self.features[ends[:, None] + self._offsets]
+        y = self.rul[ends][:, None]
+        return torch.from_numpy(X), torch.from_numpy(y)
+
+
+def collate_windows(batch):
+    """__getitems__ already returns stacked tensors"""
+    return batch
+
+
+def load_training_data(data_dir: str, dataset_id: str, sequence_length: int = SEQUENCE_LENGTH,
+                       rul_max: int = RUL_MAX) -> Tuple[WindowedRULDataset, np.ndarray, np.ndarray, MinMaxScaler]:
+    """Same preprocessing as preprocess_dataset_exact without materializing training windows"""
+    feature_cols = get_feature_names()
+
+    train_df = load_data(os.path.join(data_dir, f"train_{dataset_id}.txt"))
+    train_df = calculate_rul(train_df)
+    train_df = select_features(train_df)
+    train_df = train_df.sort_values(['unit_number', 'time_in_cycles'], kind='stable')
+
+    scaler = MinMaxScaler()
+    train_features = scaler.fit_transform(train_df[feature_cols])
+    train_dataset = WindowedRULDataset(
+        train_features,
+        np.minimum(train_df['RUL'].values, rul_max),
+        train_df['unit_number'].values,
+        sequence_length
+    )
+
+    test_df = select_features(load_data(os.path.join(data_dir, f"test_{dataset_id}.txt")))
+    _, _, X_test = create_last_sequences(test_df, sequence_length, feature_cols, scaler)
+
+    y_test = pd.read_csv(os.path.join(data_dir, f"RUL_{dataset_id}.txt"), sep=r'\s+', header=None)
+    y_test = np.minimum(y_test.iloc[:, 0].values, rul_max).astype(np.float32)
+
+    return train_dataset, X_test, y_test, scaler
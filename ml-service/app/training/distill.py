@@ -0,0 +1,215 @@
+"""Distill a TransformerRUL artifact into a StudentRUL screening model.
+
+The teacher labels a window ending at every training cycle, with the same
+pipeline and front padding as serving. The student fits those labels with a
+Gaussian likelihood, so its std head learns where it disagrees with the
+teacher. ``--alpha`` mixes in the true (capped) RUL. One unit in ten is held
+out, and the epoch with the lowest held-out loss is kept.
+
+    python -m app.training.distill --teacher models/transformer_rul_FD002.pt --data-dir data/CMaps --dataset FD002
+"""
+import argparse
+import copy
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+import structlog
+import torch
+import torch.nn.functional as F
+
+from app.models.artifact import load_artifact
+from app.models.student import StudentRUL, save_student, status_of
+from app.preprocessing.data_processor import load_data, select_features
+from app.preprocessing.pipeline import CompiledPipeline, FeatureSpec, UnitFrame
+from app.scoring.metrics import rmse
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class DistillConfig:
+    teacher: str = "models/transformer_rul_FD002.pt"
+    dataset_id: str = "FD002"
+    data_dir: str = "data"
+    output: str = ""
+    channels: int = 32
+    kernel_size: int = 5
+    num_epochs: int = 30
+    batch_size: int = 256
+    learning_rate: float = 0.003
+    alpha: float = 0.0
+    validation_fraction: float = 0.1
+    threads: int = 0
+    seed: int = 42
+
+    @property
+    def output_path(self) -> str:
+        return self.output or os.path.join(os.path.dirname(self.teacher), f"student_rul_{self.dataset_id}.pt")
+
+
+class CycleWindows:
+    """A window ending at every cycle of a UnitFrame, built per batch instead of held in memory"""
+
+    def __init__(self, frame: UnitFrame, pipeline: CompiledPipeline):
+        self.frame = frame
+        self.pipeline = pipeline
+        self.ends = np.concatenate([np.arange(s + 1, e + 1) for s, e in zip(frame.starts, frame.ends)])
+        self.starts = np.repeat(frame.starts, frame.counts)
+        self.units = np.repeat(frame.units, frame.counts)
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    def batch(self, rows: np.ndarray) -> torch.Tensor:
+        return torch.from_numpy(self.pipeline.windows(self.frame.features, self.ends[rows], self.starts[rows]))
+
+
+def label(teacher: torch.nn.Module, windows: CycleWindows, batch_size: int = 1024) -> np.ndarray:
+    out = []
+    with torch.inference_mode():
+        for start in range(0, len(windows), batch_size):
+            rows = np.arange(start, min(start + batch_size, len(windows)))
+            out.append(teacher(windows.batch(rows)).reshape(-1).numpy())
+    return np.concatenate(out)
+
+
+def predict(student: StudentRUL, windows: CycleWindows, rows: np.ndarray, batch_size: int = 4096) -> np.ndarray:
+    student.eval()
+    out = []
+    with torch.inference_mode():
+        for start in range(0, len(rows), batch_size):
+            out.append(student(windows.batch(rows[start:start + batch_size])).numpy())
+    return np.concatenate(out) if out else np.empty((0, 2))
+
+
+def nll(out: torch.Tensor, target: torch.Tensor) -> torch.Tensor:
+    return F.gaussian_nll_loss(out[:, 0], target, out[:, 1] ** 2)
+
+
+def agreement(teacher_rul: np.ndarray, student_rul: np.ndarray) -> Dict[str, float]:
+    return {
+        "mean_abs_diff": float(np.abs(teacher_rul - student_rul).mean()),
+        "status_agreement": float((status_of(teacher_rul) == status_of(student_rul)).mean())
+    }
+
+
+def distill(config: DistillConfig) -> Dict[str, Any]:
+    torch.manual_seed(config.seed)
+    rng = np.random.default_rng(config.seed)
+    if config.threads > 0:
+        torch.set_num_threads(config.threads)
+
+    artifact = load_artifact(config.teacher, torch.device("cpu"))
+    teacher = artifact["model"]
+    spec = FeatureSpec.from_feature_names(artifact["features"], artifact["sequence_length"], artifact["rul_max"])
+    pipeline = spec.compile(artifact["scaler"])
+
+    train_df = select_features(load_data(os.path.join(config.data_dir, f"train_{config.dataset_id}.txt")))
+    frame = UnitFrame(train_df, spec)
+    windows = CycleWindows(frame, pipeline)
+    last_cycles = np.repeat(frame.last_cycles, frame.counts)
+    true_rul = np.minimum(last_cycles - frame.cycles, spec.rul_max).astype(np.float32)
+
+    start = time.perf_counter()
+    teacher_rul = label(teacher, windows)
+    logger.info("Teacher labelled training windows", windows=len(windows),
+                seconds=round(time.perf_counter() - start, 1))
+    target = torch.from_numpy(((1 - config.alpha) * teacher_rul + config.alpha * true_rul).astype(np.float32))
+
+    held_out = rng.choice(frame.units, max(1, int(len(frame.units) * config.validation_fraction)), replace=False)
+    # Windows are in frame row order, so the same mask selects training rows and windows
+    validation = np.isin(windows.units, held_out)
+    val_rows, train_rows = np.flatnonzero(validation), np.flatnonzero(~validation)
+
+    student = StudentRUL(spec.num_features, config.channels, config.kernel_size, spec.rul_max)
+    student.fit_normalization(pipeline.rows(frame.features[~validation]))
+    optimizer = torch.optim.Adam(student.parameters(), lr=config.learning_rate)
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, config.num_epochs)
+
+    best_loss, best_state, history = float("inf"), None, []
+    for epoch in range(config.num_epochs):
+        start = time.perf_counter()
+        student.train()
+        total = 0.0
+        order = rng.permutation(train_rows)
+        for i in range(0, len(order), config.batch_size):
+            rows = order[i:i + config.batch_size]
+            optimizer.zero_grad(set_to_none=True)
+            loss = nll(student(windows.batch(rows)), target[rows])
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(rows)
+        scheduler.step()
+
+        val = torch.from_numpy(predict(student, windows, val_rows))
+        val_loss = nll(val, target[val_rows]).item()
+        history.append({"epoch": epoch + 1, "loss": total / len(order), "val_loss": val_loss,
+                        "seconds": time.perf_counter() - start})
+        print(f"Epoch {epoch+1}/{config.num_epochs}, Loss: {history[-1]['loss']:.4f}, "
+              f"Held-out: {val_loss:.4f} ({history[-1]['seconds']:.1f}s)")
+        if val_loss < best_loss:
+            best_loss, best_state = val_loss, copy.deepcopy(student.state_dict())
+
+    if best_state is None:
+        # NaN never compares below best_loss, so a diverged run (or --epochs 0) ends up here
+        raise RuntimeError(f"None of the {len(history)} epochs reached a finite held-out loss; "
+                           "try a lower --lr or more --epochs")
+    student.load_state_dict(best_state)
+    val = predict(student, windows, val_rows)
+    metrics = {
+        "dataset_id": config.dataset_id,
+        "epochs": len(history),
+        "held_out_loss": best_loss,
+        "held_out": agreement(teacher_rul[val_rows], val[:, 0]),
+        "held_out_rmse": {"teacher": rmse(true_rul[val_rows], teacher_rul[val_rows]),
+                          "student": rmse(true_rul[val_rows], val[:, 0])}
+    }
+
+    test_path = os.path.join(config.data_dir, f"test_{config.dataset_id}.txt")
+    rul_path = os.path.join(config.data_dir, f"RUL_{config.dataset_id}.txt")
+    if os.path.exists(test_path):
+        test_frame = UnitFrame(select_features(load_data(test_path)), spec)
+        test_windows = torch.from_numpy(test_frame.last_windows(pipeline))
+        with torch.inference_mode():
+            test_teacher = teacher(test_windows).reshape(-1).numpy()
+            test_student = student.eval()(test_windows)[:, 0].numpy()
+        metrics["test"] = agreement(test_teacher, test_student)
+        if os.path.exists(rul_path):
+            y_test = np.minimum(pd.read_csv(rul_path, sep=r"\s+", header=None).iloc[:, 0].values, spec.rul_max)
+            metrics["test_rmse"] = {"teacher": rmse(y_test, test_teacher), "student": rmse(y_test, test_student)}
+    print(f"{config.dataset_id}: {metrics}")
+
+    save_student(
+        config.output_path, student, artifact["scaler"], artifact["features"], artifact["sequence_length"],
+        {"path": config.teacher, "created_at": artifact["created_at"], "architecture": artifact["architecture"]},
+        metrics
+    )
+    print(f"Saved student artifact to {config.output_path}")
+    return {"config": asdict(config), "history": history, "metrics": metrics, "artifact_path": config.output_path}
+
+
+def parse_args(argv=None) -> DistillConfig:
+    defaults = DistillConfig()
+    parser = argparse.ArgumentParser(description="Distill TransformerRUL into a StudentRUL screening model")
+    parser.add_argument("--teacher", default=defaults.teacher)
+    parser.add_argument("--dataset", dest="dataset_id", default=defaults.dataset_id)
+    parser.add_argument("--data-dir", default=defaults.data_dir)
+    parser.add_argument("-o", "--output", default=defaults.output)
+    parser.add_argument("--channels", type=int, default=defaults.channels)
+    parser.add_argument("--kernel-size", type=int, default=defaults.kernel_size)
+    parser.add_argument("--epochs", dest="num_epochs", type=int, default=defaults.num_epochs)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--lr", dest="learning_rate", type=float, default=defaults.learning_rate)
+    parser.add_argument("--alpha", type=float, default=defaults.alpha)
+    parser.add_argument("--validation-fraction", type=float, default=defaults.validation_fraction)
+    parser.add_argument("--threads", type=int, default=defaults.threads)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    return DistillConfig(**vars(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    distill(parse_args())
@@ -0,0 +1,290 @@
+"""Parallel hyperparameter sweep for TransformerRUL.
+
+    python -m app.training.sweep --data-dir data/CMaps --dataset FD002 \
+        --embed-dim 32 64 --num-layers 1 2 --num-heads 2 4 --dff 64 128 --lr 0.001 0.0005 \
+        --processes 4 --threads-per-trial 2 -o sweep_FD002.csv
+
+Windowed training data is prepared once in the parent and shared with every
+trial process through shared memory. Trials report validation RMSE per
+epoch to a shared table and are pruned when they fall behind the median of
+the trials that already reached that epoch.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, replace
+from multiprocessing import get_context, shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import structlog
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+from app.training.dataset import WindowedRULDataset, load_training_data
+from app.training.trainer import TrainingConfig, build_model, evaluate, make_loader, train_epoch
+
+logger = structlog.get_logger()
+
+# Per-process state installed by _init_worker
+_shared = {}
+_shared_blocks = []
+
+
+class SharedArrays:
+    """Named shared-memory copies of a dict of NumPy arrays"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.blocks = []
+        self.spec = {}
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.spec[key] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+
+def attach_shared(spec: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    arrays = {}
+    for key, (name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=name)
+        _shared_blocks.append(block)
+        arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return arrays
+
+
+class MedianPruner:
+    """Prune a trial whose metric is worse than the median of other trials at the same epoch"""
+
+    def __init__(self, table, warmup_epochs: int = 3, min_trials: int = 3):
+        self.table = table
+        self.warmup_epochs = warmup_epochs
+        self.min_trials = min_trials
+
+    def report(self, trial_id: int, epoch: int, value: float):
+        history = list(self.table.get(trial_id, []))
+        history.append(value)
+        self.table[trial_id] = history
+
+    def should_prune(self, trial_id: int, epoch: int, value: float) -> bool:
+        if epoch < self.warmup_epochs:
+            return False
+        peers = [
+            history[epoch - 1]
+            for other_id, history in self.table.items()
+            if other_id != trial_id and len(history) >= epoch
+        ]
+        if len(peers) < self.min_trials:
+            return False
+        return value > float(np.median(peers))
+
+
+def _init_worker(spec: Dict[str, Any], threads: int):
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    _shared.update(attach_shared(spec))
+
+
+def measure_latency(model: nn.Module, sequence_length: int, input_dim: int,
+                    batch_sizes=(1, 256), repeats: int = 30) -> Dict[str, float]:
+    model.eval()
+    results = {}
+    with torch.inference_mode():
+        for batch_size in batch_sizes:
+            x = torch.randn(batch_size, sequence_length, input_dim)
+            model(x)
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                model(x)
+                timings.append(time.perf_counter() - start)
+            results[f"latency_ms_b{batch_size}"] = float(np.median(timings) * 1000)
+            results[f"throughput_b{batch_size}"] = float(batch_size / np.median(timings))
+    return results
+
+
+def run_trial(trial_id: int, config: TrainingConfig, pruner: MedianPruner) -> Dict[str, Any]:
+    torch.manual_seed(config.seed + trial_id)
+    device = torch.device("cpu")
+
+    features, rul = _shared["features"], _shared["rul"]
+    train_dataset = WindowedRULDataset.from_index(features, rul, _shared["train_ends"], config.sequence_length)
+    val_dataset = WindowedRULDataset.from_index(features, rul, _shared["val_ends"], config.sequence_length)
+    X_val, y_val = val_dataset.__getitems__(np.arange(len(val_dataset)))
+    X_val, y_val = X_val.numpy(), y_val.numpy().ravel()
+
+    loader = make_loader(train_dataset, config, device)
+    model = build_model(config, features.shape[1]).to(device)
+    criterion = nn.MSELoss()
+    optimizer = optim.Adam(model.parameters(), lr=config.learning_rate)
+
+    best_rmse = float("inf")
+    best_state = None
+    epochs_no_improve = 0
+    pruned = False
+    start = time.perf_counter()
+
+    for epoch in range(1, config.num_epochs + 1):
+        train_epoch(model, loader, criterion, optimizer, device)
+        val_rmse = evaluate(model, X_val, y_val, device)["rmse"]
+        pruner.report(trial_id, epoch, val_rmse)
+
+        if val_rmse + config.min_delta < best_rmse:
+            best_rmse = val_rmse
+            best_state = {k: v.clone() for k, v in model.state_dict().items()}
+            epochs_no_improve = 0
+        else:
+            epochs_no_improve += 1
+            if epochs_no_improve == config.patience:
+                break
+
+        if pruner.should_prune(trial_id, epoch, val_rmse):
+            pruned = True
+            break
+
+    model.load_state_dict(best_state)
+    test_metrics = evaluate(model, _shared["X_test"], _shared["y_test"], device)
+
+    return {
+        "trial": trial_id,
+        "embed_dim": config.embed_dim,
+        "num_layers": config.num_layers,
+        "num_heads": config.num_heads,
+        "dff": config.dff,
+        "learning_rate": config.learning_rate,
+        "batch_size": config.batch_size,
+        "parameters": sum(p.numel() for p in model.parameters()),
+        "epochs": epoch,
+        "pruned": pruned,
+        "train_seconds": time.perf_counter() - start,
+        "val_rmse": best_rmse,
+        "test_rmse": test_metrics["rmse"],
+        "nasa_score": test_metrics["nasa_score"],
+        **measure_latency(model, config.sequence_length, features.shape[1])
+    }
+
+
+def build_grid(base: TrainingConfig, space: Dict[str, List[Any]], max_trials: Optional[int] = None,
+               seed: int = 0) -> List[TrainingConfig]:
+    keys = list(space)
+    configs = []
+    for values in itertools.product(*(space[k] for k in keys)):
+        config = replace(base, **dict(zip(keys, values)))
+        if config.embed_dim % config.num_heads != 0:
+            continue
+        configs.append(config)
+
+    if max_trials is not None and len(configs) > max_trials:
+        configs = random.Random(seed).sample(configs, max_trials)
+    return configs
+
+
+def split_windows_by_unit(dataset: WindowedRULDataset, val_fraction: float, seed: int):
+    window_units = dataset.unit_numbers[dataset.window_ends]
+    units = np.unique(window_units)
+    rng = np.random.default_rng(seed)
+    val_units = rng.choice(units, size=max(1, int(len(units) * val_fraction)), replace=False)
+    is_val = np.isin(window_units, val_units)
+    return dataset.window_ends[~is_val], dataset.window_ends[is_val]
+
+
+def run_sweep(base: TrainingConfig, space: Dict[str, List[Any]], processes: int, threads_per_trial: int,
+              val_fraction: float = 0.2, max_trials: Optional[int] = None,
+              warmup_epochs: int = 3, min_trials: int = 3) -> pd.DataFrame:
+    dataset, X_test, y_test, _ = load_training_data(base.data_dir, base.dataset_id, base.sequence_length, base.rul_max)
+    train_ends, val_ends = split_windows_by_unit(dataset, val_fraction, base.seed)
+    configs = build_grid(base, space, max_trials, base.seed)
+    logger.info(f"Sweeping {len(configs)} configs on {processes} processes x {threads_per_trial} threads")
+
+    shared = SharedArrays({
+        "features": dataset.features,
+        "rul": dataset.rul,
+        "train_ends": train_ends,
+        "val_ends": val_ends,
+        "X_test": X_test.astype(np.float32),
+        "y_test": y_test
+    })
+
+    ctx = get_context("spawn")
+    results = []
+    try:
+        with ctx.Manager() as manager:
+            pruner = MedianPruner(manager.dict(), warmup_epochs, min_trials)
+            with ProcessPoolExecutor(max_workers=processes, mp_context=ctx, initializer=_init_worker,
+                                     initargs=(shared.spec, threads_per_trial)) as pool:
+                futures = {pool.submit(run_trial, i, config, pruner): i for i, config in enumerate(configs)}
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Trial {futures[future]} failed: {e}")
+                        continue
+                    results.append(result)
+                    print(f"trial {result['trial']}: val_rmse={result['val_rmse']:.3f} "
+                          f"test_rmse={result['test_rmse']:.3f} latency_b1={result['latency_ms_b1']:.2f}ms"
+                          f"{' (pruned)' if result['pruned'] else ''}")
+    finally:
+        shared.close()
+
+    if not results:
+        raise RuntimeError(f"All {len(configs)} sweep trials failed; see the errors logged above")
+    return pd.DataFrame(results).sort_values("val_rmse").reset_index(drop=True)
+
+
+def main(argv=None):
+    defaults = TrainingConfig()
+    parser = argparse.ArgumentParser(description="Parallel TransformerRUL hyperparameter sweep")
+    parser.add_argument("--dataset", dest="dataset_id", default=defaults.dataset_id)
+    parser.add_argument("--data-dir", default=defaults.data_dir)
+    parser.add_argument("--embed-dim", type=int, nargs="+", default=[defaults.embed_dim])
+    parser.add_argument("--num-layers", type=int, nargs="+", default=[defaults.num_layers])
+    parser.add_argument("--num-heads", type=int, nargs="+", default=[defaults.num_heads])
+    parser.add_argument("--dff", type=int, nargs="+", default=[defaults.dff])
+    parser.add_argument("--lr", type=float, nargs="+", default=[defaults.learning_rate])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[defaults.batch_size])
+    parser.add_argument("--epochs", type=int, default=defaults.num_epochs)
+    parser.add_argument("--patience", type=int, default=defaults.patience)
+    parser.add_argument("--max-trials", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--threads-per-trial", type=int, default=2)
+    parser.add_argument("--val-fraction", type=float, default=0.2)
+    parser.add_argument("--warmup-epochs", type=int, default=3)
+    parser.add_argument("--min-trials", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("-o", "--output", default="sweep_results.csv")
+    args = parser.parse_args(argv)
+
+    base = replace(defaults, dataset_id=args.dataset_id, data_dir=args.data_dir, num_epochs=args.epochs,
+                   patience=args.patience, seed=args.seed)
+    space = {
+        "embed_dim": args.embed_dim,
+        "num_layers": args.num_layers,
+        "num_heads": args.num_heads,
+        "dff": args.dff,
+        "learning_rate": args.lr,
+        "batch_size": args.batch_size
+    }
+
+    leaderboard = run_sweep(base, space, args.processes, args.threads_per_trial, args.val_fraction,
+                            args.max_trials, args.warmup_epochs, args.min_trials)
+    leaderboard.to_csv(args.output, index=False)
+    with open(os.path.splitext(args.output)[0] + ".json", "w") as f:
+        json.dump({"base_config": asdict(base), "space": space, "trials": leaderboard.to_dict("records")}, f, indent=2)
+
+    print(leaderboard.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
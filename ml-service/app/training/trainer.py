@@ -0,0 +1,253 @@
+"""Train TransformerRUL on a C-MAPSS subset.
+
+    python -m app.training.trainer --data-dir data/CMaps --dataset FD002 --workers 8 --batch-size 256
+    python -m app.training.trainer --data-dir data/CMaps --dataset FD002 --resume
+"""
+import argparse
+import copy
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Any
+
+import numpy as np
+import structlog
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import DataLoader
+
+from app.models.artifact import save_artifact
+from app.models.transformer_model import TransformerRUL
+from app.preprocessing.data_processor import get_feature_names, SEQUENCE_LENGTH, RUL_MAX
+from app.scoring.metrics import rmse, nasa_score
+from app.training.dataset import WindowedRULDataset, collate_windows, load_training_data
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class TrainingConfig:
+    """Defaults match the training notebook"""
+    dataset_id: str = "FD002"
+    data_dir: str = "data"
+    output_dir: str = "models"
+    sequence_length: int = SEQUENCE_LENGTH
+    rul_max: int = RUL_MAX
+    embed_dim: int = 64
+    num_layers: int = 2
+    num_heads: int = 4
+    dff: int = 128
+    rate: float = 0.1
+    num_epochs: int = 100
+    batch_size: int = 32
+    learning_rate: float = 0.001
+    patience: int = 10
+    min_delta: float = 0.001
+    num_workers: int = 0
+    pin_memory: bool = True
+    threads: int = 0
+    seed: int = 42
+    checkpoint_every: int = 1
+    resume: bool = False
+
+    @property
+    def architecture(self) -> Dict[str, Any]:
+        return {
+            "embed_dim": self.embed_dim,
+            "num_layers": self.num_layers,
+            "num_heads": self.num_heads,
+            "dff": self.dff,
+            "rate": self.rate,
+            "max_rul": self.rul_max
+        }
+
+
+def make_loader(dataset: WindowedRULDataset, config: TrainingConfig, device: torch.device) -> DataLoader:
+    return DataLoader(
+        dataset,
+        batch_size=config.batch_size,
+        shuffle=True,
+        num_workers=config.num_workers,
+        collate_fn=collate_windows,
+        pin_memory=config.pin_memory and device.type == "cuda",
+        persistent_workers=config.num_workers > 0,
+        prefetch_factor=4 if config.num_workers > 0 else None
+    )
+
+
+def build_model(config: TrainingConfig, input_dim: int = 16) -> TransformerRUL:
+    return TransformerRUL(input_dim=input_dim, **config.architecture)
+
+
+def checkpoint_path(config: TrainingConfig) -> str:
+    return os.path.join(config.output_dir, f"checkpoint_{config.dataset_id}.pt")
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]):
+    state = dict(state)
+    state["torch_rng"] = torch.get_rng_state()
+    state["numpy_rng"] = np.random.get_state()
+    tmp_path = f"{path}.tmp"
+    torch.save(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    # Our own file; numpy RNG state needs the full unpickler
+    state = torch.load(path, map_location="cpu", weights_only=False)
+    torch.set_rng_state(state["torch_rng"])
+    np.random.set_state(state["numpy_rng"])
+    return state
+
+
+def evaluate(model: TransformerRUL, X: np.ndarray, y_true: np.ndarray, device: torch.device,
+             batch_size: int = 1024) -> Dict[str, float]:
+    model.eval()
+    predictions = []
+    with torch.no_grad():
+        for start in range(0, len(X), batch_size):
+            batch = torch.from_numpy(np.ascontiguousarray(X[start:start + batch_size], dtype=np.float32))
+            predictions.append(model(batch.to(device)).cpu().numpy().flatten())
+    predictions = np.concatenate(predictions)
+    return {"rmse": rmse(y_true, predictions), "nasa_score": nasa_score(y_true, predictions)}
+
+
+def train_epoch(model, loader, criterion, optimizer, device) -> float:
+    model.train()
+    total_loss = 0.0
+    non_blocking = device.type == "cuda"
+    for batch_X, batch_y in loader:
+        batch_X = batch_X.to(device, non_blocking=non_blocking)
+        batch_y = batch_y.to(device, non_blocking=non_blocking)
+
+        optimizer.zero_grad(set_to_none=True)
+        loss = criterion(model(batch_X), batch_y)
+        loss.backward()
+        optimizer.step()
+        total_loss += loss.item()
+    return total_loss / len(loader)
+
+
+def train(config: TrainingConfig) -> Dict[str, Any]:
+    torch.manual_seed(config.seed)
+    np.random.seed(config.seed)
+    if config.threads > 0:
+        torch.set_num_threads(config.threads)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    train_dataset, X_test, y_test, scaler = load_training_data(
+        config.data_dir, config.dataset_id, config.sequence_length, config.rul_max
+    )
+    logger.info(f"{config.dataset_id}: {len(train_dataset)} training windows over {len(train_dataset.features)} rows")
+
+    loader = make_loader(train_dataset, config, device)
+    model = build_model(config, train_dataset.features.shape[1]).to(device)
+    criterion = nn.MSELoss()
+    optimizer = optim.Adam(model.parameters(), lr=config.learning_rate)
+
+    best_loss = float("inf")
+    best_state = None
+    epochs_no_improve = 0
+    history = []
+    start_epoch = 0
+
+    os.makedirs(config.output_dir, exist_ok=True)
+    ckpt_path = checkpoint_path(config)
+    if config.resume and os.path.exists(ckpt_path):
+        state = load_checkpoint(ckpt_path)
+        model.load_state_dict(state["model"])
+        optimizer.load_state_dict(state["optimizer"])
+        best_loss = state["best_loss"]
+        best_state = state["best_state"]
+        epochs_no_improve = state["epochs_no_improve"]
+        history = state["history"]
+        start_epoch = state["epoch"]
+        print(f"Resuming {config.dataset_id} from epoch {start_epoch + 1}")
+
+    stopped = start_epoch > 0 and epochs_no_improve >= config.patience
+    for epoch in range(start_epoch, config.num_epochs):
+        if stopped:
+            break
+        start = time.perf_counter()
+        avg_train_loss = train_epoch(model, loader, criterion, optimizer, device)
+        history.append({"epoch": epoch + 1, "loss": avg_train_loss, "seconds": time.perf_counter() - start})
+        print(f"Epoch {epoch+1}/{config.num_epochs}, Training Loss: {avg_train_loss:.4f} ({history[-1]['seconds']:.1f}s)")
+
+        if avg_train_loss + config.min_delta < best_loss:
+            best_loss = avg_train_loss
+            best_state = copy.deepcopy(model.state_dict())
+            epochs_no_improve = 0
+        else:
+            epochs_no_improve += 1
+            if epochs_no_improve == config.patience:
+                print(f"Early stopping triggered after {epoch+1} epochs for {config.dataset_id}.")
+                stopped = True
+
+        if stopped or (epoch + 1) % config.checkpoint_every == 0 or epoch + 1 == config.num_epochs:
+            save_checkpoint(ckpt_path, {
+                "config": asdict(config),
+                "epoch": epoch + 1,
+                "model": model.state_dict(),
+                "optimizer": optimizer.state_dict(),
+                "best_loss": best_loss,
+                "best_state": best_state,
+                "epochs_no_improve": epochs_no_improve,
+                "history": history
+            })
+
+    model.load_state_dict(best_state)
+    metrics = evaluate(model, X_test, y_test, device)
+    print(f"{config.dataset_id}: RMSE {metrics['rmse']:.4f}, C-MAPSS Score {metrics['nasa_score']:.4f}")
+
+    artifact_path = os.path.join(config.output_dir, f"transformer_rul_{config.dataset_id}.pt")
+    save_artifact(
+        artifact_path,
+        model,
+        scaler,
+        get_feature_names(),
+        config.sequence_length,
+        config.rul_max,
+        {"input_dim": train_dataset.features.shape[1], **config.architecture},
+        {
+            "dataset_id": config.dataset_id,
+            "best_loss": best_loss,
+            "epochs": len(history),
+            "rmse": metrics["rmse"],
+            "nasa_score": metrics["nasa_score"]
+        }
+    )
+    print(f"Saved model artifact to {artifact_path}")
+
+    return {
+        "config": asdict(config),
+        "best_loss": best_loss,
+        "epochs": len(history),
+        "history": history,
+        "metrics": metrics,
+        "artifact_path": artifact_path
+    }
+
+
+def parse_args(argv=None) -> TrainingConfig:
+    defaults = TrainingConfig()
+    parser = argparse.ArgumentParser(description="Train TransformerRUL on C-MAPSS")
+    parser.add_argument("--dataset", dest="dataset_id", default=defaults.dataset_id)
+    parser.add_argument("--data-dir", default=defaults.data_dir)
+    parser.add_argument("--output-dir", default=defaults.output_dir)
+    parser.add_argument("--epochs", dest="num_epochs", type=int, default=defaults.num_epochs)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--lr", dest="learning_rate", type=float, default=defaults.learning_rate)
+    parser.add_argument("--patience", type=int, default=defaults.patience)
+    parser.add_argument("--min-delta", type=float, default=defaults.min_delta)
+    parser.add_argument("--workers", dest="num_workers", type=int, default=defaults.num_workers)
+    parser.add_argument("--no-pin-memory", dest="pin_memory", action="store_false")
+    parser.add_argument("--threads", type=int, default=defaults.threads)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--checkpoint-every", type=int, default=defaults.checkpoint_every)
+    parser.add_argument("--resume", action="store_true")
+    return TrainingConfig(**vars(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    train(parse_args())
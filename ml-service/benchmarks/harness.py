@@ -0,0 +1,106 @@
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Nominal sensor levels and spreads, as in create_mock_sensor_data
+SENSOR_MEANS = np.array([518.67, 641.82, 1589.70, 1400.60, 14.62, 21.61, 554.36, 2388.06, 9046.19, 1.30, 47.47,
+                         521.66, 2388.02, 8138.62, 8.4195, 0.03, 392, 2388, 100.00, 39.06, 23.4190])
+SENSOR_STDS = np.array([10, 20, 50, 100, 2, 3, 20, 50, 200, 0.2, 5, 20, 50, 200, 1, 0.01, 20, 50, 5, 5, 3])
+
+
+def synthetic_cmapss(num_units: int = 100, min_cycles: int = 30, max_cycles: int = 300, seed: int = 0) -> pd.DataFrame:
+    """Raw 26-column C-MAPSS-shaped frame with the load_data column names"""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(min_cycles, max_cycles + 1, size=num_units)
+    units = np.repeat(np.arange(1, num_units + 1), lengths)
+    cycles = np.concatenate([np.arange(1, n + 1) for n in lengths])
+    wear = (cycles / np.repeat(lengths, lengths))[:, None]
+
+    sensors = SENSOR_MEANS * (1 + 0.01 * wear) + rng.normal(0, 1, (len(units), 21)) * SENSOR_STDS * 0.05
+    settings = np.column_stack([
+        rng.choice([0, 10, 20, 25, 35, 42], len(units)),
+        rng.choice([0.25, 0.62, 0.70, 0.84], len(units)),
+        rng.choice([60, 100], len(units))
+    ])
+
+    df = pd.DataFrame(np.column_stack([units, cycles, settings, sensors]),
+                      columns=["unit_number", "time_in_cycles", "op_setting_1", "op_setting_2", "op_setting_3"] +
+                              [f"sensor_measurement_{i}" for i in range(1, 22)])
+    df["unit_number"] = df["unit_number"].astype(int)
+    df["time_in_cycles"] = df["time_in_cycles"].astype(int)
+    return df
+
+
+def write_cmapss_text(df: pd.DataFrame, path: str):
+    """Whitespace-separated, headerless, like the NASA distribution files"""
+    df.to_csv(path, sep=" ", header=False, index=False, float_format="%.4f")
+
+
+def summarize(timings_s: List[float], items_per_call: int = 1) -> Dict[str, float]:
+    ms = np.asarray(timings_s) * 1000
+    p50 = float(np.percentile(ms, 50))
+    return {
+        "n": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": p50,
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "min_ms": float(ms.min()),
+        "throughput_per_s": items_per_call / (p50 / 1000) if p50 > 0 else float("inf")
+    }
+
+
+def time_call(fn: Callable[[], Any], repeats: int = 100, warmup: int = 5, min_time_s: float = 0.0) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    deadline = time.perf_counter() + min_time_s
+    while len(timings) < repeats or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def environment() -> Dict[str, Any]:
+    import torch
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True).stdout.strip())
+    except Exception:
+        commit, dirty = None, None
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "git_commit": commit,
+        "git_dirty": dirty,
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads()
+    }
+
+
+class Results:
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+
+    def add(self, name: str, params: Dict[str, Any], timings_s: List[float], items_per_call: int = 1,
+            extra: Optional[Dict[str, Any]] = None):
+        record = {"name": name, "params": params, **summarize(timings_s, items_per_call), **(extra or {})}
+        self.records.append(record)
+        label = ", ".join(f"{k}={v}" for k, v in params.items())
+        print(f"{name:<32} {label:<36} p50={record['p50_ms']:9.3f}ms p95={record['p95_ms']:9.3f}ms "
+              f"p99={record['p99_ms']:9.3f}ms {record['throughput_per_s']:12.1f}/s")
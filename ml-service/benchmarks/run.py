@@ -0,0 +1,103 @@
+"""Reproducible ML service benchmarks.
+
+Run from ml-service/:
+
+    python -m benchmarks.run -o bench_before.json
+    python -m benchmarks.run --suites model --batch-sizes 1 64 4096 --threads 1 4 -o bench_after.json
+    python -m benchmarks.run compare bench_before.json bench_after.json
+
+Every result records p50/p95/p99 latency and throughput, and the file
+carries the git commit and library versions so runs can be compared.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import torch
+
+from app.models.transformer_model import load_model, load_scaler
+from app.models.artifact import load_artifact
+from benchmarks.harness import Results, environment
+from benchmarks.suites import bench_load_data, bench_model, bench_predict_endpoint, bench_preprocessing
+
+SUITES = ["model", "preprocessing", "load_data", "api"]
+
+
+def load_model_and_scaler(model_path: str, scaler_path: str):
+    device = torch.device("cpu")
+    if model_path.endswith(".pt"):
+        artifact = load_artifact(model_path, device)
+        return artifact["model"], artifact["scaler"]
+    return load_model(model_path, device), load_scaler(scaler_path)
+
+
+def run(argv=None):
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Run ML service benchmarks")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=SUITES)
+    parser.add_argument("--model", default="models/transformer_rul_FD002.pt")
+    parser.add_argument("--scaler", default="models/transformer_scaler.pkl", help="Only used with a legacy .pth model")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64, 512, 4096])
+    parser.add_argument("--threads", type=int, nargs="+",
+                        default=sorted({1, max(1, cpu_count // 2), cpu_count}))
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    torch.manual_seed(args.seed)
+    np.random.seed(args.seed)
+    model, scaler = load_model_and_scaler(args.model, args.scaler)
+    results = Results()
+
+    if "model" in args.suites:
+        bench_model(results, model, args.batch_sizes, args.threads, args.repeats)
+    if "preprocessing" in args.suites:
+        bench_preprocessing(results, scaler, args.repeats, args.seed)
+    if "load_data" in args.suites:
+        bench_load_data(results, args.repeats, args.seed)
+    if "api" in args.suites:
+        bench_predict_endpoint(results, args.concurrency, args.requests, args.seed)
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "config": vars(args), "results": results.records}, f, indent=2)
+    print(f"Wrote {len(results.records)} results to {args.output}")
+
+
+def compare(argv):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="p50_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    def key(record):
+        return record["name"], json.dumps(record["params"], sort_keys=True)
+
+    base_index = {key(r): r for r in baseline["results"]}
+    print(f"baseline {baseline['environment']['git_commit']} vs candidate {candidate['environment']['git_commit']} "
+          f"({args.metric}, lower is better)")
+    for record in candidate["results"]:
+        before = base_index.get(key(record))
+        if before is None:
+            continue
+        ratio = record[args.metric] / before[args.metric] if before[args.metric] else float("nan")
+        label = ", ".join(f"{k}={v}" for k, v in record["params"].items())
+        print(f"{record['name']:<32} {label:<36} {before[args.metric]:10.3f} -> {record[args.metric]:10.3f} ms  "
+              f"x{ratio:.2f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        compare(sys.argv[2:])
+    else:
+        run()
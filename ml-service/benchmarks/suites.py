@@ -0,0 +1,105 @@
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+
+import torch
+
+from app.preprocessing.data_processor import (
+    load_data,
+    calculate_rul,
+    select_features,
+    create_sequences,
+    preprocess_fd002_sequence,
+    preprocess_for_model,
+    create_mock_sensor_data,
+    SELECTED_SENSORS,
+    SELECTED_SETTINGS,
+    SEQUENCE_LENGTH
+)
+from benchmarks.harness import Results, synthetic_cmapss, time_call, write_cmapss_text
+
+
+def bench_model(results: Results, model, batch_sizes: List[int], thread_counts: List[int], repeats: int):
+    model.eval()
+    default_threads = torch.get_num_threads()
+    for threads in thread_counts:
+        torch.set_num_threads(threads)
+        for batch_size in batch_sizes:
+            x = torch.rand(batch_size, SEQUENCE_LENGTH, model.input_dim)
+            # Keep large batches from dominating wall time
+            n = max(5, min(repeats, int(repeats * 64 / batch_size)))
+            with torch.inference_mode():
+                timings = time_call(lambda: model(x), repeats=n, warmup=3)
+            results.add("model.forward", {"batch_size": batch_size, "threads": threads}, timings, batch_size)
+    torch.set_num_threads(default_threads)
+
+
+def bench_preprocessing(results: Results, scaler, repeats: int, seed: int = 0):
+    raw = synthetic_cmapss(num_units=100, seed=seed)
+    df = select_features(raw)
+    engine = df[df["unit_number"] == 1]
+
+    results.add("preprocess_fd002_sequence", {"rows": len(engine.tail(SEQUENCE_LENGTH))},
+                time_call(lambda: preprocess_fd002_sequence(engine.tail(SEQUENCE_LENGTH), scaler), repeats))
+
+    mock = create_mock_sensor_data(1)
+    results.add("preprocess_for_model", {"input": "flat_dict"},
+                time_call(lambda: preprocess_for_model(dict(mock), scaler), repeats))
+
+    train = select_features(calculate_rul(raw))
+    sensor_cols = [f"sensor_measurement_{i}" for i in SELECTED_SENSORS]
+    setting_cols = [f"op_setting_{i}" for i in SELECTED_SETTINGS]
+    results.add("create_sequences", {"units": 100, "rows": len(train)},
+                time_call(lambda: create_sequences(train, SEQUENCE_LENGTH, sensor_cols, setting_cols),
+                          repeats=max(3, repeats // 50), warmup=1))
+
+
+def bench_load_data(results: Results, repeats: int, seed: int = 0):
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_units in (100, 260):
+            path = os.path.join(tmp, f"test_{num_units}.txt")
+            df = synthetic_cmapss(num_units=num_units, seed=seed)
+            write_cmapss_text(df, path)
+            results.add("load_data", {"units": num_units, "rows": len(df)},
+                        time_call(lambda: load_data(path), repeats=max(3, repeats // 20), warmup=1))
+
+
+def bench_predict_endpoint(results: Results, concurrency_levels: List[int], requests_per_level: int, seed: int = 0):
+    """End-to-end /predict through an in-process ASGI client (no sockets)"""
+    import httpx
+    import app.main as service
+
+    async def run():
+        async with service.app.router.lifespan_context(service.app):
+            await service.wait_for_startup()
+            df = select_features(synthetic_cmapss(num_units=100, seed=seed))
+            service.fd002_data = df
+            service.engines_available = int(df["unit_number"].nunique())
+
+            transport = httpx.ASGITransport(app=service.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                await client.post("/predict", json={"unit_number": 1, "use_real_data": True})
+
+                for concurrency in concurrency_levels:
+                    semaphore = asyncio.Semaphore(concurrency)
+                    timings, statuses = [], []
+
+                    async def one(i):
+                        async with semaphore:
+                            start = time.perf_counter()
+                            resp = await client.post("/predict", json={"unit_number": i % 100 + 1, "use_real_data": True})
+                            timings.append(time.perf_counter() - start)
+                            statuses.append(resp.status_code)
+
+                    wall = time.perf_counter()
+                    await asyncio.gather(*(one(i) for i in range(requests_per_level)))
+                    wall = time.perf_counter() - wall
+
+                    results.add("api.predict", {"concurrency": concurrency}, timings, extra={
+                        "requests_per_s": len(timings) / wall,
+                        "status_counts": {str(s): statuses.count(s) for s in sorted(set(statuses))}
+                    })
+
+    asyncio.run(run())